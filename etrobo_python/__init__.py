@@ -1,6 +1,6 @@
 from .device import (ColorSensor, GyroSensor, Hub, Motor, ReversedMotor, SonarSensor,  # noqa
                      TouchSensor)
-from .etrobo import ETRobo  # noqa
+from .etrobo import ETRobo, dispatch_all  # noqa
 
 __author__ = 'Atsushi TAKEDA'
 __version__ = '0.6.3'
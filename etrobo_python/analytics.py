@@ -0,0 +1,382 @@
+'''複数のログファイルをまとめて集計するためのモジュール。
+
+ディレクトリに保存されたログファイル（LogWriterで作成されたもの）をプロセスプールで並列に読み込み、
+デバイスのフィールドごとに最小値・最大値・平均値・パーセンタイル・ヒストグラムを計算する。
+ファイルごとの集計結果はディレクトリ内のサイドカーファイル（.etrobo_log_summary.json）に保存されるため、
+再度集計する場合は新しく追加された（または更新された）ファイルのみが読み込まれる。
+
+**プログラム例**
+
+.. code-block:: python
+
+    from etrobo_python.analytics import analyze_logs
+
+    stats = analyze_logs('logs', fields=['gyro_sensor.velocity'], since=time.time() - 7 * 86400)
+    print(stats['gyro_sensor.velocity']['max'])
+'''
+import concurrent.futures
+import fnmatch
+import glob
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .log import LogReader
+
+# サイドカーファイルの名前
+SUMMARY_FILENAME = '.etrobo_log_summary.json'
+
+# サイドカーファイルの形式のバージョン（集計方法を変更した場合は値を変更すること）
+SUMMARY_VERSION = 1
+
+# ヒストグラムのビンの幅（デバイスタイプ, フィールド名）
+# 指定のないフィールドの幅は1（値ごとに数える）
+HISTOGRAM_WIDTHS = {
+    ('hub', 'time'): 1000,
+    ('motor', 'count'): 10,
+}
+
+
+def _get_histogram_width(device_type: str, field: str) -> int:
+    return HISTOGRAM_WIDTHS.get((device_type, field), 1)
+
+
+def summarize_log(
+    path: str,
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+) -> Dict[str, Any]:
+    '''1つのログファイルをフィールドごとに集計する。
+    集計結果は他のファイルの集計結果と合成できる形式（件数、合計、ヒストグラムなど）で返す。
+
+    Args:
+        path: ログファイルのパス。
+        t0: 集計対象の開始時刻（Hubの時刻、単位は秒）。Noneの場合は先頭から。
+        t1: 集計対象の終了時刻（Hubの時刻、単位は秒）。Noneの場合は末尾まで。
+
+    Returns:
+        '変数名.フィールド名' をキーとする集計結果の辞書。
+    '''
+    summary: Dict[str, Any] = {}
+
+    with LogReader(path) as reader:
+        devices = reader.get_devices()
+        fields = reader.get_fields()
+        time_name = next((name for name, device_type in devices if device_type == 'hub'), None)
+
+        if (t0 is not None or t1 is not None) and time_name is None:
+            raise ValueError(f'The log file does not contain a hub device: {path}')
+
+        for (name, device_type), device_fields in zip(devices, fields):
+            for field, _ in device_fields:
+                summary[f'{name}.{field}'] = {
+                    'type': device_type,
+                    'count': 0,
+                    'min': None,
+                    'max': None,
+                    'sum': 0.0,
+                    'sum_squares': 0.0,
+                    'width': _get_histogram_width(device_type, field),
+                    'histogram': {},
+                }
+
+        for arrays in reader.iter_arrays():
+            # 時刻で集計対象のフレームを絞り込む
+            if time_name is not None and (t0 is not None or t1 is not None):
+                times = arrays[time_name]['time']
+                mask = np.ones(len(arrays), dtype=bool)
+                if t0 is not None:
+                    mask &= times >= round(t0 * 1000)
+                if t1 is not None:
+                    mask &= times < round(t1 * 1000)
+                arrays = arrays[mask]
+
+            if len(arrays) == 0:
+                continue
+
+            for (name, _), device_fields in zip(devices, fields):
+                for field, _ in device_fields:
+                    _update_summary(summary[f'{name}.{field}'], arrays[name][field])
+
+    return summary
+
+
+def _update_summary(summary: Dict[str, Any], values: Any) -> None:
+    values = values.astype(np.int64)
+    minimum, maximum = int(values.min()), int(values.max())
+
+    summary['count'] += len(values)
+    summary['min'] = minimum if summary['min'] is None else min(summary['min'], minimum)
+    summary['max'] = maximum if summary['max'] is None else max(summary['max'], maximum)
+    summary['sum'] += float(values.sum())
+    summary['sum_squares'] += float(np.square(values, dtype=np.float64).sum())
+
+    keys, counts = np.unique(values // summary['width'], return_counts=True)
+    histogram = summary['histogram']
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        histogram[str(key)] = histogram.get(str(key), 0) + count
+
+
+def merge_summaries(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    '''summarize_log()で作成した集計結果を合成する。
+
+    Args:
+        summaries: 集計結果のリスト。
+
+    Returns:
+        合成した集計結果。
+    '''
+    merged: Dict[str, Any] = {}
+
+    for summary in summaries:
+        for key, value in summary.items():
+            if value['count'] == 0:
+                continue
+
+            if key not in merged:
+                merged[key] = {
+                    'type': value['type'],
+                    'count': 0,
+                    'min': value['min'],
+                    'max': value['max'],
+                    'sum': 0.0,
+                    'sum_squares': 0.0,
+                    'width': value['width'],
+                    'histogram': {},
+                }
+
+            target = merged[key]
+            target['count'] += value['count']
+            target['min'] = min(target['min'], value['min'])
+            target['max'] = max(target['max'], value['max'])
+            target['sum'] += value['sum']
+            target['sum_squares'] += value['sum_squares']
+
+            for bin_key, count in value['histogram'].items():
+                target['histogram'][bin_key] = target['histogram'].get(bin_key, 0) + count
+
+    return merged
+
+
+def get_statistics(
+    summary: Dict[str, Any],
+    percentiles: Sequence[float] = (50, 95, 99),
+    bins: Optional[int] = None,
+) -> Dict[str, Any]:
+    '''集計結果から統計量を計算する。
+    パーセンタイルはヒストグラムから計算するため、ビンの幅が1より大きいフィールドでは近似値となる。
+
+    Args:
+        summary: summarize_log()またはmerge_summaries()で作成した集計結果。
+        percentiles: 計算するパーセンタイル（0-100）。
+        bins: ヒストグラムのビンの数。Noneの場合はヒストグラムを計算しない。
+
+    Returns:
+        '変数名.フィールド名' をキーとする統計量の辞書。
+        統計量はcount, min, max, mean, std, percentiles（, histogram）を含む。
+    '''
+    statistics: Dict[str, Any] = {}
+
+    for key, value in summary.items():
+        count = value['count']
+        if count == 0:
+            continue
+
+        mean = value['sum'] / count
+        variance = max(value['sum_squares'] / count - mean * mean, 0.0)
+        width = value['width']
+
+        items = sorted((int(k), c) for k, c in value['histogram'].items())
+        centers = np.array([k * width + (width - 1) / 2 for k, _ in items], dtype=np.float64)
+        cumsum = np.cumsum([c for _, c in items])
+
+        stats: Dict[str, Any] = {
+            'count': count,
+            'min': value['min'],
+            'max': value['max'],
+            'mean': mean,
+            'std': math.sqrt(variance),
+            'percentiles': {
+                p: float(centers[min(np.searchsorted(cumsum, count * p / 100), len(centers) - 1)])
+                for p in percentiles},
+        }
+
+        if bins is not None:
+            edges = np.linspace(value['min'], value['max'] + 1, bins + 1)
+            counts, _ = np.histogram(
+                centers, bins=edges, weights=np.array([c for _, c in items], dtype=np.float64))
+            stats['histogram'] = {'edges': edges.tolist(), 'counts': counts.astype(np.int64).tolist()}
+
+        statistics[key] = stats
+
+    return statistics
+
+
+def find_logs(paths: Union[str, Sequence[str]], pattern: str = '*.log') -> List[str]:
+    '''集計対象のログファイルのパスを取得する。
+
+    Args:
+        paths: ディレクトリ、ファイル、またはワイルドカードを含むパス（のリスト）。
+        pattern: ディレクトリを指定した場合に対象とするファイル名のパターン。
+
+    Returns:
+        ログファイルのパスのリスト。
+    '''
+    if isinstance(paths, str):
+        paths = [paths]
+
+    logfiles: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            logfiles.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if fnmatch.fnmatch(name, pattern) and os.path.isfile(os.path.join(path, name)))
+        else:
+            logfiles.extend(sorted(glob.glob(path)) or [path])
+
+    return logfiles
+
+
+def _load_sidecar(directory: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(directory, SUMMARY_FILENAME), 'r') as reader:
+            sidecar = json.load(reader)
+    except (OSError, ValueError):
+        return {}
+
+    if sidecar.get('version') != SUMMARY_VERSION:
+        return {}
+
+    return sidecar.get('files', {})
+
+
+def _save_sidecar(directory: str, files: Dict[str, Any]) -> None:
+    path = os.path.join(directory, SUMMARY_FILENAME)
+    temp_path = path + '.tmp'
+
+    with open(temp_path, 'w') as writer:
+        json.dump({'version': SUMMARY_VERSION, 'files': files}, writer)
+
+    os.replace(temp_path, path)
+
+
+def summarize_logs(
+    paths: Union[str, Sequence[str]],
+    pattern: str = '*.log',
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+    since: Optional[float] = None,
+    jobs: Optional[int] = None,
+    cache: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    '''複数のログファイルをファイルごとに集計する。
+    サイドカーファイルに保存された集計結果があり、ファイルが更新されていなければその結果を使用する。
+
+    Args:
+        paths: ディレクトリ、ファイル、またはワイルドカードを含むパス（のリスト）。
+        pattern: ディレクトリを指定した場合に対象とするファイル名のパターン。
+        t0: 集計対象の開始時刻（Hubの時刻、単位は秒）。
+        t1: 集計対象の終了時刻（Hubの時刻、単位は秒）。
+        since: この時刻（UNIX時間）以降に更新されたファイルのみを対象とする。
+        jobs: 並列に処理するプロセス数。Noneの場合はCPUの数。
+        cache: Trueの場合はサイドカーファイルを読み書きする。
+
+    Returns:
+        ログファイルのパスをキーとする集計結果の辞書。
+    '''
+    logfiles = find_logs(paths, pattern)
+    window = '{}:{}'.format(t0, t1)
+
+    if since is not None:
+        logfiles = [path for path in logfiles if os.path.getmtime(path) >= since]
+
+    # サイドカーファイルから更新されていないファイルの集計結果を取得する
+    sidecars: Dict[str, Dict[str, Any]] = {}
+    summaries: Dict[str, Dict[str, Any]] = {}
+    tasks: List[Tuple[str, Tuple[int, float]]] = []
+
+    for path in logfiles:
+        directory, name = os.path.split(os.path.abspath(path))
+        if cache and directory not in sidecars:
+            sidecars[directory] = _load_sidecar(directory)
+
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime)
+        entry = sidecars.get(directory, {}).get(name, {})
+
+        if entry.get('signature') == list(signature) and window in entry.get('summaries', {}):
+            summaries[path] = entry['summaries'][window]
+        else:
+            tasks.append((path, signature))
+
+    # 新しいファイルを並列に集計する
+    if len(tasks) != 0:
+        if jobs == 1 or len(tasks) == 1:
+            results = [summarize_log(path, t0, t1) for path, _ in tasks]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(
+                    summarize_log, [path for path, _ in tasks],
+                    [t0] * len(tasks), [t1] * len(tasks)))
+
+        for (path, signature), summary in zip(tasks, results):
+            summaries[path] = summary
+
+            if cache:
+                directory, name = os.path.split(os.path.abspath(path))
+                entry = sidecars[directory].get(name, {})
+                if entry.get('signature') != list(signature):
+                    entry = {'signature': list(signature), 'summaries': {}}
+                entry['summaries'][window] = summary
+                sidecars[directory][name] = entry
+
+        if cache:
+            for directory, files in sidecars.items():
+                try:
+                    _save_sidecar(directory, files)
+                except OSError:
+                    pass
+
+    return {path: summaries[path] for path in logfiles}
+
+
+def analyze_logs(
+    paths: Union[str, Sequence[str]],
+    fields: Optional[Sequence[str]] = None,
+    pattern: str = '*.log',
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+    since: Optional[float] = None,
+    percentiles: Sequence[float] = (50, 95, 99),
+    bins: Optional[int] = None,
+    jobs: Optional[int] = None,
+    cache: bool = True,
+) -> Dict[str, Any]:
+    '''複数のログファイルをまとめて集計し、フィールドごとの統計量を計算する。
+
+    Args:
+        paths: ディレクトリ、ファイル、またはワイルドカードを含むパス（のリスト）。
+        fields: 対象とするフィールド（'変数名.フィールド名'）のリスト。Noneの場合はすべてのフィールド。
+        pattern: ディレクトリを指定した場合に対象とするファイル名のパターン。
+        t0: 集計対象の開始時刻（Hubの時刻、単位は秒）。
+        t1: 集計対象の終了時刻（Hubの時刻、単位は秒）。
+        since: この時刻（UNIX時間）以降に更新されたファイルのみを対象とする。
+        percentiles: 計算するパーセンタイル（0-100）。
+        bins: ヒストグラムのビンの数。Noneの場合はヒストグラムを計算しない。
+        jobs: 並列に処理するプロセス数。Noneの場合はCPUの数。
+        cache: Trueの場合はサイドカーファイルを読み書きする。
+
+    Returns:
+        '変数名.フィールド名' をキーとする統計量の辞書。内容はget_statistics()と同じ。
+    '''
+    summaries = summarize_logs(
+        paths, pattern=pattern, t0=t0, t1=t1, since=since, jobs=jobs, cache=cache)
+    merged = merge_summaries(summaries.values())
+
+    if fields is not None:
+        merged = {key: value for key, value in merged.items() if key in fields}
+
+    return get_statistics(merged, percentiles=percentiles, bins=bins)
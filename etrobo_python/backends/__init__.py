@@ -0,0 +1,119 @@
+try:
+    from typing import Any, Dict, List, Union  # noqa
+except BaseException:
+    pass
+
+
+# バックエンドプログラムを登録するエントリポイントのグループ名
+# 外部のパッケージは以下のようにバックエンドプログラムを登録できる（setup.pyの例）。
+#
+#     entry_points={'etrobo_python.backends': ['mybackend = mypackage.backend']}
+#
+# 登録するモジュール（またはオブジェクト）は以下の関数を持つこと。
+#
+# - create_device(device_type, port): デバイスオブジェクトを作成する。
+#   device_typeは 'hub', 'motor', 'reversed_motor', 'color_sensor' などのデバイスタイプの名前、portはポート名の文字列。
+# - create_dispatcher(devices, handlers, interval, logfile, log_options, stats, divisors, snapshot, gc_mode, **kwargs):
+#   dispatch()を持つディスパッチャを作成する。ETRobo.dispatch()はこれらの引数を常にキーワード引数として渡し、
+#   ETRobo.dispatch()のそれ以外のキーワード引数（courseやportなど）もそのまま渡すため、**kwargsを必ず受け取ること。
+#   devices以降の引数は etrobo_python.runner.HandlerRunner の引数と同じであり、
+#   ディスパッチャは周期ごとに HandlerRunner.run(lateness, elapsed) を実行する。
+#   ディスパッチャがstop()を持つ場合は、ETRobo.stop()から実行される。
+# - create_context()（省略可能）: ETRoboごとに1回実行され、その戻り値が create_device() と create_dispatcher() に
+#   キーワード引数 context として渡される（シミュレータとの接続など、ロボットごとの状態を保持するために使用する）。
+ENTRY_POINT_GROUP = 'etrobo_python.backends'
+
+# このパッケージに含まれるバックエンドプログラム（モジュールは使用するときに読み込む）
+_BUILTIN_BACKENDS = {
+    'simulator': 'etrobo_python.backends.simulator',
+    'pybricks': 'etrobo_python.backends.pybricks',
+    'raspike': 'etrobo_python.backends.raspike',
+    'raspyke': 'etrobo_python.backends.raspyke',
+    'raspike_art': 'etrobo_python.backends.raspike_art',
+    'replay': 'etrobo_python.backends.replay',
+}
+
+# register_backend()で登録されたバックエンドプログラム（モジュール名またはモジュール）
+_REGISTERED_BACKENDS = {}  # type: Dict[str, Any]
+
+
+def register_backend(name: str, backend: 'Union[str, Any]') -> None:
+    '''バックエンドプログラムを登録する。
+    登録したバックエンドプログラムは ETRobo(backend=name) で使用できる。
+
+    Args:
+        name: バックエンドプログラムの名前。
+        backend: モジュール名、またはcreate_device()とcreate_dispatcher()を持つオブジェクト。
+    '''
+    _REGISTERED_BACKENDS[name] = backend
+
+
+def _get_entry_points() -> 'List[Any]':
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+
+    try:
+        return list(entry_points(group=ENTRY_POINT_GROUP))
+    except TypeError:
+        # python3.9以前のentry_points()はグループ名を引数に取らない
+        return list(entry_points().get(ENTRY_POINT_GROUP, []))
+
+
+def get_backend_names() -> 'List[str]':
+    '''使用できるバックエンドプログラムの名前を取得する。
+
+    Returns:
+        バックエンドプログラムの名前のリスト。
+    '''
+    names = list(_BUILTIN_BACKENDS.keys())
+
+    for name in list(_REGISTERED_BACKENDS.keys()) + [e.name for e in _get_entry_points()]:
+        if name not in names:
+            names.append(name)
+
+    return names
+
+
+def _import_module(module_name: str) -> Any:
+    # micropythonではimportlibが使用できないため__import__を使用する
+    return __import__(module_name, None, None, ['create_device', 'create_dispatcher'])
+
+
+def load_backend(name: str) -> Any:
+    '''バックエンドプログラムを読み込む。
+    register_backend()で登録されたもの、このパッケージに含まれるもの、
+    エントリポイントで登録されたものの順に名前を検索する。
+
+    Args:
+        name: バックエンドプログラムの名前。
+
+    Returns:
+        create_device()とcreate_dispatcher()を持つモジュール（またはオブジェクト）。
+
+    Raises:
+        NotImplementedError: 名前に対応するバックエンドプログラムが存在しない場合。
+        ValueError: バックエンドプログラムがcreate_device()またはcreate_dispatcher()を持たない場合。
+    '''
+    backend = _REGISTERED_BACKENDS.get(name)
+
+    if backend is None and name in _BUILTIN_BACKENDS:
+        backend = _BUILTIN_BACKENDS[name]
+
+    if backend is None:
+        for entry_point in _get_entry_points():
+            if entry_point.name == name:
+                backend = entry_point.load()
+                break
+
+    if backend is None:
+        raise NotImplementedError('Unsupported backend: {}'.format(name))
+
+    if isinstance(backend, str):
+        backend = _import_module(backend)
+
+    if not hasattr(backend, 'create_device') or not hasattr(backend, 'create_dispatcher'):
+        raise ValueError('Invalid backend (create_device or create_dispatcher is missing): {}'.format(name))
+
+    return backend
@@ -50,7 +50,6 @@ class Hub(etrobo_python.Hub):
     def __init__(self) -> None:
         self.ev3brick = hubs.EV3Brick()
         self.base_time = time.time()
-        self.log = bytearray(5)
 
     def set_led(self, color: str) -> None:
         color_value = color.lower()[0]
@@ -90,23 +89,20 @@ class Hub(etrobo_python.Hub):
     def is_down_button_pressed(self) -> bool:
         return Button.DOWN in self.ev3brick.buttons.pressed()
 
-    def get_log(self) -> bytes:
-        self.log[:4] = int.to_bytes(int(self.get_time() * 1000), 4, 'big')
-        self.log[4] = (
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (
+            int(self.get_time() * 1000),
             int(self.is_left_button_pressed())
             | int(self.is_right_button_pressed()) << 1
             | int(self.is_up_button_pressed()) << 2
-            | int(self.is_down_button_pressed()) << 3
+            | int(self.is_down_button_pressed()) << 3,
         )
 
-        return self.log
-
 
 class _Motor(etrobo_python.Motor):
     def __init__(self, port: Port, reversed: bool) -> None:
         self.motor = ev3dev.Motor(port)
         self.sign = -1 if reversed else 1
-        self.log = bytearray(4)
 
     def get_count(self) -> int:
         return self.motor.angle() * self.sign
@@ -121,9 +117,8 @@ class _Motor(etrobo_python.Motor):
         if brake:
             self.motor.brake()
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_count() & 0xffffffff, 4, 'big')
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_count(),)
 
 
 class Motor(_Motor):
@@ -140,7 +135,6 @@ class ColorSensor(etrobo_python.ColorSensor):
     def __init__(self, port: Port) -> None:
         self.color_sensor = ev3dev.ColorSensor(port)
         self.mode = -1
-        self.log = bytearray(5)
 
     def get_brightness(self) -> int:
         self.mode = 0
@@ -154,40 +148,32 @@ class ColorSensor(etrobo_python.ColorSensor):
         self.mode = 2
         return self.color_sensor.rgb()
 
-    def get_log(self) -> bytes:
+    def get_log_values(self) -> Tuple[int, ...]:
         if self.mode == 0:
-            self.log[0] = self.get_brightness()
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (self.get_brightness(), 0, 0, 0, 0)
         elif self.mode == 1:
-            self.log[0] = 0
-            self.log[1] = self.get_ambient()
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (0, self.get_ambient(), 0, 0, 0)
         elif self.mode == 2:
-            self.log[0] = 0
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = self.get_raw_color()
-
-        return self.log
+            red, green, blue = self.get_raw_color()
+            return (0, 0, red, green, blue)
+        else:
+            return (0, 0, 0, 0, 0)
 
 
 class TouchSensor(etrobo_python.TouchSensor):
     def __init__(self, port: Port) -> None:
         self.touch_sensor = ev3dev.TouchSensor(port)
-        self.log = bytearray(1)
 
     def is_pressed(self) -> bool:
         return self.touch_sensor.pressed()
 
-    def get_log(self) -> bytes:
-        self.log[0] = int(self.is_pressed())
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (int(self.is_pressed()),)
 
 
 class SonarSensor(etrobo_python.SonarSensor):
     def __init__(self, port: Port) -> None:
         self.sonar_sensor = ev3dev.UltrasonicSensor(port)
-        self.log = bytearray(2)
 
     def listen(self) -> bool:
         return self.sonar_sensor.presence()
@@ -195,15 +181,13 @@ class SonarSensor(etrobo_python.SonarSensor):
     def get_distance(self) -> int:
         return self.sonar_sensor.distance()
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_distance(), 2, 'big')
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_distance(),)
 
 
 class GyroSensor(etrobo_python.GyroSensor):
     def __init__(self, port: Port) -> None:
         self.gyro_sensor = ev3dev.GyroSensor(port)
-        self.log = bytearray(4)
 
     def reset(self) -> None:
         self.gyro_sensor.reset_angle(0)
@@ -220,7 +204,5 @@ class GyroSensor(etrobo_python.GyroSensor):
             DeprecationWarning)
         return self.get_angular_velocity()
 
-    def get_log(self) -> bytes:
-        self.log[:2] = int.to_bytes(self.get_angle() & 0xffff, 2, 'big')
-        self.log[2:] = int.to_bytes(self.get_angler_velocity() & 0xffff, 2, 'big')
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_angle(), self.get_angular_velocity())
@@ -1,12 +1,12 @@
-import time
-
 from pybricks.hubs import EV3Brick
 
 from etrobo_python.device import Device
-from etrobo_python.log import LogWriter
+from etrobo_python.runner import HandlerRunner
+from etrobo_python.scheduler import TickScheduler
+from etrobo_python.stats import DispatchStats
 
 try:
-    from typing import Any, Callable, List, Optional, Tuple
+    from typing import Any, Callable, Dict, List, Optional, Tuple
 except BaseException:
     pass
 
@@ -19,6 +19,13 @@ def create_dispatcher(
     handlers: List[Callable[..., None]],
     interval: float = 0.01,
     logfile: Optional[str] = None,
+    log_options: Optional[Dict[str, Any]] = None,
+    stats: Optional[DispatchStats] = None,
+    divisors: Optional[List[int]] = None,
+    snapshot: bool = False,
+    gc_mode: Optional[str] = None,
+    overrun: str = 'skip',
+    spin: float = 0.0,
     **kwargs,
 ) -> Any:
     return Dispatcher(
@@ -26,6 +33,13 @@ def create_dispatcher(
         handlers=handlers,
         interval=interval,
         logfile=logfile,
+        log_options=log_options,
+        stats=stats,
+        divisors=divisors,
+        snapshot=snapshot,
+        gc_mode=gc_mode,
+        overrun=overrun,
+        spin=spin,
     )
 
 
@@ -36,40 +50,38 @@ class Dispatcher(object):
         handlers: List[Callable[..., None]],
         interval: float,
         logfile: Optional[str],
+        log_options: Optional[Dict[str, Any]],
+        stats: Optional[DispatchStats],
+        divisors: Optional[List[int]],
+        snapshot: bool,
+        gc_mode: Optional[str],
+        overrun: str,
+        spin: float,
     ) -> None:
         self.devices = devices
         self.handlers = handlers
         self.interval = interval
         self.logfile = logfile
+        self.log_options = log_options or {}
+        self.stats = stats
+        self.divisors = divisors
+        self.snapshot = snapshot
+        self.gc_mode = gc_mode
+        self.overrun = overrun
+        self.spin = spin
 
     def dispatch(self) -> None:
-        variables = {name: device for name, device in self.devices}
-        previous_time = 0
-
-        writer = None
-        if self.logfile is not None:
-            writer = LogWriter(self.logfile, self.devices)
+        scheduler = TickScheduler(self.interval, overrun=self.overrun, spin=self.spin)
+        runner = HandlerRunner(
+            self.devices, self.handlers, self.logfile, self.log_options, self.stats,
+            interval=self.interval, divisors=self.divisors,
+            snapshot=self.snapshot, gc_mode=self.gc_mode)
 
         try:
             while True:
-                interval_time = int(self.interval * 1000)
-                current_time = int(time.time() * 1000)
-                process_time = (current_time // interval_time) * interval_time
-
-                if process_time == previous_time:
-                    next_time = previous_time + interval_time
-                    time.sleep((next_time - current_time) * 0.001)
-                    continue
-
-                previous_time = process_time
-
-                for handler in self.handlers:
-                    handler(**variables)
-
-                if writer is not None:
-                    writer.write([device for _, device in self.devices])
+                elapsed = scheduler.wait()
+                runner.run(scheduler.lateness, elapsed)
         except StopIteration:
             print('Stopped by handler.')
-
-        if writer is not None:
-            writer.close()
+        finally:
+            runner.close()
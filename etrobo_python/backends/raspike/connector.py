@@ -1,10 +1,13 @@
 import threading
-import time
 import warnings
 from typing import Callable, Optional, Tuple
 
 import serial
 
+from etrobo_python.realtime import configure_io_thread
+from etrobo_python.scheduler import TickScheduler
+from etrobo_python.stats import DispatchStats
+
 # モーターの回転方向
 # モーターの設定値と取得値の方向を設定する
 # +1 か -1 を設定すること
@@ -58,11 +61,14 @@ _RECV_CMD_INDEX = [
 
 
 def connect_spike(
-    handler: Callable[[], None],
+    handler: Callable[..., None],
     interval: float,
     port: str,
     baudrate: int,
     timeout: float,
+    overrun: str = 'skip',
+    spin: float = 0.0,
+    stats: Optional[DispatchStats] = None,
 ) -> None:
     global _CONNECTOR
 
@@ -74,7 +80,10 @@ def connect_spike(
         interval=interval,
         port=port,
         baudrate=baudrate,
-        timeout=timeout)
+        timeout=timeout,
+        overrun=overrun,
+        spin=spin,
+        stats=stats)
     _CONNECTOR.run()
     _CONNECTOR = None
 
@@ -111,14 +120,19 @@ def _parse_received_command(bin: bytearray) -> Tuple[int, int]:
 class _Connector(object):
     def __init__(
         self,
-        handler: Callable[[], None],
+        handler: Callable[..., None],
         interval: float,
         port: str,
         baudrate: int,
         timeout: float,
+        overrun: str,
+        spin: float,
+        stats: Optional[DispatchStats],
     ) -> None:
         self.handler = handler
         self.interval = interval
+        self.scheduler = TickScheduler(interval, overrun=overrun, spin=spin)
+        self.stats = stats
 
         self.recv_data = [0] * (max(_RECV_CMD_INDEX) + 1)
         self.send_data = bytearray(3)
@@ -156,6 +170,7 @@ class _Connector(object):
             self.send_command(command=7, value=1, wait_for_ack=False)
 
     def _run_receiver(self) -> None:
+        configure_io_thread()
         buffer = bytearray(12)
 
         try:
@@ -198,27 +213,26 @@ class _Connector(object):
             self.running = False
 
     def _run_handler(self) -> None:
-        previous_time = 0
+        stats = self.stats
+        if stats is not None:
+            io_histogram = stats.get_histogram('connector_io')
 
         try:
             while self.running:
-                # 時刻を確認する
-                interval_time = int(self.interval * 1000)
-                current_time = int(time.time() * 1000)
-                process_time = (current_time // interval_time) * interval_time
-
-                # 前回の時刻との間隔が設定値より短いなら待機する
-                if process_time == previous_time:
-                    next_time = previous_time + interval_time
-                    time.sleep((next_time - current_time) * 0.001)
-                    continue
+                # 次の実行時刻まで待機する
+                elapsed = self.scheduler.wait()
 
-                # 制御処理を実行
-                previous_time = process_time
-                self.handler()
+                # 制御処理を実行（予定時刻からの遅れはtick_jitterとして記録される）
+                # 周期を飛ばした場合は経過した周期の数を渡す
+                self.handler(self.scheduler.lateness, elapsed)
 
                 # 接続を維持するためにダミーコマンドを送信
-                self.send_command(command=127, value=0, wait_for_ack=False)
+                if stats is not None:
+                    start_time = stats.clock()
+                    self.send_command(command=127, value=0, wait_for_ack=False)
+                    io_histogram.add((stats.clock() - start_time) // 1000)
+                else:
+                    self.send_command(command=127, value=0, wait_for_ack=False)
         except StopIteration:
             print('Stopped by handler.')
         finally:
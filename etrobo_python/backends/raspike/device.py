@@ -40,7 +40,6 @@ class Hub(etrobo_python.Hub):
     def __init__(self) -> None:
         self.hub = connector.Hub()
         self.base_time = time.time()
-        self.log = bytearray(5)
 
     def set_led(self, color: str) -> None:
         pass
@@ -72,21 +71,18 @@ class Hub(etrobo_python.Hub):
     def is_down_button_pressed(self) -> bool:
         return False
 
-    def get_log(self) -> bytes:
-        self.log[:4] = int.to_bytes(int(self.get_time() * 1000), 4, 'big')
-        self.log[4] = (
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (
+            int(self.get_time() * 1000),
             int(self.is_left_button_pressed())
-            | int(self.is_right_button_pressed()) << 1
+            | int(self.is_right_button_pressed()) << 1,
         )
 
-        return self.log
-
 
 class _Motor(etrobo_python.Motor):
     def __init__(self, port: int, reversed: bool) -> None:
         self.motor = connector.Motor(port)
         self.sign = -1 if reversed else 1
-        self.log = bytearray(4)
 
     def get_count(self) -> int:
         return self.motor.get_count() * self.sign
@@ -100,9 +96,8 @@ class _Motor(etrobo_python.Motor):
     def set_brake(self, brake: bool) -> None:
         self.motor.set_brake(brake)
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_count(), 4, 'big', signed=True)
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_count(),)
 
 
 class Motor(_Motor):
@@ -119,7 +114,6 @@ class ColorSensor(etrobo_python.ColorSensor):
     def __init__(self) -> None:
         self.color_sensor = connector.ColorSensor()
         self.mode = -1
-        self.log = bytearray(5)
 
     def get_brightness(self) -> int:
         self.mode = 0
@@ -133,40 +127,32 @@ class ColorSensor(etrobo_python.ColorSensor):
         self.mode = 2
         return self.color_sensor.get_raw_color()
 
-    def get_log(self) -> bytes:
+    def get_log_values(self) -> Tuple[int, ...]:
         if self.mode == 0:
-            self.log[0] = self.get_brightness()
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (self.get_brightness(), 0, 0, 0, 0)
         elif self.mode == 1:
-            self.log[0] = 0
-            self.log[1] = self.get_ambient()
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (0, self.get_ambient(), 0, 0, 0)
         elif self.mode == 2:
-            self.log[0] = 0
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = self.get_raw_color()
-
-        return self.log
+            red, green, blue = self.get_raw_color()
+            return (0, 0, red, green, blue)
+        else:
+            return (0, 0, 0, 0, 0)
 
 
 class TouchSensor(etrobo_python.TouchSensor):
     def __init__(self) -> None:
         self.touch_sensor = connector.TouchSensor()
-        self.log = bytearray(1)
 
     def is_pressed(self) -> bool:
         return self.touch_sensor.is_pressed()
 
-    def get_log(self) -> bytes:
-        self.log[0] = int(self.is_pressed())
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (int(self.is_pressed()),)
 
 
 class SonarSensor(etrobo_python.SonarSensor):
     def __init__(self) -> None:
         self.sonar_sensor = connector.SonarSensor()
-        self.log = bytearray(2)
 
     def listen(self) -> bool:
         return self.sonar_sensor.listen()
@@ -178,15 +164,13 @@ class SonarSensor(etrobo_python.SonarSensor):
         else:
             return 255
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_distance(), 2, 'big')
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_distance(),)
 
 
 class GyroSensor(etrobo_python.GyroSensor):
     def __init__(self) -> None:
         self.gyro_sensor = connector.GyroSensor()
-        self.log = bytearray(4)
 
     def reset(self) -> None:
         self.gyro_sensor.reset()
@@ -203,7 +187,5 @@ class GyroSensor(etrobo_python.GyroSensor):
             DeprecationWarning)
         return self.get_angular_velocity()
 
-    def get_log(self) -> bytes:
-        self.log[:2] = int.to_bytes(self.get_angle(), 2, 'big', signed=True)
-        self.log[2:] = int.to_bytes(self.get_angler_velocity(), 2, 'big', signed=True)
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_angle(), self.get_angular_velocity())
@@ -1,27 +1,38 @@
 import threading
-import time
-from typing import Callable
+from typing import Callable, Optional
 
 import libraspike_art_python as lib
+from etrobo_python.realtime import configure_io_thread
+from etrobo_python.scheduler import TickScheduler
+from etrobo_python.stats import DispatchStats
 from .device import stop_all_motors
 
 
 class Connector(object):
     def __init__(
         self,
-        handler: Callable[[], None],
+        handler: Callable[..., None],
         interval: float,
         port: str,
+        overrun: str = 'skip',
+        spin: float = 0.0,
+        stats: Optional[DispatchStats] = None,
     ) -> None:
         '''SPIKEとの接続オブジェクトを初期化する。
         Args:
-            handler (Callable[[], None]): 定期的に呼び出す関数。
+            handler (Callable[..., None]): 定期的に呼び出す関数（予定時刻からの遅れと経過した周期の数が渡される）。
             interval (float): 呼び出し間隔（秒）。
             port (str): SPIKEに接続するUSBポート。
+            overrun (str): 呼び出し間隔を超過した場合の動作（skip, catch_up, run_late）。
+            spin (float): 呼び出し時刻の直前にスリープせずに待機する時間（秒）。
+            stats (Optional[DispatchStats]): 実行時間を記録するオブジェクト。
         '''
         self.handler = handler
         self.interval = interval
         self.port = port
+        self.overrun = overrun
+        self.spin = spin
+        self.stats = stats
         self.terminated = False
 
     def run(self) -> None:
@@ -42,24 +53,16 @@ class Connector(object):
         receiver_thread.start()
 
         # 定期的にハンドラを実行する
-        previous_time = 0
+        scheduler = TickScheduler(self.interval, overrun=self.overrun, spin=self.spin)
 
         try:
             while True:
-                # 時刻を確認する
-                interval_time = int(self.interval * 1000)
-                current_time = int(time.time() * 1000)
-                process_time = (current_time // interval_time) * interval_time
+                # 次の実行時刻まで待機する
+                elapsed = scheduler.wait()
 
-                # 前回の時刻との間隔が設定値より短いなら待機する
-                if process_time == previous_time:
-                    next_time = previous_time + interval_time
-                    time.sleep((next_time - current_time) * 0.001)
-                    continue
-
-                # 制御処理を実行する
-                previous_time = process_time
-                self.handler()
+                # 制御処理を実行する（予定時刻からの遅れはtick_jitterとして記録される）
+                # 周期を飛ばした場合は経過した周期の数を渡す
+                self.handler(scheduler.lateness, elapsed)
         except StopIteration:
             print('Stopped by handler.')
         except KeyboardInterrupt:
@@ -72,5 +75,7 @@ class Connector(object):
         receiver_thread.join()
 
     def receive(self) -> None:
+        configure_io_thread()
+
         while not self.terminated:
             lib.raspike_prot_receive()
@@ -45,7 +45,6 @@ def get_raspike_port(port: str) -> pbio_port:
 class Hub(etrobo_python.Hub):
     def __init__(self) -> None:
         self.base_time = time.time()
-        self.log = bytearray(5)
 
     def set_led(self, color: str) -> None:
         color_value = color.lower()[0]
@@ -124,17 +123,15 @@ class Hub(etrobo_python.Hub):
     def hub_imu_reset_heading(self) -> None:
         lib.hub_imu_reset_heading()
 
-    def get_log(self) -> bytes:
-        self.log[:4] = int.to_bytes(int(self.get_time() * 1000), 4, 'big')
-        self.log[4] = (
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (
+            int(self.get_time() * 1000),
             int(self.is_left_button_pressed())
             | int(self.is_right_button_pressed()) << 1
             | int(self.is_up_button_pressed()) << 2
-            | int(self.is_down_button_pressed()) << 3
+            | int(self.is_down_button_pressed()) << 3,
         )
 
-        return self.log
-
 
 _MOTOR_DEVICES: List[Any] = []
 
@@ -152,7 +149,6 @@ class _Motor(etrobo_python.Motor):
         self.reversed = reversed
         self.device: Any = None
         self.brake = False
-        self.log = bytearray(4)
 
         # Only motor on Spike Hub port B turns reverse direction,
         # following the build instruction for 2025
@@ -189,9 +185,8 @@ class _Motor(etrobo_python.Motor):
         if brake:
             lib.pup_motor_brake(self.device)
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_count() & 0xffffffff, 4, 'big')
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_count(),)
 
 
 class Motor(_Motor):
@@ -209,7 +204,6 @@ class ColorSensor(etrobo_python.ColorSensor):
         self.port = port
         self.device: Any = None
         self.mode = -1
-        self.log = bytearray(5)
 
     def setup_device(self) -> None:
         if self.device is None:
@@ -235,28 +229,22 @@ class ColorSensor(etrobo_python.ColorSensor):
         self.mode = 2
         return lib.pup_color_sensor_hsv(self.device, True)
 
-    def get_log(self) -> bytes:
+    def get_log_values(self) -> Tuple[int, ...]:
         if self.mode == 0:
-            self.log[0] = self.get_brightness()
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (self.get_brightness(), 0, 0, 0, 0)
         elif self.mode == 1:
-            self.log[0] = 0
-            self.log[1] = self.get_ambient()
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (0, self.get_ambient(), 0, 0, 0)
         elif self.mode == 2:
-            self.log[0] = 0
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = self.get_raw_color()
-
-        return self.log
+            red, green, blue = self.get_raw_color()
+            return (0, 0, red, green, blue)
+        else:
+            return (0, 0, 0, 0, 0)
 
 
 class TouchSensor(etrobo_python.TouchSensor):
     def __init__(self, port: pbio_port) -> None:
         self.port = port
         self.device: Any = None
-        self.log = bytearray(1)
 
     def setup_device(self) -> None:
         if self.device is None:
@@ -266,16 +254,14 @@ class TouchSensor(etrobo_python.TouchSensor):
         self.setup_device()
         return lib.pup_force_sensor_touched(self.device)
 
-    def get_log(self) -> bytes:
-        self.log[0] = int(self.is_pressed())
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (int(self.is_pressed()),)
 
 
 class SonarSensor(etrobo_python.SonarSensor):
     def __init__(self, port: pbio_port) -> None:
         self.port = port
         self.device: Any = None
-        self.log = bytearray(2)
 
     def setup_device(self) -> None:
         if self.device is None:
@@ -289,14 +275,12 @@ class SonarSensor(etrobo_python.SonarSensor):
         self.setup_device()
         return lib.pup_ultrasonic_sensor_distance(self.device)
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_distance(), 2, 'big')
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_distance(),)
 
 
 class GyroSensor(etrobo_python.GyroSensor):
     def __init__(self) -> None:
-        self.log = bytearray(4)
         self.initialized = False
     
     def __initialize(self) -> None:
@@ -333,9 +317,7 @@ class GyroSensor(etrobo_python.GyroSensor):
             self.__initialize()
         return self.get_angular_velocity()
 
-    def get_log(self) -> bytes:
+    def get_log_values(self) -> Tuple[int, ...]:
         if not self.initialized:
             self.__initialize()
-        self.log[:2] = int.to_bytes(self.get_angle(), 2, 'big', signed=True)
-        self.log[2:] = int.to_bytes(self.get_angular_velocity(), 2, 'big', signed=True)
-        return self.log
+        return (self.get_angle(), self.get_angular_velocity())
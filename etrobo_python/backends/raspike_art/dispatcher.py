@@ -1,7 +1,8 @@
-from typing import Any, Callable, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from etrobo_python.device import Device
-from etrobo_python.log import LogWriter
+from etrobo_python.runner import HandlerRunner
+from etrobo_python.stats import DispatchStats
 
 from .connector import Connector
 
@@ -12,6 +13,13 @@ def create_dispatcher(
     port: str = '/dev/USB_SPIKE',
     interval: float = 0.04,
     logfile: Optional[str] = None,
+    log_options: Optional[Dict[str, Any]] = None,
+    stats: Optional[DispatchStats] = None,
+    divisors: Optional[List[int]] = None,
+    snapshot: bool = False,
+    gc_mode: Optional[str] = None,
+    overrun: str = 'skip',
+    spin: float = 0.0,
     **kwargs: Any,
 ) -> Any:
     return Dispatcher(
@@ -20,6 +28,13 @@ def create_dispatcher(
         port=port,
         interval=interval,
         logfile=logfile,
+        log_options=log_options,
+        stats=stats,
+        divisors=divisors,
+        snapshot=snapshot,
+        gc_mode=gc_mode,
+        overrun=overrun,
+        spin=spin,
     )
 
 
@@ -31,33 +46,42 @@ class Dispatcher(object):
         interval: float,
         port: str,
         logfile: Optional[str],
+        log_options: Optional[Dict[str, Any]],
+        stats: Optional[DispatchStats],
+        divisors: Optional[List[int]],
+        snapshot: bool,
+        gc_mode: Optional[str],
+        overrun: str,
+        spin: float,
     ) -> None:
         self.devices = devices
         self.handlers = handlers
         self.interval = interval
         self.port = port
         self.logfile = logfile
+        self.log_options = log_options or {}
+        self.stats = stats
+        self.divisors = divisors
+        self.snapshot = snapshot
+        self.gc_mode = gc_mode
+        self.overrun = overrun
+        self.spin = spin
         self.terminated = False
 
     def dispatch(self) -> None:
-        variables = {name: device for name, device in self.devices}
+        runner = HandlerRunner(
+            self.devices, self.handlers, self.logfile, self.log_options, self.stats,
+            interval=self.interval, divisors=self.divisors,
+            snapshot=self.snapshot, gc_mode=self.gc_mode)
 
-        writer: Optional[LogWriter] = None
-        if self.logfile is not None:
-            writer = LogWriter(self.logfile, self.devices)
-
-        def run_handlers() -> None:
-            for handler in self.handlers:
-                handler(**variables)
-
-            if writer is not None:
-                writer.write([device for _, device in self.devices])
-
-        Connector(
-            handler=run_handlers,
-            interval=self.interval,
-            port=self.port,
-        ).run()
-
-        if writer is not None:
-            writer.close()
+        try:
+            Connector(
+                handler=runner.run,
+                interval=self.interval,
+                port=self.port,
+                overrun=self.overrun,
+                spin=self.spin,
+                stats=self.stats,
+            ).run()
+        finally:
+            runner.close()
@@ -4,6 +4,8 @@ from typing import Callable, Optional, Tuple
 
 import serial
 
+from etrobo_python.stats import DispatchStats
+
 '''
 送信（観測）データ: Base64でエンコードした文字列を送受信する
 Base64でエンコードした文字列は 0x66, 0x33 で始まる
@@ -51,11 +53,12 @@ _CONNECTOR: Optional['_Connector'] = None
 
 
 def connect_spike(
-    handler: Callable[[], None],
+    handler: Callable[..., None],
     interval: float,
     port: str,
     baudrate: int,
     timeout: float,
+    stats: Optional[DispatchStats] = None,
 ) -> None:
     global _CONNECTOR
 
@@ -67,7 +70,8 @@ def connect_spike(
         interval=interval,
         port=port,
         baudrate=baudrate,
-        timeout=timeout)
+        timeout=timeout,
+        stats=stats)
     _CONNECTOR.run()
     _CONNECTOR = None
 
@@ -85,15 +89,17 @@ def _get_connector() -> '_Connector':
 class _Connector(object):
     def __init__(
         self,
-        handler: Callable[[], None],
+        handler: Callable[..., None],
         interval: float,
         port: str,
         baudrate: int,
         timeout: float,
+        stats: Optional[DispatchStats],
     ) -> None:
         self.handler = handler
         self.interval = interval
         self.started = False
+        self.stats = stats
 
         # 受信バッファ
         self.recv_buffer = bytearray(32)
@@ -114,6 +120,17 @@ class _Connector(object):
         # リセットコマンドを送信する
         self.send_ping_command(reset=True)
 
+        # 実行時間の記録（送信時間）
+        stats = self.stats
+        if stats is not None:
+            io_histogram = stats.get_histogram('connector_io')
+
+        # 受信データの時刻（単位はミリ秒）から周期の番号と予定時刻からの遅れを計算する
+        # 予定時刻は最初に受信したデータの時刻を起点とした実行間隔の倍数とする
+        interval_ms = max(round(self.interval * 1000), 1)
+        start_time = None
+        previous_tick = -1
+
         try:
             while True:
                 # 受信データを読み込む
@@ -134,8 +151,22 @@ class _Connector(object):
                 # pingコマンドのフラグをリセットする
                 self.ping_required = True
 
-                # 制御処理を実行する
-                self.handler()
+                if start_time is None:
+                    start_time = report_time
+
+                # 最も近い予定時刻の周期の番号と、その予定時刻からの遅れ（単位はナノ秒）
+                tick = max((report_time - start_time + interval_ms // 2) // interval_ms, previous_tick + 1)
+                lateness = max(report_time - start_time - tick * interval_ms, 0) * 1_000_000
+
+                # 前回の実行から経過した周期の数（受信データが周期を飛ばした場合は2以上）
+                elapsed = tick - previous_tick
+                previous_tick = tick
+
+                # 制御処理を実行する（予定時刻からの遅れはtick_jitterとして記録される）
+                self.handler(lateness, elapsed)
+
+                if stats is not None:
+                    io_start = stats.clock()
 
                 # 送信データが存在しないならpingコマンドを送信する
                 if self.ping_required:
@@ -143,6 +174,9 @@ class _Connector(object):
 
                 # バッファにある命令データを送信する
                 self.serial.flush()
+
+                if stats is not None:
+                    io_histogram.add((stats.clock() - io_start) // 1000)
         except KeyboardInterrupt:
             print('Interrupted by keyboard.')
         finally:
@@ -0,0 +1,2 @@
+from .device import create_device  # noqa
+from .dispatcher import create_dispatcher  # noqa
@@ -0,0 +1,165 @@
+import warnings
+from typing import Any, Optional, Tuple
+
+import etrobo_python
+
+from .recorder import Recorder
+
+
+def create_device(device_type: str, port: str) -> Any:
+    if device_type == 'hub':
+        return Hub()
+    elif device_type in ('motor', 'normal_motor', 'reversed_motor'):
+        return Motor()
+    elif device_type == 'color_sensor':
+        return ColorSensor()
+    elif device_type == 'touch_sensor':
+        return TouchSensor()
+    elif device_type == 'sonar_sensor':
+        return SonarSensor()
+    elif device_type == 'gyro_sensor':
+        return GyroSensor()
+    else:
+        raise NotImplementedError(f'Unsupported device: {device_type}')
+
+
+class _ReplayDevice(object):
+    '''ログファイルに記録された値を返すデバイスの共通処理。
+    valuesにはDispatcherによってフレームごとの値（ログデータを展開したタプル）が設定される。
+    '''
+    # ログファイルに記録されているデバイスタイプ
+    device_type = ''
+
+    def bind(self, name: str, recorder: Optional[Recorder]) -> None:
+        self.name = name
+        self.recorder = recorder
+        self.values: Tuple[int, ...] = ()
+
+    def record(self, command: str, *args: Any) -> None:
+        if self.recorder is not None:
+            self.recorder.record(self.name, command, args)
+
+
+class Hub(_ReplayDevice, etrobo_python.Hub):
+    device_type = 'hub'
+
+    def set_led(self, color: str) -> None:
+        self.record('set_led', color)
+
+    def get_time(self) -> float:
+        return self.values[0] / 1000
+
+    def get_battery_voltage(self) -> int:
+        return 8000
+
+    def get_battery_current(self) -> int:
+        return 200
+
+    def play_speaker_tone(self, frequency: int, duration: float) -> None:
+        self.record('play_speaker_tone', frequency, duration)
+
+    def set_speaker_volume(self, volume: int) -> None:
+        self.record('set_speaker_volume', volume)
+
+    def is_left_button_pressed(self) -> bool:
+        return (self.values[1] & 0x01) != 0
+
+    def is_right_button_pressed(self) -> bool:
+        return (self.values[1] & 0x02) != 0
+
+    def is_up_button_pressed(self) -> bool:
+        return (self.values[1] & 0x04) != 0
+
+    def is_down_button_pressed(self) -> bool:
+        return (self.values[1] & 0x08) != 0
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return self.values
+
+
+class Motor(_ReplayDevice, etrobo_python.Motor):
+    device_type = 'motor'
+
+    def __init__(self) -> None:
+        self.offset = 0
+
+    def get_count(self) -> int:
+        return self.values[0] - self.offset
+
+    def reset_count(self) -> None:
+        self.offset = self.values[0]
+        self.record('reset_count')
+
+    def set_power(self, power: int) -> None:
+        self.record('set_power', power)
+
+    def set_brake(self, brake: bool) -> None:
+        self.record('set_brake', brake)
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_count(),)
+
+
+class ColorSensor(_ReplayDevice, etrobo_python.ColorSensor):
+    device_type = 'color_sensor'
+
+    def get_brightness(self) -> int:
+        return self.values[0]
+
+    def get_ambient(self) -> int:
+        return self.values[1]
+
+    def get_raw_color(self) -> Tuple[int, int, int]:
+        return self.values[2], self.values[3], self.values[4]
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return self.values
+
+
+class TouchSensor(_ReplayDevice, etrobo_python.TouchSensor):
+    device_type = 'touch_sensor'
+
+    def is_pressed(self) -> bool:
+        return self.values[0] != 0
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return self.values
+
+
+class SonarSensor(_ReplayDevice, etrobo_python.SonarSensor):
+    device_type = 'sonar_sensor'
+
+    def listen(self) -> bool:
+        return False
+
+    def get_distance(self) -> int:
+        return self.values[0]
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return self.values
+
+
+class GyroSensor(_ReplayDevice, etrobo_python.GyroSensor):
+    device_type = 'gyro_sensor'
+
+    def __init__(self) -> None:
+        self.offset = 0
+
+    def reset(self) -> None:
+        self.offset = self.values[0]
+        self.record('reset')
+
+    def get_angle(self) -> int:
+        return self.values[0] - self.offset
+
+    def get_angular_velocity(self) -> int:
+        return self.values[1]
+
+    def get_angler_velocity(self) -> int:
+        warnings.warn(
+            'get_angler_velocity is deprecated, use get_angular_velocity instead.',
+            DeprecationWarning)
+        return self.get_angular_velocity()
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_angle(), self.get_angular_velocity())
@@ -0,0 +1,186 @@
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from etrobo_python.device import Device
+from etrobo_python.log import LogReader
+from etrobo_python.runner import HandlerRunner
+from etrobo_python.stats import DispatchStats
+
+from .recorder import Recorder
+
+
+def create_dispatcher(
+    devices: List[Tuple[str, Any]],
+    handlers: List[Callable[..., None]],
+    interval: float = 0.01,
+    replayfile: Optional[str] = None,
+    resultfile: Optional[str] = None,
+    speed: float = 0.0,
+    logfile: Optional[str] = None,
+    log_options: Optional[Dict[str, Any]] = None,
+    stats: Optional[DispatchStats] = None,
+    divisors: Optional[List[int]] = None,
+    snapshot: bool = False,
+    gc_mode: Optional[str] = None,
+    **kwargs: Any,
+) -> Any:
+    if replayfile is None:
+        raise ValueError('The replay backend requires a log file: replayfile')
+
+    return Dispatcher(
+        devices=devices,
+        handlers=handlers,
+        interval=interval,
+        replayfile=replayfile,
+        resultfile=resultfile,
+        speed=speed,
+        logfile=logfile,
+        log_options=log_options,
+        stats=stats,
+        divisors=divisors,
+        snapshot=snapshot,
+        gc_mode=gc_mode,
+    )
+
+
+class Dispatcher(object):
+    '''ログファイルに記録された値を使って制御ハンドラを実行するクラス。
+    ログファイルの1フレームごとにデバイスの値を更新し、制御ハンドラを実行する。
+    デバイスはログファイルに記録された変数名で対応付けられる。
+
+    Args:
+        devices: デバイスのリスト。
+        handlers: 制御ハンドラのリスト。
+        interval: 制御ハンドラの実行間隔（ログファイルにHubが記録されていない場合に使用する）。
+        replayfile: 再生するログファイルのパス。
+        resultfile: デバイスへの出力を記録するファイルのパス。Noneの場合は記録しない。
+        speed: 再生速度（1.0で記録時と同じ速度）。0の場合は待機せずに実行する。
+        logfile: ログデータを保存するファイルのパス。
+        log_options: LogWriterに渡される引数。
+        stats: 実行時間を記録するオブジェクト。
+        divisors: 制御ハンドラごとの実行間隔（intervalの倍数）。
+        snapshot: Trueの場合は周期ごとにデバイスの値をキャッシュする。
+        gc_mode: ガベージコレクションの制御方法。
+    '''
+
+    def __init__(
+        self,
+        devices: List[Tuple[str, Device]],
+        handlers: List[Callable[..., None]],
+        interval: float,
+        replayfile: str,
+        resultfile: Optional[str],
+        speed: float,
+        logfile: Optional[str],
+        log_options: Optional[Dict[str, Any]],
+        stats: Optional[DispatchStats],
+        divisors: Optional[List[int]],
+        snapshot: bool,
+        gc_mode: Optional[str],
+    ) -> None:
+        if speed < 0:
+            raise ValueError(f'Invalid replay speed: {speed}')
+
+        self.devices = devices
+        self.handlers = handlers
+        self.interval = interval
+        self.replayfile = replayfile
+        self.resultfile = resultfile
+        self.speed = speed
+        self.logfile = logfile
+        self.log_options = log_options or {}
+        self.stats = stats
+        self.divisors = divisors
+        self.snapshot = snapshot
+        self.gc_mode = gc_mode
+
+        # 実行結果（処理したフレーム数と実行時間）
+        self.frame_count = 0
+        self.elapsed_time = 0.0
+
+    def dispatch(self) -> None:
+        reader = LogReader(self.replayfile)
+        structs = reader.get_structs()
+        log_devices = reader.get_devices()
+        names = [name for name, _ in log_devices]
+
+        # 登録されたデバイスとログファイルのデバイスを変数名で対応付ける
+        bindings = []
+        for name, device in self.devices:
+            if name not in names:
+                raise ValueError(f'Device is not found in the log file: {name}')
+
+            index = names.index(name)
+            if log_devices[index][1] != device.device_type:
+                raise ValueError(
+                    f'Device type mismatch: {name} '
+                    f'(registered={device.device_type}, log={log_devices[index][1]})')
+
+            bindings.append((index, structs[index], device))
+
+        time_index = next(
+            (i for i, (_, device_type) in enumerate(log_devices) if device_type == 'hub'), None)
+
+        recorder: Optional[Recorder] = None
+        if self.resultfile is not None:
+            recorder = Recorder(self.resultfile)
+
+        for name, device in self.devices:
+            device.bind(name, recorder)
+
+        runner = HandlerRunner(
+            self.devices, self.handlers, self.logfile, self.log_options, self.stats,
+            interval=self.interval, divisors=self.divisors,
+            snapshot=self.snapshot, gc_mode=self.gc_mode)
+
+        start_time = time.monotonic()
+        first_time: Optional[int] = None
+        previous_time: Optional[int] = None
+        interval_ms = max(round(self.interval * 1000), 1)
+
+        try:
+            for frame_index, frame in enumerate(reader):
+                for index, device_struct, device in bindings:
+                    device.values = device_struct.unpack(frame[index])
+
+                # 記録された時刻（Hubが無い場合は実行間隔から計算した時刻）
+                if time_index is not None:
+                    frame_time = int.from_bytes(frame[time_index][:4], 'big')
+                else:
+                    frame_time = int(frame_index * self.interval * 1000)
+
+                if first_time is None:
+                    first_time = frame_time
+
+                # 記録時に周期を飛ばしていた場合は、経過した周期の数を時刻から計算する
+                if time_index is not None and previous_time is not None and frame_time > previous_time:
+                    elapsed = max((frame_time - previous_time + interval_ms // 2) // interval_ms, 1)
+                else:
+                    elapsed = 1
+
+                previous_time = frame_time
+
+                # 記録時の時刻に合わせて待機する
+                lateness: Optional[int] = None
+                if self.speed > 0:
+                    target_time = start_time + (frame_time - first_time) * 0.001 / self.speed
+                    wait_time = target_time - time.monotonic()
+                    if wait_time > 0:
+                        time.sleep(wait_time)
+                    lateness = max(int((time.monotonic() - target_time) * 1_000_000_000), 0)
+
+                if recorder is not None:
+                    recorder.set_frame(frame_index, frame_time)
+
+                runner.run(lateness, elapsed)
+
+                self.frame_count += 1
+        except StopIteration:
+            print('Stopped by handler.')
+        finally:
+            self.elapsed_time = time.monotonic() - start_time
+            reader.close()
+            runner.close()
+
+            if recorder is not None:
+                recorder.close()
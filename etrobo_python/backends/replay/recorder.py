@@ -0,0 +1,31 @@
+import csv
+from typing import Any, Tuple
+
+
+class Recorder(object):
+    '''制御ハンドラがデバイスに出力した命令（set_powerなど）をCSVファイルに記録するクラス。
+    1行に1つの命令を「フレーム番号, 時刻(ms), 変数名, 命令, 引数...」の形式で記録する。
+    異なるバージョンの制御プログラムで作成したファイルを比較（diff）することで、出力の違いを確認できる。
+
+    Args:
+        path: 記録するファイルのパス。
+    '''
+
+    def __init__(self, path: str) -> None:
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file, lineterminator='\n')
+        self.writer.writerow(('frame', 'time', 'device', 'command', 'arguments'))
+        self.frame = 0
+        self.time = 0
+        self.count = 0
+
+    def set_frame(self, frame: int, time: int) -> None:
+        self.frame = frame
+        self.time = time
+
+    def record(self, name: str, command: str, args: Tuple[Any, ...]) -> None:
+        self.writer.writerow((self.frame, self.time, name, command) + args)
+        self.count += 1
+
+    def close(self) -> None:
+        self.file.close()
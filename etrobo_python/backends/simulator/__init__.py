@@ -1,2 +1,2 @@
-from .device import create_device  # noqa
+from .device import create_context, create_device  # noqa
 from .dispatcher import create_dispatcher  # noqa
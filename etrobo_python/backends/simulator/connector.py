@@ -1,82 +1,218 @@
 import socket
+import struct
 import threading
-from struct import pack_into, unpack_from
+from struct import pack_into
 from typing import Any, Callable, List, Optional, Tuple
 
-_CONNECTOR: Optional['_Connector'] = None
-
-
-def connect_simulator(
-    handler: Callable[[], None],
-    interval: float,
-    address: str,
-    course: str,
-    timeout: float,
-) -> None:
-    global _CONNECTOR
-
-    if _CONNECTOR is not None:
-        raise Exception(
-            'This process have already connected to the simulator.')
-
-    _CONNECTOR = _Connector(
-        handler=handler,
-        interval=interval,
-        address=address,
-        course=course,
-        timeout=timeout)
-    _CONNECTOR.run()
-    _CONNECTOR = None
+from etrobo_python.realtime import configure_io_thread
+from etrobo_python.stats import DispatchStats
+
+# Unityから受信するパケットのレイアウト（フィールド名, オフセット, フォーマット）
+# 受信したパケットは、周期ごとに1回だけこの定義に従ってSensorFrameに変換される
+_RECV_LAYOUT: Tuple[Tuple[str, int, str], ...] = (
+    ('time', 16, 'Q'),
+    ('button', 32, 'i'),
+    ('ambient', 36, 'i'),
+    ('color_number', 40, 'i'),
+    ('brightness', 44, 'i'),
+    ('red', 48, 'i'),
+    ('green', 52, 'i'),
+    ('blue', 56, 'i'),
+    ('gyro_angle', 60, 'i'),
+    ('gyro_velocity', 64, 'i'),
+    ('sonar_distance', 120, 'i'),
+    ('sonar_listen', 124, 'i'),
+    ('touch', 144, 'i'),
+    ('motor_count0', 288, 'i'),
+    ('motor_count1', 292, 'i'),
+    ('motor_count2', 296, 'i'),
+    ('motor_count3', 300, 'i'),
+)
+
+
+def _make_struct(layout: Tuple[Tuple[str, int, str], ...]) -> struct.Struct:
+    '''レイアウトの定義から、全てのフィールドを1回で読み込むstruct.Structを作成する。
+    フィールドの間の使用しない領域はパディング（x）として読み飛ばす。
+    '''
+    fmt = '<'
+    position = 0
+
+    for name, offset, field_fmt in sorted(layout, key=lambda x: x[1]):
+        if offset < position:
+            raise Exception(f'Overlapped field in the packet layout: {name}')
+
+        fmt += 'x' * (offset - position) + field_fmt
+        position = offset + struct.calcsize('<' + field_fmt)
+
+    return struct.Struct(fmt)
+
+
+_RECV_STRUCT = _make_struct(_RECV_LAYOUT)
+_TIME_STRUCT = struct.Struct('<Q')
+_TIME_OFFSET = 16
+_RECV_FIELDS = tuple(name for name, _, _ in sorted(_RECV_LAYOUT, key=lambda x: x[1]))
+
+
+class SensorFrame(object):
+    '''1周期分のセンサの値。
+    Unityから受信したパケットを周期ごとに1回だけ変換し、デバイスは属性として値を読み出す。
+    '''
+    __slots__ = _RECV_FIELDS
+
+    def __init__(self) -> None:
+        for name in _RECV_FIELDS:
+            setattr(self, name, 0)
+
+    def decode(self, buffer: bytearray) -> None:
+        '''受信したパケットから全てのフィールドの値を読み込む。
+
+        Args:
+            buffer: 受信したパケット。
+        '''
+        for name, value in zip(_RECV_FIELDS, _RECV_STRUCT.unpack_from(buffer, 0)):
+            setattr(self, name, value)
+
+
+# Unityとの通信の方法（Connector.connect()を参照）
+ENGINES = ('thread', 'selector')
+
+# コースごとのUnityとの通信に使用するポート番号（送信先, 受信）
+COURSE_PORTS = {
+    'left': (54001, 54002),
+    'right': (54003, 54004),
+}
+
+
+def get_course_ports(course: str) -> Tuple[int, int]:
+    '''コースに対応するUnityとの通信に使用するポート番号を返す。
+
+    Args:
+        course: コースの名前（'left'または'right'）。
+
+    Returns:
+        送信先のポート番号と受信するポート番号のタプル。
+    '''
+    if course.lower() == 'right':
+        return COURSE_PORTS['right']
+    else:
+        return COURSE_PORTS['left']
+
+
+class Connector(object):
+    '''1台のロボットに対応するUnityとの接続。
+    ETRobo(backend='simulator')ごとに1つ作成され、デバイスは作成時にこのオブジェクトに結び付けられる。
+    ポート番号の異なる複数の接続を作成することで、1つのプロセスで複数のロボットを同時に制御できる。
+    '''
+
+    def __init__(self) -> None:
+        # 受信用のトリプルバッファ
+        # 受信スレッドはback_bufferに受信し、最新のパケットをshared_bufferと交換して公開する
+        # 計算スレッドは新しいパケットが公開されていればshared_bufferとfront_bufferを交換して読み込む
+        # いずれもバッファの参照を交換するだけで、パケットの内容はコピーしない
+        # selectorの場合はback_bufferとfront_bufferだけを使用する
+        self.back_buffer = bytearray(1024)
+        self.shared_buffer = bytearray(1024)
+        self.front_buffer = bytearray(1024)
+        self.published = False
+        self.send_data = bytearray(1024)
+        self.frame = SensorFrame()
+        self.reserved_data: List[Tuple[str, int, Tuple[Any, ...]]] = []
 
+        self.interval = 0
+        self.timeout = 0.0
+        self.send_address = ('', 0)
+        self.recv_address = ('', 0)
 
-def _get_connector() -> '_Connector':
-    global _CONNECTOR
+        self.recv_time = 0
+        self.proc_time = -1
+        self.running = False
 
-    if _CONNECTOR is None:
-        raise Exception(
-            'This process have been not connected to the simulator yet.')
+        # 実行済みの周期のパケットとして破棄したパケットの数
+        self.discarded_packets = 0
 
-    return _CONNECTOR
+        # 実行時間の記録（受信してから制御ハンドラを実行するまでの時間と送信時間）
+        self.stats: Optional[DispatchStats] = None
+        self.latency_histogram: Any = None
+        self.io_histogram: Any = None
+        self.recv_clock = 0
 
+        self.lock = threading.Lock()
+        self.event = threading.Event()
 
-class _Connector(object):
-    def __init__(
+    def connect(
         self,
-        handler: Callable[[], None],
+        handler: Callable[..., None],
         interval: float,
         address: str,
-        course: str,
+        ports: Tuple[int, int],
         timeout: float,
+        stats: Optional[DispatchStats] = None,
+        engine: str = 'thread',
     ) -> None:
-        if course.lower() == 'right':
-            self.send_address = (address, 54003)
-            self.recv_address = ('0.0.0.0', 54004)
-        else:
-            self.send_address = (address, 54001)
-            self.recv_address = ('0.0.0.0', 54002)
-
-        self.handler = handler
+        '''Unityに接続し、通信が終了するまで制御ハンドラを実行する。
+
+        `engine` には以下のいずれかを指定する。
+
+        - thread: 受信スレッドと計算スレッドを使用する。受信と制御ハンドラの実行が並行して行われる。
+        - selector: 1つのスレッドでノンブロッキングのソケットを監視し、
+          受信済みのパケットをすべて読み出して最新のパケットだけを使用して制御ハンドラを実行する。
+          スレッドの切り替えが発生しないため、1周期あたりの処理時間とCPU使用量が少ない。
+
+        Args:
+            handler: 制御ハンドラ。
+            interval: 制御ハンドラの実行間隔（単位は秒）。
+            address: UnityのIPアドレス。
+            ports: 送信先のポート番号と受信するポート番号のタプル。
+            timeout: 通信のタイムアウト時間（単位は秒）。
+            stats: 実行時間を記録するオブジェクト。
+            engine: 通信の方法（'thread'または'selector'）。
+        '''
+        if engine not in ENGINES:
+            raise ValueError(f'Invalid engine: {engine}')
+
+        if self.running:
+            raise Exception(
+                'This connector have already connected to the simulator.')
+
+        self.send_address = (address, ports[0])
+        self.recv_address = ('0.0.0.0', ports[1])
         self.interval = round(interval * 1_000_000)
         self.timeout = timeout
+        self.stats = stats
 
-        self.recv_buffer = bytearray(1024)
-        self.recv_data = bytearray(1024)
-        self.send_data = bytearray(1024)
-        self.reserved_data: List[Tuple[str, int, Tuple[Any, ...]]] = []
-
+        self.published = False
         self.recv_time = 0
-        self.proc_time = 0
-        self.running = False
+        self.proc_time = -1
+        self.discarded_packets = 0
+        self.event.clear()
 
-        self.lock = threading.Lock()
-        self.event = threading.Event()
+        if stats is not None:
+            self.latency_histogram = stats.get_histogram('connector_latency')
+            self.io_histogram = stats.get_histogram('connector_io')
+
+        sock = socket.socket(socket.AF_INET, type=socket.SOCK_DGRAM)
+
+        try:
+            sock.bind(self.recv_address)
+            sock.settimeout(self.timeout)
 
-        self.sock = socket.socket(socket.AF_INET, type=socket.SOCK_DGRAM)
-        self.sock.bind(self.recv_address)
-        self.sock.settimeout(self.timeout)
+            if engine == 'selector':
+                self.run_selector(sock, handler)
+            else:
+                self.run(sock, handler)
+        finally:
+            sock.close()
+
+            if stats is not None:
+                stats.count('connector:discarded_packets', self.discarded_packets)
 
-    def read_values(self, fmt: str, offset: int) -> Tuple[Any, ...]:
-        return unpack_from(fmt, self.recv_data, offset)
+            self.stats = None
+
+    def stop(self) -> None:
+        '''別のスレッドから通信を終了する。
+        '''
+        self.running = False
+        self.event.set()
 
     def write_values(self, fmt: str, offset: int, *args) -> None:
         pack_into(fmt, self.send_data, offset, *args)
@@ -84,15 +220,19 @@ class _Connector(object):
     def reserve_values(self, fmt: str, offset: int, *args) -> None:
         self.reserved_data.append((fmt, offset, args))
 
-    def run(self) -> None:
+    def run(self, sock: socket.socket, handler: Callable[..., None]) -> None:
+        port = self.recv_address[1]
+
         receiver_thread = threading.Thread(
             target=self._run_receiver,
-            name='Simulator_run_receiver',
+            args=(sock,),
+            name=f'Simulator_run_receiver_{port}',
         )
 
         handler_thread = threading.Thread(
             target=self._run_handler,
-            name='Simulator_run_handler',
+            args=(sock, handler),
+            name=f'Simulator_run_handler_{port}',
         )
 
         self.running = True
@@ -109,28 +249,99 @@ class _Connector(object):
             receiver_thread.join()
             handler_thread.join()
 
-    def _run_receiver(self) -> None:
-        buffer = bytearray(1024)
+    def run_selector(self, sock: socket.socket, handler: Callable[..., None]) -> None:
+        import selectors
+
+        self.running = True
 
         try:
-            # Unityに接続
-            print(f'Connecting to the Unity Simulator {self.send_address}.')
-            pack_into('<4sI', self.send_data, 0, b'ETTX', 1)
-            pack_into('<II', self.send_data, 24, 512, 512)
-            self.sock.sendto(self.send_data, self.send_address)
+            self._connect_unity(sock)
+            sock.setblocking(False)
+
+            selector = selectors.DefaultSelector()
+            selector.register(sock, selectors.EVENT_READ)
+            stats = self.stats
+            interval = self.interval
+
+            try:
+                while self.running:
+                    if len(selector.select(self.timeout)) == 0:
+                        print('Connection is timeout.')
+                        break
+
+                    # 受信済みのパケットをすべて読み出し、最新のパケットだけをfront_bufferに残す
+                    received = False
+
+                    while True:
+                        try:
+                            sock.recv_into(self.back_buffer)
+                        except BlockingIOError:
+                            break
+
+                        recv_time = _TIME_STRUCT.unpack_from(self.back_buffer, _TIME_OFFSET)[0]
+                        self.recv_time = recv_time
+
+                        # 既に制御ハンドラを実行した周期のパケットは破棄する
+                        if (recv_time // interval) * interval == self.proc_time:
+                            self.discarded_packets += 1
+                            continue
+
+                        self.back_buffer, self.front_buffer = self.front_buffer, self.back_buffer
+                        received = True
+
+                    if received:
+                        if stats is not None:
+                            self.recv_clock = stats.clock()
+
+                        self._run_tick(sock, handler, self.recv_clock)
+            finally:
+                selector.close()
+        except socket.timeout:
+            print('Connection is timeout.')
+        except StopIteration:
+            print('Stopped by handler.')
+        except KeyboardInterrupt:
+            print('Interrupted by keyboard.')
+        finally:
+            print('Closing the connection.')
+            self.running = False
+
+    def _connect_unity(self, sock: socket.socket) -> None:
+        print(f'Connecting to the Unity Simulator {self.send_address}.')
+        pack_into('<4sI', self.send_data, 0, b'ETTX', 1)
+        pack_into('<II', self.send_data, 24, 512, 512)
+        sock.sendto(self.send_data, self.send_address)
+
+        sock.recv_into(self.back_buffer)
+        self.recv_time = _TIME_STRUCT.unpack_from(self.back_buffer, _TIME_OFFSET)[0]
+        print('Connected to the Unity Simulator.')
+
+    def _run_receiver(self, sock: socket.socket) -> None:
+        configure_io_thread()
 
-            self.sock.recvfrom_into(buffer)
-            self.recv_time = unpack_from('<Q', buffer, 16)[0]
-            print('Connected to the Unity Simulator.')
+        try:
+            # Unityに接続
+            self._connect_unity(sock)
+            interval = self.interval
 
             while self.running:
                 # Unityからデータを受信する
-                self.sock.recvfrom_into(buffer)
+                sock.recv_into(self.back_buffer)
+                recv_time = _TIME_STRUCT.unpack_from(self.back_buffer, _TIME_OFFSET)[0]
+                self.recv_time = recv_time
 
-                # 状態を更新する
+                # 既に制御ハンドラを実行した周期のパケットは公開せずに破棄する
+                if (recv_time // interval) * interval == self.proc_time:
+                    self.discarded_packets += 1
+                    continue
+
+                # 受信したバッファと公開しているバッファを交換する
                 with self.lock:
-                    self.recv_time = unpack_from('<Q', buffer, 16)[0]
-                    self.recv_buffer[:] = buffer
+                    self.back_buffer, self.shared_buffer = self.shared_buffer, self.back_buffer
+                    self.published = True
+
+                    if self.stats is not None:
+                        self.recv_clock = self.stats.clock()
 
                 # 計算スレッドに通知
                 self.event.set()
@@ -140,103 +351,155 @@ class _Connector(object):
             print('Closing the connection.')
             self.running = False
             self.event.set()
-            self.sock.close()
+            sock.close()
 
-    def _run_handler(self) -> None:
+    def _run_handler(self, sock: socket.socket, handler: Callable[..., None]) -> None:
         try:
             while self.event.wait(self.timeout) and self.running:
                 self.event.clear()
 
-                # 時刻を確認する
+                # 公開されている最新のバッファを受け取る
                 with self.lock:
-                    proc_time = (self.recv_time // self.interval) * self.interval
-
-                    if self.proc_time == proc_time:
+                    if not self.published:
                         continue
 
-                    self.proc_time = proc_time
-                    self.recv_data[:] = self.recv_buffer
-
-                # 状態を更新する
-                for fmt, offset, args in self.reserved_data:
-                    pack_into(fmt, self.send_data, offset, *args)
+                    self.front_buffer, self.shared_buffer = self.shared_buffer, self.front_buffer
+                    self.published = False
+                    recv_clock = self.recv_clock
 
-                self.reserved_data.clear()
-                self.handler()
-
-                # データをUnityに送信する
-                pack_into('<QQ', self.send_data, 8, self.recv_time, self.recv_time)
-                self.sock.sendto(self.send_data, self.send_address)
+                self._run_tick(sock, handler, recv_clock)
         except StopIteration:
             print('Stopped by handler.')
         finally:
             self.running = False
 
+    def _run_tick(self, sock: socket.socket, handler: Callable[..., None], recv_clock: int) -> None:
+        '''front_bufferのパケットを使用して制御ハンドラを実行し、Unityにデータを送信する。
+        '''
+        # 時刻を確認する
+        recv_time = _TIME_STRUCT.unpack_from(self.front_buffer, _TIME_OFFSET)[0]
+        proc_time = (recv_time // self.interval) * self.interval
+
+        if self.proc_time == proc_time:
+            return
+
+        # 前回の実行から経過した周期の数（パケットの時刻が周期を飛ばした場合は2以上）
+        if self.proc_time >= 0:
+            elapsed = (proc_time - self.proc_time) // self.interval
+        else:
+            elapsed = 1
+
+        # 予定時刻（周期の開始時刻）からのパケットの時刻の遅れ（単位はナノ秒）
+        # 周期の開始時刻はシミュレータの時刻0から数えた実行間隔の倍数なので、累積したずれは含まれない
+        lateness = (recv_time - proc_time) * 1000
+
+        self.proc_time = proc_time
+        self.frame.decode(self.front_buffer)
+
+        stats = self.stats
+        if stats is not None:
+            self.latency_histogram.add((stats.clock() - recv_clock) // 1000)
+
+        # 状態を更新する
+        for fmt, offset, args in self.reserved_data:
+            pack_into(fmt, self.send_data, offset, *args)
+
+        self.reserved_data.clear()
+        handler(lateness, elapsed)
+
+        # データをUnityに送信する
+        if stats is not None:
+            start_time = stats.clock()
+
+        pack_into('<QQ', self.send_data, 8, self.recv_time, self.recv_time)
+        sock.sendto(self.send_data, self.send_address)
+
+        if stats is not None:
+            self.io_histogram.add((stats.clock() - start_time) // 1000)
+
 
 class Hub(object):
+    def __init__(self, connector: Connector) -> None:
+        self.connector = connector
+
     def set_led(self, color: int) -> None:
-        _get_connector().write_values('<I', 32, color)
+        self.connector.write_values('<I', 32, color)
 
     def get_time(self) -> float:
-        return _get_connector().recv_time / 1_000_000
+        return self.connector.frame.time / 1_000_000
 
     def get_button_pressed(self) -> int:
-        return _get_connector().read_values('<i', 32)[0]
+        return self.connector.frame.button
 
 
 class Motor(object):
-    def __init__(self, port: int) -> None:
+    def __init__(self, connector: Connector, port: int) -> None:
+        self.connector = connector
         self.port = port
+        self.count_field = f'motor_count{port}'
 
     def get_count(self) -> int:
-        return _get_connector().read_values('<i', 288 + self.port * 4)[0]
+        return getattr(self.connector.frame, self.count_field)
 
     def reset_count(self) -> None:
-        _get_connector().write_values('<i', 68 + self.port * 4, 1)
-        _get_connector().reserve_values('<i', 68 + self.port * 4, 0)
+        self.connector.write_values('<i', 68 + self.port * 4, 1)
+        self.connector.reserve_values('<i', 68 + self.port * 4, 0)
 
     def set_pwm(self, pwm: int) -> None:
         pwm = min(max(pwm, -100), 100)
-        _get_connector().write_values('<i', 36 + self.port * 4, pwm)
+        self.connector.write_values('<i', 36 + self.port * 4, pwm)
 
     def set_brake(self, brake: bool) -> None:
-        _get_connector().write_values('<I', 52 + self.port * 4, int(brake))
+        self.connector.write_values('<I', 52 + self.port * 4, int(brake))
 
 
 class ColorSensor(object):
+    def __init__(self, connector: Connector) -> None:
+        self.connector = connector
+
     def get_brightness(self) -> int:
-        return _get_connector().read_values('<i', 44)[0]
+        return self.connector.frame.brightness
 
     def get_ambient(self) -> int:
-        return _get_connector().read_values('<i', 36)[0]
+        return self.connector.frame.ambient
 
     def get_color_number(self) -> int:
-        return _get_connector().read_values('<i', 40)[0]
+        return self.connector.frame.color_number
 
     def get_raw_color(self) -> Tuple[int, int, int]:
-        return _get_connector().read_values('<iii', 48)  # type:ignore
+        frame = self.connector.frame
+        return frame.red, frame.green, frame.blue
 
 
 class TouchSensor(object):
+    def __init__(self, connector: Connector) -> None:
+        self.connector = connector
+
     def is_pressed(self) -> bool:
-        return _get_connector().read_values('<i', 144)[0] != 0
+        return self.connector.frame.touch != 0
 
 
 class SonarSensor(object):
+    def __init__(self, connector: Connector) -> None:
+        self.connector = connector
+
     def listen(self) -> bool:
-        return _get_connector().read_values('<i', 124)[0] != 0
+        return self.connector.frame.sonar_listen != 0
 
     def get_distance(self) -> int:
-        return _get_connector().read_values('<i', 120)[0]
+        return self.connector.frame.sonar_distance
 
 
 class GyroSensor(object):
+    def __init__(self, connector: Connector) -> None:
+        self.connector = connector
+
     def reset(self) -> None:
-        _get_connector().write_values('<i', 84, 1)
-        _get_connector().reserve_values('<i', 84, 0)
+        self.connector.write_values('<i', 84, 1)
+        self.connector.reserve_values('<i', 84, 0)
 
     def get_angle(self) -> int:
-        return _get_connector().read_values('<i', 60)[0]
+        return self.connector.frame.gyro_angle
 
     def get_angler_velocity(self) -> int:
-        return _get_connector().read_values('<i', 64)[0]
+        return self.connector.frame.gyro_velocity
@@ -1,39 +1,39 @@
 import warnings
-from typing import Any, Tuple
+from typing import Any, Optional, Tuple
 
 import etrobo_python
 
 from . import connector
 
-try:
-    import os
-    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
-    import pygame
-    pygame.mixer.init(frequency=44100, channels=1)
-except ImportError:
-    pygame = None  # type: ignore
+# ビープ音の再生に使用するモジュール（pygameとnumpy）
+# 起動時間を短くするため、最初にビープ音を鳴らすときに読み込む
+_SOUND_MODULES: Optional[Tuple[Any, Any]] = None
 
-try:
-    import numpy as np
-except ImportError:
-    np = None  # type: ignore
 
+def create_context() -> connector.Connector:
+    '''ロボットごとのUnityとの接続を作成する（ETRoboの作成時に1回だけ実行される）。
+    '''
+    return connector.Connector()
+
+
+def create_device(device_type: str, port: str, context: Optional[connector.Connector] = None) -> Any:
+    if context is None:
+        raise Exception('The simulator backend requires a context created by create_context().')
 
-def create_device(device_type: str, port: str) -> Any:
     if device_type == 'hub':
-        return Hub()
+        return Hub(context)
     elif device_type == 'motor' or device_type == 'normal_motor':
-        return NormalMotor(*get_motor_settings(port))
+        return NormalMotor(context, *get_motor_settings(port))
     elif device_type == 'reversed_motor':
-        return ReversedMotor(*get_motor_settings(port))
+        return ReversedMotor(context, *get_motor_settings(port))
     elif device_type == 'color_sensor':
-        return ColorSensor()
+        return ColorSensor(context)
     elif device_type == 'touch_sensor':
-        return TouchSensor()
+        return TouchSensor(context)
     elif device_type == 'sonar_sensor':
-        return SonarSensor()
+        return SonarSensor(context)
     elif device_type == 'gyro_sensor':
-        return GyroSensor()
+        return GyroSensor(context)
     else:
         raise NotImplementedError(f'Unsupported device: {device_type}')
 
@@ -58,7 +58,30 @@ def get_motor_settings(port: str) -> Tuple[int, bool]:
         raise Exception(f'Unknown port: {port}')
 
 
+def _get_sound_modules() -> Tuple[Any, Any]:
+    global _SOUND_MODULES
+
+    if _SOUND_MODULES is None:
+        try:
+            import os
+            os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+            import pygame
+            pygame.mixer.init(frequency=44100, channels=1)
+        except ImportError:
+            pygame = None  # type: ignore
+
+        try:
+            import numpy as np
+        except ImportError:
+            np = None  # type: ignore
+
+        _SOUND_MODULES = (pygame, np)
+
+    return _SOUND_MODULES
+
+
 def play_beep_sound(freq: float, duration: float, volume: float) -> None:
+    pygame, np = _get_sound_modules()
     if pygame is None or np is None:
         return
 
@@ -71,10 +94,9 @@ def play_beep_sound(freq: float, duration: float, volume: float) -> None:
 
 
 class Hub(etrobo_python.Hub):
-    def __init__(self) -> None:
-        self.hub = connector.Hub()
+    def __init__(self, context: connector.Connector) -> None:
+        self.hub = connector.Hub(context)
         self.volume = 1.0
-        self.log = bytearray(5)
 
     def set_led(self, color: str) -> None:
         color_value = color.lower()[0]
@@ -112,23 +134,20 @@ class Hub(etrobo_python.Hub):
     def is_down_button_pressed(self) -> bool:
         return (self.hub.get_button_pressed() & 0x08) != 0
 
-    def get_log(self) -> bytes:
-        self.log[:4] = int.to_bytes(int(self.get_time() * 1000), 4, 'big')
-        self.log[4] = (
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (
+            int(self.get_time() * 1000),
             int(self.is_left_button_pressed())
             | int(self.is_right_button_pressed()) << 1
             | int(self.is_up_button_pressed()) << 2
-            | int(self.is_down_button_pressed()) << 3
+            | int(self.is_down_button_pressed()) << 3,
         )
 
-        return self.log
-
 
 class Motor(etrobo_python.Motor):
-    def __init__(self, port: int, reversed: bool) -> None:
-        self.motor = connector.Motor(port)
+    def __init__(self, context: connector.Connector, port: int, reversed: bool) -> None:
+        self.motor = connector.Motor(context, port)
         self.sign = -1 if reversed else 1
-        self.log = bytearray(4)
 
     def get_count(self) -> int:
         return self.motor.get_count() * self.sign
@@ -142,26 +161,24 @@ class Motor(etrobo_python.Motor):
     def set_brake(self, brake: bool) -> None:
         self.motor.set_brake(brake)
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_count(), 4, 'big', signed=True)
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_count(),)
 
 
 class NormalMotor(Motor):
-    def __init__(self, port: int, direction: bool = False) -> None:
-        super().__init__(port, direction)
+    def __init__(self, context: connector.Connector, port: int, direction: bool = False) -> None:
+        super().__init__(context, port, direction)
 
 
 class ReversedMotor(Motor):
-    def __init__(self, port: int, direction: bool = False) -> None:
-        super().__init__(port, not direction)
+    def __init__(self, context: connector.Connector, port: int, direction: bool = False) -> None:
+        super().__init__(context, port, not direction)
 
 
 class ColorSensor(etrobo_python.ColorSensor):
-    def __init__(self) -> None:
-        self.color_sensor = connector.ColorSensor()
+    def __init__(self, context: connector.Connector) -> None:
+        self.color_sensor = connector.ColorSensor(context)
         self.mode = -1
-        self.log = bytearray(5)
 
     def get_brightness(self) -> int:
         self.mode = 0
@@ -175,40 +192,32 @@ class ColorSensor(etrobo_python.ColorSensor):
         self.mode = 2
         return self.color_sensor.get_raw_color()
 
-    def get_log(self) -> bytes:
+    def get_log_values(self) -> Tuple[int, ...]:
         if self.mode == 0:
-            self.log[0] = self.get_brightness()
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (self.get_brightness(), 0, 0, 0, 0)
         elif self.mode == 1:
-            self.log[0] = 0
-            self.log[1] = self.get_ambient()
-            self.log[2], self.log[3], self.log[4] = 0, 0, 0
+            return (0, self.get_ambient(), 0, 0, 0)
         elif self.mode == 2:
-            self.log[0] = 0
-            self.log[1] = 0
-            self.log[2], self.log[3], self.log[4] = self.get_raw_color()
-
-        return self.log
+            red, green, blue = self.get_raw_color()
+            return (0, 0, red, green, blue)
+        else:
+            return (0, 0, 0, 0, 0)
 
 
 class TouchSensor(etrobo_python.TouchSensor):
-    def __init__(self) -> None:
-        self.touch_sensor = connector.TouchSensor()
-        self.log = bytearray(1)
+    def __init__(self, context: connector.Connector) -> None:
+        self.touch_sensor = connector.TouchSensor(context)
 
     def is_pressed(self) -> bool:
         return self.touch_sensor.is_pressed()
 
-    def get_log(self) -> bytes:
-        self.log[0] = int(self.is_pressed())
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (int(self.is_pressed()),)
 
 
 class SonarSensor(etrobo_python.SonarSensor):
-    def __init__(self) -> None:
-        self.sonar_sensor = connector.SonarSensor()
-        self.log = bytearray(2)
+    def __init__(self, context: connector.Connector) -> None:
+        self.sonar_sensor = connector.SonarSensor(context)
 
     def listen(self) -> bool:
         return self.sonar_sensor.listen()
@@ -216,15 +225,13 @@ class SonarSensor(etrobo_python.SonarSensor):
     def get_distance(self) -> int:
         return self.sonar_sensor.get_distance()
 
-    def get_log(self) -> bytes:
-        self.log[:] = int.to_bytes(self.get_distance(), 2, 'big')
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_distance(),)
 
 
 class GyroSensor(etrobo_python.GyroSensor):
-    def __init__(self) -> None:
-        self.gyro_sensor = connector.GyroSensor()
-        self.log = bytearray(4)
+    def __init__(self, context: connector.Connector) -> None:
+        self.gyro_sensor = connector.GyroSensor(context)
 
     def reset(self) -> None:
         self.gyro_sensor.reset()
@@ -241,7 +248,5 @@ class GyroSensor(etrobo_python.GyroSensor):
             DeprecationWarning)
         return self.get_angular_velocity()
 
-    def get_log(self) -> bytes:
-        self.log[:2] = int.to_bytes(self.get_angle(), 2, 'big', signed=True)
-        self.log[2:] = int.to_bytes(self.get_angler_velocity(), 2, 'big', signed=True)
-        return self.log
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.get_angle(), self.get_angular_velocity())
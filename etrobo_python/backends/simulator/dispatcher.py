@@ -1,11 +1,12 @@
 import os
 from subprocess import DEVNULL, PIPE, Popen
-from typing import Any, Callable, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from etrobo_python.device import Device
-from etrobo_python.log import LogWriter
+from etrobo_python.runner import HandlerRunner
+from etrobo_python.stats import DispatchStats
 
-from .connector import connect_simulator
+from .connector import Connector, get_course_ports
 
 
 def create_dispatcher(
@@ -15,8 +16,19 @@ def create_dispatcher(
     course: str = 'left',
     timeout: float = 5.0,
     logfile: Optional[str] = None,
+    log_options: Optional[Dict[str, Any]] = None,
+    stats: Optional[DispatchStats] = None,
+    divisors: Optional[List[int]] = None,
+    snapshot: bool = False,
+    gc_mode: Optional[str] = None,
+    ports: Optional[Tuple[int, int]] = None,
+    engine: str = 'thread',
+    context: Optional[Connector] = None,
     **kwargs: Any,
 ) -> Any:
+    if context is None:
+        raise Exception('The simulator backend requires a context created by create_context().')
+
     return Dispatcher(
         devices=devices,
         handlers=handlers,
@@ -24,6 +36,14 @@ def create_dispatcher(
         course=course,
         timeout=timeout,
         logfile=logfile,
+        log_options=log_options,
+        stats=stats,
+        divisors=divisors,
+        snapshot=snapshot,
+        gc_mode=gc_mode,
+        ports=ports or get_course_ports(course),
+        engine=engine,
+        connector=context,
     )
 
 
@@ -36,6 +56,14 @@ class Dispatcher(object):
         course: str,
         timeout: float,
         logfile: Optional[str],
+        log_options: Optional[Dict[str, Any]],
+        stats: Optional[DispatchStats],
+        divisors: Optional[List[int]],
+        snapshot: bool,
+        gc_mode: Optional[str],
+        ports: Tuple[int, int],
+        engine: str,
+        connector: Connector,
     ) -> None:
         self.devices = devices
         self.handlers = handlers
@@ -43,31 +71,36 @@ class Dispatcher(object):
         self.course = course
         self.timeout = timeout
         self.logfile = logfile
+        self.log_options = log_options or {}
+        self.stats = stats
+        self.divisors = divisors
+        self.snapshot = snapshot
+        self.gc_mode = gc_mode
+        self.ports = ports
+        self.engine = engine
+        self.connector = connector
 
     def dispatch(self) -> None:
-        variables = {name: device for name, device in self.devices}
-
-        writer: Optional[LogWriter] = None
-        if self.logfile is not None:
-            writer = LogWriter(self.logfile, self.devices)
-
-        def run_handlers() -> None:
-            for handler in self.handlers:
-                handler(**variables)
-
-            if writer is not None:
-                writer.write([device for _, device in self.devices])
-
-        connect_simulator(
-            handler=run_handlers,
-            interval=self.interval,
-            address=_get_remote_address(),
-            course=self.course,
-            timeout=self.timeout,
-        )
-
-        if writer is not None:
-            writer.close()
+        runner = HandlerRunner(
+            self.devices, self.handlers, self.logfile, self.log_options, self.stats,
+            interval=self.interval, divisors=self.divisors,
+            snapshot=self.snapshot, gc_mode=self.gc_mode)
+
+        try:
+            self.connector.connect(
+                handler=runner.run,
+                interval=self.interval,
+                address=_get_remote_address(),
+                ports=self.ports,
+                timeout=self.timeout,
+                stats=self.stats,
+                engine=self.engine,
+            )
+        finally:
+            runner.close()
+
+    def stop(self) -> None:
+        self.connector.stop()
 
 
 def _get_remote_address() -> str:
@@ -0,0 +1,497 @@
+'''Unityのシミュレータの代わりに使用する、画面を持たないシミュレータ。
+
+Unityのシミュレータと同じUDPの通信（ETTX）でセンサの値を送信し、制御プログラムから受信したモータの出力を
+差動二輪ロボットの簡単な物理モデルに反映する。床にはライン（黒線）が描かれており、カラーセンサの値はラインとの距離から計算される。
+Unityのシミュレータを起動できない環境（Linuxのサーバなど）で、制御プログラム全体の動作確認や性能測定を行うために使用する。
+
+以下の2つの実行方法がある。
+
+- rate=None: 制御プログラムの応答を待ってから次の周期に進む（制御プログラムが応答できる最大の速度で実行する）。
+- rate=1.0など: 実時間に対する指定した速度でパケットを送信する（制御プログラムの応答は待たない）。
+
+.. code-block:: python
+
+    from etrobo_python.backends.simulator.headless import HeadlessSimulator
+
+    simulator = HeadlessSimulator(course='left', interval=0.01)
+    simulator.start(duration=10.0)
+
+    etrobo = ETRobo(backend='simulator')
+    ...
+    etrobo.dispatch(interval=0.01, course='left')
+
+    simulator.join()
+    print(simulator.model.x, simulator.model.y)
+'''
+import math
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .connector import _RECV_FIELDS, _RECV_STRUCT, get_course_ports
+
+# 制御プログラムから受信するパケットのレイアウト（Connectorのデバイスクラスと同じオフセット）
+# LED（32）、モータの出力（36 + port * 4）、ブレーキ（52 + port * 4）、
+# カウンタのリセット（68 + port * 4）、ジャイロセンサのリセット（84）の順に並んでいる
+_ACTUATOR_OFFSET = 32
+_ACTUATOR_STRUCT = struct.Struct('<i4i4I4ii')
+
+# 応答に含まれる処理したパケットの時刻のオフセット
+_REPLY_TIME_STRUCT = struct.Struct('<Q')
+_REPLY_TIME_OFFSET = 8
+
+# 左右の車輪を駆動するモータのポート番号（Connectorのポート番号、右: B、左: C）
+# 左の車輪のモータは逆向きに取り付けられているため、出力が正のときに後退する
+RIGHT_WHEEL = 0
+LEFT_WHEEL = 1
+
+# カラーセンサの値（ライン上と床）
+_BLACK_BRIGHTNESS = 5
+_WHITE_BRIGHTNESS = 80
+_BLACK_COLOR_NUMBER = 1
+_WHITE_COLOR_NUMBER = 6
+
+
+def make_oval_line(
+    straight: float = 1.0,
+    radius: float = 0.5,
+    segments: int = 32,
+) -> List[Tuple[float, float]]:
+    '''原点を中心とする楕円形（2つの直線と2つの半円）のラインの頂点を作成する。
+
+    Args:
+        straight: 直線の長さ（単位はm）。
+        radius: 半円の半径（単位はm）。
+        segments: 半円を近似する線分の数。
+
+    Returns:
+        反時計回りに並んだ頂点の座標のリスト。
+    '''
+    points = []
+
+    for i in range(segments + 1):
+        angle = -math.pi / 2 + math.pi * i / segments
+        points.append((straight / 2 + radius * math.cos(angle), radius * math.sin(angle)))
+
+    for i in range(segments + 1):
+        angle = math.pi / 2 + math.pi * i / segments
+        points.append((-straight / 2 + radius * math.cos(angle), radius * math.sin(angle)))
+
+    return points
+
+
+class LineMap(object):
+    '''ラインが描かれた床。ラインは頂点を結ぶ閉じた折れ線で表される。
+
+    Args:
+        points: ラインの頂点の座標（単位はm）。Noneの場合は楕円形のライン。
+        line_width: ラインの幅（単位はm）。
+        field_size: 床の幅と高さ（単位はm）。床の外周は壁として超音波センサで検出される。
+        sensor_radius: カラーセンサが測定する範囲の半径（単位はm）。
+    '''
+
+    def __init__(
+        self,
+        points: Optional[List[Tuple[float, float]]] = None,
+        line_width: float = 0.02,
+        field_size: Tuple[float, float] = (3.0, 2.0),
+        sensor_radius: float = 0.01,
+    ) -> None:
+        self.points = points if points is not None else make_oval_line()
+        self.line_width = line_width
+        self.field_size = field_size
+        self.sensor_radius = sensor_radius
+        self.segments = list(zip(self.points, self.points[1:] + self.points[:1]))
+
+    def get_line_distance(self, x: float, y: float) -> float:
+        '''指定した位置からラインの中心までの距離を返す。
+        '''
+        distance = math.inf
+
+        for (x1, y1), (x2, y2) in self.segments:
+            dx, dy = x2 - x1, y2 - y1
+            length = dx * dx + dy * dy
+            t = 0.0 if length == 0 else min(max(((x - x1) * dx + (y - y1) * dy) / length, 0.0), 1.0)
+            distance = min(distance, math.hypot(x - x1 - t * dx, y - y1 - t * dy))
+
+        return distance
+
+    def get_coverage(self, x: float, y: float) -> float:
+        '''カラーセンサの測定範囲に含まれるラインの割合（0.0-1.0）を返す。
+        '''
+        distance = self.get_line_distance(x, y)
+        coverage = (self.line_width / 2 + self.sensor_radius - distance) / (2 * self.sensor_radius)
+        return min(max(coverage, 0.0), 1.0)
+
+    def get_wall_distance(self, x: float, y: float, heading: float) -> float:
+        '''指定した位置から向いている方向にある床の外周までの距離を返す。
+        '''
+        half_width, half_height = self.field_size[0] / 2, self.field_size[1] / 2
+        dx, dy = math.cos(heading), math.sin(heading)
+        distances = []
+
+        if dx > 0:
+            distances.append((half_width - x) / dx)
+        elif dx < 0:
+            distances.append((-half_width - x) / dx)
+
+        if dy > 0:
+            distances.append((half_height - y) / dy)
+        elif dy < 0:
+            distances.append((-half_height - y) / dy)
+
+        return max(min(distances), 0.0)
+
+
+class RobotModel(object):
+    '''差動二輪ロボットの物理モデル。
+    モータの回転速度は出力に比例する速度に一次遅れで追従し、車輪の回転から位置と向きを計算する。
+    向き（heading）は反時計回りを正とし、ジャイロセンサの角度も反時計回りを正とする。
+
+    Args:
+        x, y: カラーセンサの初期位置（単位はm）。
+        heading: 初期の向き（単位はrad）。
+        wheel_radius: 車輪の半径（単位はm）。
+        tread: 左右の車輪の間隔（単位はm）。
+        sensor_offset: 車軸の中心からカラーセンサまでの前方向の距離（単位はm）。
+        max_speed: 出力が100のときのモータの回転速度（単位はdeg/s）。
+        time_constant: モータの回転速度の時定数（単位はs）。
+    '''
+
+    def __init__(
+        self,
+        x: float = 0.0,
+        y: float = 0.0,
+        heading: float = 0.0,
+        wheel_radius: float = 0.05,
+        tread: float = 0.126,
+        sensor_offset: float = 0.08,
+        max_speed: float = 1000.0,
+        time_constant: float = 0.05,
+    ) -> None:
+        self.wheel_radius = wheel_radius
+        self.tread = tread
+        self.sensor_offset = sensor_offset
+        self.max_speed = max_speed
+        self.time_constant = time_constant
+
+        # 車軸の中心の位置と向き
+        self.x = x - sensor_offset * math.cos(heading)
+        self.y = y - sensor_offset * math.sin(heading)
+        self.heading = heading
+
+        # モータ（ポート0-3）の状態
+        self.pwms = [0, 0, 0, 0]
+        self.brakes = [0, 0, 0, 0]
+        self.speeds = [0.0, 0.0, 0.0, 0.0]
+        self.angles = [0.0, 0.0, 0.0, 0.0]
+        self.count_offsets = [0.0, 0.0, 0.0, 0.0]
+
+        # ジャイロセンサの状態
+        self.gyro_offset = heading
+        self.angular_velocity = 0.0
+
+    def get_sensor_position(self) -> Tuple[float, float]:
+        '''カラーセンサの位置を返す。
+        '''
+        return (self.x + self.sensor_offset * math.cos(self.heading),
+                self.y + self.sensor_offset * math.sin(self.heading))
+
+    def get_count(self, port: int) -> int:
+        return int(self.angles[port] - self.count_offsets[port])
+
+    def reset_count(self, port: int) -> None:
+        self.count_offsets[port] = self.angles[port]
+
+    def get_gyro_angle(self) -> int:
+        return int(round(math.degrees(self.heading - self.gyro_offset)))
+
+    def get_gyro_velocity(self) -> int:
+        return int(round(math.degrees(self.angular_velocity)))
+
+    def reset_gyro(self) -> None:
+        self.gyro_offset = self.heading
+
+    def step(self, dt: float) -> None:
+        '''指定した時間だけ状態を進める。
+
+        Args:
+            dt: 経過時間（単位はs）。
+        '''
+        alpha = min(dt / self.time_constant, 1.0) if self.time_constant > 0 else 1.0
+
+        for port in range(4):
+            target = self.pwms[port] / 100 * self.max_speed
+
+            # ブレーキが有効で出力が0の場合は直ちに停止する
+            if self.brakes[port] and self.pwms[port] == 0:
+                self.speeds[port] = 0.0
+            else:
+                self.speeds[port] += (target - self.speeds[port]) * alpha
+
+            self.angles[port] += self.speeds[port] * dt
+
+        right = math.radians(self.speeds[RIGHT_WHEEL]) * self.wheel_radius
+        left = -math.radians(self.speeds[LEFT_WHEEL]) * self.wheel_radius
+        velocity = (right + left) / 2
+        self.angular_velocity = (right - left) / self.tread
+
+        heading = self.heading + self.angular_velocity * dt / 2
+        self.x += velocity * math.cos(heading) * dt
+        self.y += velocity * math.sin(heading) * dt
+        self.heading += self.angular_velocity * dt
+
+
+class HeadlessSimulator(object):
+    '''Unityのシミュレータの代わりに制御プログラムと通信するシミュレータ。
+
+    Args:
+        course: コースの名前（'left'または'right'）。通信に使用するポート番号を決定する。
+        ports: 受信するポート番号と送信先のポート番号のタプル（指定した場合はcourseより優先される）。
+        step: パケットを送信する間隔（シミュレーション時間、単位はs）。
+        interval: 制御プログラムの実行間隔（単位はs）。rate=Noneの場合に応答を待つ周期を決定する。
+        rate: 実時間に対するシミュレーションの速度。Noneの場合は制御プログラムの応答を待って次の周期に進む。
+        timeout: 制御プログラムの接続と応答を待つ時間（単位はs）。
+        line_map: ラインが描かれた床。Noneの場合は楕円形のライン。
+        model: ロボットの物理モデル。Noneの場合はラインの最初の頂点にカラーセンサを置き、ラインに沿った向きで開始する。
+    '''
+
+    def __init__(
+        self,
+        course: str = 'left',
+        ports: Optional[Tuple[int, int]] = None,
+        step: float = 0.0025,
+        interval: float = 0.01,
+        rate: Optional[float] = None,
+        timeout: float = 5.0,
+        line_map: Optional[LineMap] = None,
+        model: Optional[RobotModel] = None,
+    ) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError(f'Invalid rate: {rate}')
+
+        self.ports = ports or get_course_ports(course)
+        self.step = round(step * 1_000_000)
+        self.interval = round(interval * 1_000_000)
+        self.rate = rate
+        self.timeout = timeout
+        self.line_map = line_map or LineMap()
+
+        if model is None:
+            (x1, y1), (x2, y2) = self.line_map.points[0], self.line_map.points[1]
+            model = RobotModel(x=x1, y=y1, heading=math.atan2(y2 - y1, x2 - x1))
+
+        self.model = model
+        self.led = 0
+
+        self.time = 0
+        self.packets = 0
+        self.replies = 0
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+        self.send_data = bytearray(1024)
+        self.recv_data = bytearray(1024)
+
+        self.sock = socket.socket(socket.AF_INET, type=socket.SOCK_DGRAM)
+        self.sock.bind(('0.0.0.0', self.ports[0]))
+
+    def start(self, duration: Optional[float] = None) -> None:
+        '''別のスレッドでシミュレーションを開始する。
+
+        Args:
+            duration: シミュレーション時間（単位はs）。Noneの場合は制御プログラムが応答しなくなるまで実行する。
+        '''
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(duration,),
+            name=f'HeadlessSimulator_{self.ports[0]}',
+        )
+        self.thread.start()
+
+    def join(self) -> None:
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def stop(self) -> None:
+        self.running = False
+
+    def run(self, duration: Optional[float] = None) -> None:
+        '''制御プログラムの接続を待ち、シミュレーションを実行する。
+
+        Args:
+            duration: シミュレーション時間（単位はs）。Noneの場合は制御プログラムが応答しなくなるまで実行する。
+        '''
+        sock = self.sock
+        end_time = round(duration * 1_000_000) if duration is not None else None
+
+        try:
+            # 制御プログラムからの接続を待つ
+            sock.settimeout(self.timeout)
+            _, address = sock.recvfrom(1024)
+            address = (address[0], self.ports[1])
+
+            sock.setblocking(False)
+            selector = selectors.DefaultSelector()
+            selector.register(sock, selectors.EVENT_READ)
+
+            # 接続の応答として最初のパケットを送信する
+            self.running = True
+            self._send(address)
+
+            try:
+                if self.rate is None:
+                    self._run_lockstep(selector, address, end_time)
+                else:
+                    self._run_realtime(selector, address, end_time)
+            finally:
+                selector.close()
+        except socket.timeout:
+            pass
+        finally:
+            self.running = False
+            sock.close()
+
+    def _run_lockstep(
+        self,
+        selector: selectors.BaseSelector,
+        address: Tuple[str, int],
+        end_time: Optional[int],
+    ) -> None:
+        slot = -1
+
+        while self.running and (end_time is None or self.time < end_time):
+            self._advance()
+            self._send(address)
+
+            # 新しい周期のパケットに対する制御プログラムの応答を待つ
+            if (self.time // self.interval) != slot:
+                slot = self.time // self.interval
+                if not self._receive(selector, self.timeout, self.time):
+                    break
+
+    def _run_realtime(
+        self,
+        selector: selectors.BaseSelector,
+        address: Tuple[str, int],
+        end_time: Optional[int],
+    ) -> None:
+        period = self.step / 1_000_000 / (self.rate or 1.0)
+        next_clock = time.perf_counter()
+        reply_clock = next_clock
+
+        while self.running and (end_time is None or self.time < end_time):
+            self._advance()
+            self._send(address)
+            next_clock += period
+
+            # 次のパケットの送信時刻まで応答を受信する
+            while True:
+                timeout = next_clock - time.perf_counter()
+                if timeout <= 0:
+                    break
+
+                if self._receive(selector, timeout, None):
+                    reply_clock = time.perf_counter()
+
+            if time.perf_counter() - reply_clock > self.timeout:
+                break
+
+    def _advance(self) -> None:
+        self.time += self.step
+        self.model.step(self.step / 1_000_000)
+
+    def _send(self, address: Tuple[str, int]) -> None:
+        model = self.model
+        coverage = self.line_map.get_coverage(*model.get_sensor_position())
+        brightness = int(round(_WHITE_BRIGHTNESS + (_BLACK_BRIGHTNESS - _WHITE_BRIGHTNESS) * coverage))
+        raw = brightness * 255 // 100
+        distance = self.line_map.get_wall_distance(model.x, model.y, model.heading)
+
+        values = {
+            'time': self.time,
+            'button': 0,
+            'ambient': 0,
+            'color_number': _BLACK_COLOR_NUMBER if coverage >= 0.5 else _WHITE_COLOR_NUMBER,
+            'brightness': brightness,
+            'red': raw,
+            'green': raw,
+            'blue': raw,
+            'gyro_angle': model.get_gyro_angle(),
+            'gyro_velocity': model.get_gyro_velocity(),
+            'sonar_distance': min(int(distance * 100), 255),
+            'sonar_listen': 0,
+            'touch': 0,
+            'motor_count0': model.get_count(0),
+            'motor_count1': model.get_count(1),
+            'motor_count2': model.get_count(2),
+            'motor_count3': model.get_count(3),
+        }
+
+        # ヘッダはパディングで上書きされるため、センサの値の後に書き込む
+        _RECV_STRUCT.pack_into(self.send_data, 0, *[values[name] for name in _RECV_FIELDS])
+        struct.pack_into('<4sI', self.send_data, 0, b'ETTX', 1)
+        self.sock.sendto(self.send_data, address)
+        self.packets += 1
+
+    def _receive(
+        self,
+        selector: selectors.BaseSelector,
+        timeout: float,
+        wait_time: Optional[int],
+    ) -> bool:
+        '''制御プログラムの応答を受信してモータの出力などに反映する。
+
+        Args:
+            selector: ソケットを監視するセレクタ。
+            timeout: 待機する時間（単位はs）。
+            wait_time: 指定した場合は、この時刻以降のパケットに対する応答を受信するまで待機する。
+
+        Returns:
+            応答を受信した場合はTrue。
+        '''
+        deadline = time.perf_counter() + timeout
+        received = False
+
+        while self.running:
+            while True:
+                try:
+                    self.sock.recv_into(self.recv_data)
+                except BlockingIOError:
+                    break
+
+                self._apply()
+                received = True
+
+                reply_time = _REPLY_TIME_STRUCT.unpack_from(self.recv_data, _REPLY_TIME_OFFSET)[0]
+                if wait_time is not None and reply_time >= wait_time:
+                    wait_time = None
+
+            if received and wait_time is None:
+                return True
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or len(selector.select(remaining)) == 0:
+                return received and wait_time is None
+
+        return False
+
+    def _apply(self) -> None:
+        values = _ACTUATOR_STRUCT.unpack_from(self.recv_data, _ACTUATOR_OFFSET)
+        model = self.model
+        self.led = values[0]
+        self.replies += 1
+
+        for port in range(4):
+            model.pwms[port] = min(max(values[1 + port], -100), 100)
+            model.brakes[port] = values[5 + port]
+
+            if values[9 + port] != 0:
+                model.reset_count(port)
+
+        if values[13] != 0:
+            model.reset_gyro()
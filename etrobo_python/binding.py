@@ -0,0 +1,118 @@
+try:
+    from typing import Any, Callable, Dict, List, Optional, Tuple  # noqa
+except BaseException:
+    pass
+
+
+def _get_callable_name(handler: 'Callable[..., Any]') -> str:
+    if hasattr(handler, '__name__'):
+        return handler.__name__
+    else:
+        return handler.__class__.__name__
+
+
+def get_handler_parameters(
+    handler: 'Callable[..., Any]',
+    names: 'List[str]',
+    skip: int = 0,
+) -> 'Optional[Tuple[List[str], List[str], bool]]':
+    '''制御ハンドラの引数を調べ、制御ハンドラに渡すデバイスの名前を取得する。
+    デバイスの名前と一致しない引数は、デフォルト値が指定されている場合に限り無視される。
+
+    Args:
+        handler: 制御ハンドラ。
+        names: 登録されているデバイスの名前のリスト。
+        skip: デバイス以外の値を渡す先頭の引数の数。
+
+    Returns:
+        位置引数として渡すデバイスの名前のリスト、キーワード引数として渡すデバイスの名前のリスト、
+        可変長キーワード引数（**kwargs）を受け取るかどうか、のタプル。
+        引数を調べられない場合（micropythonなど）はNone。
+    '''
+    try:
+        import inspect
+        parameters = list(inspect.signature(handler).parameters.values())
+    except BaseException:
+        return None
+
+    positional = []  # type: List[str]
+    keywords = []  # type: List[str]
+    var_keyword = False
+    omitted = False
+
+    for parameter in parameters[skip:]:
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            continue
+        elif parameter.kind == parameter.VAR_KEYWORD:
+            var_keyword = True
+            continue
+
+        if parameter.name not in names:
+            if parameter.default is parameter.empty:
+                raise ValueError(
+                    'Unknown device name in handler arguments: {} (handler={}, devices={})'.format(
+                        parameter.name, _get_callable_name(handler), ', '.join(names)))
+
+            omitted = True
+            continue
+
+        # 省略した引数より後ろの引数はキーワード引数として渡す
+        if parameter.kind == parameter.KEYWORD_ONLY or omitted:
+            if parameter.kind == parameter.POSITIONAL_ONLY:
+                raise ValueError(
+                    'Positional-only handler arguments cannot follow an omitted argument: '
+                    '{} (handler={})'.format(parameter.name, _get_callable_name(handler)))
+
+            keywords.append(parameter.name)
+        else:
+            positional.append(parameter.name)
+
+    return positional, keywords, var_keyword
+
+
+def bind_handler(
+    handler: 'Callable[..., Any]',
+    variables: 'Dict[str, Any]',
+    skip: int = 0,
+) -> 'Tuple[Callable[..., Any], Tuple[Any, ...]]':
+    '''制御ハンドラが受け取るデバイスだけを渡すように、制御ハンドラと引数を事前に組み立てる。
+    戻り値の関数を `function(*arguments)` として実行すると、制御ハンドラが実行される。
+
+    Args:
+        handler: 制御ハンドラ。
+        variables: デバイスの名前をキーとする辞書。
+        skip: デバイス以外の値を渡す先頭の引数の数（戻り値の関数の先頭の引数として渡すこと）。
+
+    Returns:
+        実行する関数と位置引数のタプル。
+    '''
+    parameters = get_handler_parameters(handler, list(variables.keys()), skip=skip)
+
+    # 引数を調べられない場合は、すべてのデバイスをキーワード引数として渡す
+    if parameters is None:
+        return _partial(handler, variables), ()
+
+    positional, keywords, var_keyword = parameters
+    arguments = tuple(variables[name] for name in positional)
+
+    if var_keyword:
+        keywords = [name for name in variables.keys() if name not in positional]
+
+    if len(keywords) == 0:
+        return handler, arguments
+
+    return _partial(handler, {name: variables[name] for name in keywords}), arguments
+
+
+def _partial(
+    handler: 'Callable[..., Any]',
+    keywords: 'Dict[str, Any]',
+) -> 'Callable[..., Any]':
+    try:
+        from functools import partial
+        return partial(handler, **keywords)
+    except ImportError:
+        def function(*args: Any) -> Any:
+            return handler(*args, **keywords)
+
+        return function
@@ -0,0 +1,268 @@
+from .stats import DispatchStats
+
+try:
+    from typing import Any, Dict, List, Optional, Tuple  # noqa
+except BaseException:
+    pass
+
+
+GC_MODES = ('freeze', 'idle', 'trace')
+
+# 空き時間のガベージコレクションを実行する条件（周期に対する実行時間の割合）
+_IDLE_RATIO = 0.5
+
+# gc.get_count()が使用できない環境（micropython）で空き時間のガベージコレクションを実行する間隔（周期の数）
+_IDLE_TICKS = 100
+
+
+class GarbageCollector(object):
+    '''制御プログラムの実行中のガベージコレクションを制御するクラス。
+    ETRobo.dispatch()の引数 `gc_mode` に以下のいずれかを指定した場合に使用される。
+
+    - freeze: 最初の周期の前に全てのオブジェクトを回収・凍結し（gc.freeze()）、自動的な回収を停止する。
+    - idle: freezeと同じ処理を行い、周期の空き時間に若い世代のオブジェクトを回収する。
+    - trace: freezeと同じ処理を行い、周期ごとのメモリ割り当て量をtracemallocで計測する（試験用）。
+
+    idleの場合、制御ハンドラの実行時間が周期の半分未満で、
+    割り当てられたオブジェクトの数がgcの閾値を超えている周期にだけ回収を行う。
+
+    Args:
+        mode: ガベージコレクションの制御方法。
+        interval: 周期（単位は秒）。
+        stats: 回収の回数と時間を記録するオブジェクト。
+    '''
+
+    def __init__(
+        self,
+        mode: str,
+        interval: float,
+        stats: 'Optional[DispatchStats]' = None,
+    ) -> None:
+        import gc
+
+        if mode not in GC_MODES:
+            raise ValueError('Invalid gc mode: {}'.format(mode))
+
+        self.gc = gc
+        self.mode = mode
+        self.idle_time = int(interval * _IDLE_RATIO * 1000000000)
+        self.stats = stats
+        self.tracer = AllocationTracer() if mode == 'trace' else None
+
+        self.ticks = 0
+        self.collections = 0
+        self.deferred = 0
+
+        if stats is not None and mode == 'idle':
+            self.histogram = stats.get_histogram('gc_idle')
+
+    def start(self) -> None:
+        '''オブジェクトを回収して凍結し、自動的な回収を停止する（最初の周期の前に実行する）。
+        '''
+        gc = self.gc
+        gc.collect()
+
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        gc.disable()
+
+        if self.tracer is not None:
+            self.tracer.start()
+
+    def begin_tick(self) -> None:
+        '''周期の処理を開始する。
+        '''
+        if self.tracer is not None:
+            self.tracer.begin_tick()
+
+    def end_tick(self, elapsed: int, clock: 'Any') -> None:
+        '''周期の処理を終了し、空き時間があればオブジェクトを回収する。
+
+        Args:
+            elapsed: 周期の処理にかかった時間（単位はナノ秒）。
+            clock: 時刻を取得する関数（単位はナノ秒）。
+        '''
+        if self.tracer is not None:
+            self.tracer.end_tick()
+            return
+
+        if self.mode != 'idle':
+            return
+
+        gc = self.gc
+        self.ticks += 1
+
+        # 回収するべきオブジェクトがあるかを調べる
+        if hasattr(gc, 'get_count'):
+            count = gc.get_count()
+            threshold = gc.get_threshold()
+            if count[0] < threshold[0]:
+                return
+
+            generation = 1 if count[1] >= threshold[1] else 0
+        elif self.ticks % _IDLE_TICKS == 0:
+            generation = -1
+        else:
+            return
+
+        # 空き時間が足りない場合は次の周期に延期する
+        if elapsed >= self.idle_time:
+            self.deferred += 1
+            if self.stats is not None:
+                self.stats.count('gc:deferred')
+            return
+
+        start_time = clock()
+
+        if generation >= 0:
+            gc.collect(generation)
+        else:
+            gc.collect()
+
+        self.collections += 1
+
+        if self.stats is not None:
+            self.histogram.add((clock() - start_time) // 1000)
+            self.stats.count('gc:idle_collections')
+
+    def stop(self) -> None:
+        '''自動的な回収を再開し、凍結したオブジェクトを元に戻す。
+        '''
+        if self.tracer is not None:
+            self.tracer.stop()
+
+            if self.stats is not None:
+                for name, value in self.tracer.get_counters().items():
+                    self.stats.count(name, value)
+
+            print(self.tracer.format_report())
+
+        gc = self.gc
+        gc.enable()
+
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+
+
+class AllocationTracer(object):
+    '''周期ごとのメモリ割り当て量をtracemallocで計測するクラス（試験用）。
+    周期の中で一時的に割り当てられたメモリの最大量（peak）と、周期の終了時に残っているメモリの増加量（net）を記録する。
+    最初の周期（準備のための割り当てを含む）は集計に含めない。
+    tracemalloc.reset_peak()がない環境（Python 3.8以前）では周期の中の最大量を計測できないため、
+    peakには周期の開始時と終了時の割り当て量の差を記録する。
+
+    Args:
+        frames: 割り当て箇所として記録するスタックフレームの数。
+        top: 報告する割り当て箇所の数。
+    '''
+
+    def __init__(self, frames: int = 1, top: int = 10) -> None:
+        self.frames = frames
+        self.top = top
+        self.tracemalloc = None  # type: Any
+        self.snapshot = None  # type: Any
+        self.statistics = []  # type: List[Any]
+
+        self.ticks = 0
+        self.free_ticks = 0
+        self.total_peak = 0
+        self.max_peak = 0
+        self.total_net = 0
+        self.start_memory = 0
+        self.reset_peak = False
+
+    def start(self) -> None:
+        '''計測を開始する。
+        '''
+        import tracemalloc
+
+        self.tracemalloc = tracemalloc
+        self.reset_peak = hasattr(tracemalloc, 'reset_peak')
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def begin_tick(self) -> None:
+        tracemalloc = self.tracemalloc
+        if self.reset_peak:
+            tracemalloc.reset_peak()
+        self.start_memory = tracemalloc.get_traced_memory()[0]
+
+    def end_tick(self) -> None:
+        current, peak = self.tracemalloc.get_traced_memory()
+
+        # 最初の周期の終了時のメモリの状態を基準とする
+        if self.snapshot is None:
+            self.snapshot = self.tracemalloc.take_snapshot()
+            return
+
+        # reset_peak()がない場合は周期の開始時からの差を最大量とする
+        if self.reset_peak:
+            peak -= self.start_memory
+        else:
+            peak = max(current - self.start_memory, 0)
+
+        self.ticks += 1
+        self.total_peak += peak
+        self.total_net += current - self.start_memory
+
+        if peak > self.max_peak:
+            self.max_peak = peak
+
+        if peak == 0:
+            self.free_ticks += 1
+
+    def stop(self) -> None:
+        '''計測を終了し、最初の周期からメモリが増加した箇所を集計する。
+        '''
+        if self.tracemalloc is None:
+            return
+
+        if self.snapshot is not None:
+            snapshot = self.tracemalloc.take_snapshot().filter_traces((
+                self.tracemalloc.Filter(False, self.tracemalloc.__file__),
+                self.tracemalloc.Filter(False, __file__),
+            ))
+            self.statistics = [
+                s for s in snapshot.compare_to(self.snapshot, 'lineno')
+                if s.size_diff > 0][:self.top]
+
+        self.tracemalloc.stop()
+        self.tracemalloc = None
+
+    def get_counters(self) -> 'Dict[str, int]':
+        '''計測結果をカウンタの形式で取得する。
+
+        Returns:
+            alloc:ticks（計測した周期の数）, alloc:free_ticks（メモリを割り当てなかった周期の数）,
+            alloc:mean_peak_bytes, alloc:max_peak_bytes（周期ごとの一時的な割り当て量の平均と最大値）,
+            alloc:mean_net_bytes（周期ごとのメモリの増加量の平均）の辞書。
+        '''
+        ticks = max(self.ticks, 1)
+        return {
+            'alloc:ticks': self.ticks,
+            'alloc:free_ticks': self.free_ticks,
+            'alloc:mean_peak_bytes': self.total_peak // ticks,
+            'alloc:max_peak_bytes': self.max_peak,
+            'alloc:mean_net_bytes': self.total_net // ticks,
+        }
+
+    def format_report(self) -> str:
+        '''計測結果を文字列として取得する。
+
+        Returns:
+            計測結果の文字列。
+        '''
+        ticks = max(self.ticks, 1)
+        lines = [
+            'allocations per tick: ticks={} allocation_free={} peak(mean)={:.1f}B '
+            'peak(max)={}B net(mean)={:.1f}B'.format(
+                self.ticks, self.free_ticks, self.total_peak / ticks,
+                self.max_peak, self.total_net / ticks)]
+
+        for statistic in self.statistics:
+            frame = statistic.traceback[0]
+            lines.append('  {}:{}: +{}B (+{} blocks)'.format(
+                frame.filename, frame.lineno, statistic.size_diff, statistic.count_diff))
+
+        return '\n'.join(lines)
@@ -0,0 +1,162 @@
+try:
+    from typing import Any, Callable, Dict, List, Optional, Tuple  # noqa
+except BaseException:
+    pass
+
+
+# 実行中のイベントループと、そのイベントループを実行しているTickLoopの対応
+_TICK_LOOPS = {}  # type: Dict[Any, TickLoop]
+
+
+def is_coroutine_handler(handler: 'Callable[..., Any]') -> bool:
+    '''制御ハンドラがコルーチン関数（async def）かどうかを判定する。
+
+    Args:
+        handler: 制御ハンドラ。
+
+    Returns:
+        コルーチン関数の場合（__call__がコルーチン関数である場合を含む）はTrue。
+    '''
+    try:
+        import inspect
+    except ImportError:
+        return False
+
+    return (
+        inspect.iscoroutinefunction(handler)
+        or inspect.iscoroutinefunction(getattr(handler, '__call__', None)))
+
+
+class TickLoop(object):
+    '''コルーチンの制御ハンドラを制御周期に同期して実行するイベントループ。
+    asyncioのイベントループを周期ごとに1回だけ進めるため、別のスレッドは使用しない。
+
+    コルーチンの中で `await next_tick()` を実行すると次の周期まで、
+    `await sleep(t)` を実行するとt秒後の周期まで待機する。
+    sleep(t)の待機時間は実時間ではなく周期（tick）の数で数えられ、t / interval を切り上げた数の周期の後に再開される。
+    バックエンドは周期を飛ばした場合に経過した周期の数（step()の引数 `elapsed`）を渡すため、
+    処理が周期を超過しても、再開される周期は予定した時刻の周期からずれない。
+    asyncioの関数（asyncio.gather、asyncio.Eventなど）も使用できるが、
+    asyncio.sleep()のように実時間で待機する関数は、待機が完了した後の周期で再開される。
+
+    Args:
+        interval: 周期（単位は秒）。
+    '''
+
+    def __init__(self, interval: float) -> None:
+        import asyncio
+
+        self.interval = interval
+        self.loop = asyncio.new_event_loop()
+        self.tasks = []  # type: List[Any]
+        self.waiters = []  # type: List[Tuple[int, int, Any]]
+        self.tick = 0
+        self.sequence = 0
+
+    def add(self, function: 'Callable[..., Any]', arguments: 'Tuple[Any, ...]') -> None:
+        '''コルーチンの制御ハンドラを登録する。最初の周期に実行が開始される。
+
+        Args:
+            function: コルーチン関数。
+            arguments: コルーチン関数に渡す引数。
+        '''
+        self.tasks.append(self.loop.create_task(function(*arguments)))
+
+    def step(self, elapsed: int = 1) -> None:
+        '''イベントループを1周期分だけ進める。
+
+        Args:
+            elapsed: 前回の実行から経過した周期の数。
+        '''
+        import heapq
+
+        self.tick += elapsed
+
+        # 待機時間が経過したコルーチンを再開する
+        while len(self.waiters) > 0 and self.waiters[0][0] <= self.tick:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+
+        _TICK_LOOPS[self.loop] = self
+
+        try:
+            self.loop.call_soon(self.loop.stop)
+            self.loop.run_forever()
+        finally:
+            del _TICK_LOOPS[self.loop]
+
+        # コルーチンで発生した例外は制御ループで送出する
+        for task in self.tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+        self.tasks = [task for task in self.tasks if not task.done()]
+
+    def wait(self, ticks: int) -> Any:
+        '''指定した数の周期が経過した後に完了するFutureを作成する。
+
+        Args:
+            ticks: 待機する周期の数（1以上）。
+
+        Returns:
+            asyncio.Future。
+        '''
+        import heapq
+
+        future = self.loop.create_future()
+        self.sequence += 1
+        heapq.heappush(self.waiters, (self.tick + max(ticks, 1), self.sequence, future))
+        return future
+
+    def close(self) -> None:
+        '''実行中のコルーチンを中断し、イベントループを閉じる。
+        '''
+        for task in self.tasks:
+            task.cancel()
+
+        if len(self.tasks) > 0:
+            self.loop.call_soon(self.loop.stop)
+            self.loop.run_forever()
+
+        self.tasks = []
+        self.loop.close()
+
+
+def _get_tick_loop() -> TickLoop:
+    import asyncio
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    tick_loop = _TICK_LOOPS.get(loop)
+    if tick_loop is None:
+        raise Exception('next_tick() and sleep() must be awaited in a coroutine handler.')
+
+    return tick_loop
+
+
+def next_tick() -> Any:
+    '''次の周期まで待機する（`await next_tick()` として使用する）。
+
+    Returns:
+        次の周期に完了するasyncio.Future。
+    '''
+    return _get_tick_loop().wait(1)
+
+
+def sleep(seconds: float) -> Any:
+    '''指定した時間が経過した後の周期まで待機する（`await sleep(seconds)` として使用する）。
+    待機時間は周期の数に切り上げられる（0以下の場合は次の周期まで待機する）。
+
+    Args:
+        seconds: 待機時間（単位は秒）。
+
+    Returns:
+        待機時間が経過した後の周期に完了するasyncio.Future。
+    '''
+    tick_loop = _get_tick_loop()
+    ticks = seconds / tick_loop.interval
+    return tick_loop.wait(int(ticks) + (1 if ticks - int(ticks) > 1e-9 else 0))
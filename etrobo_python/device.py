@@ -5,9 +5,31 @@ except BaseException:
 
 
 class Device(object):
-    def get_log(self) -> bytes:
+    def get_log_values(self) -> Tuple[int, ...]:
+        '''ログファイルに記録する値を返す。
+        値の並びと型はデバイスタイプごとにlogモジュールで定義されたフィールドに従う。
+
+        get_log()だけを実装した（以前のバージョンの）サブクラスでは、get_log()のバイト列を展開した値を返す。
+
+        Returns:
+            ログファイルに記録する値のタプル。
+        '''
+        if type(self).get_log is not Device.get_log:
+            from .log import _get_codec
+            return tuple(_get_codec(self).struct.unpack(self.get_log()))
+
         raise NotImplementedError()
 
+    def get_log(self) -> bytes:
+        '''ログファイルに記録するバイト列を返す（互換性のためのメソッド）。
+        get_log_values()の値をlogモジュールで定義されたフィールドの形式に変換する。
+
+        Returns:
+            ログファイルに記録するバイト列。
+        '''
+        from .log import _get_codec
+        return _get_codec(self).struct.pack(*self.get_log_values())
+
 
 class Hub(Device):
     '''Hubの状態を取得し、LEDやスピーカーなどのデバイスを制御するためのクラス。
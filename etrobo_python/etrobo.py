@@ -1,8 +1,11 @@
 from typing import Optional
+from .binding import get_handler_parameters
+from .coroutine import is_coroutine_handler
 from .device import Device
+from .stats import DispatchStats
 
 try:
-    from typing import Any, Callable, List, Tuple, Type, Union  # noqa
+    from typing import Any, Callable, Dict, List, Tuple, Type, Union  # noqa
 except BaseException:
     pass
 
@@ -28,6 +31,19 @@ class ETRobo:
     - raspike: pythonを使ったRasPikeロボットの制御（公式のmain.pyを使用する場合）
     - raspyke: pythonを使ったRasPikeロボットの制御（非公式のmain.pyを使用する場合）
     - raspike_art: pythonを使ったRasPike-ARTロボットの制御
+    - replay: ログファイルに記録されたセンサの値を使った制御ハンドラの実行（回帰テストや性能測定用）
+
+    上記以外に、外部のパッケージがエントリポイント（グループ名は `etrobo_python.backends`）で登録したバックエンドや、
+    `etrobo_python.backends.register_backend()` で登録したバックエンドも指定できる。
+
+    simulatorを指定した場合は、dispatch()の引数 `engine` に通信の方法を指定できる。
+    'thread'（デフォルト）は受信スレッドと計算スレッドを使用し、
+    'selector'は1つのスレッドで受信済みのパケットのうち最新のものだけを使用して制御ハンドラを実行する。
+
+    replayを指定した場合は、dispatch()の引数 `replayfile` に再生するログファイルのパスを指定する。
+    デバイスはログファイルに記録された変数名で対応付けられ、フレームごとに記録された値が返される。
+    引数 `speed` には再生速度（1.0で記録時と同じ速度、0で待機せずに実行）を指定できる。
+    引数 `resultfile` を指定した場合は、モータの出力などの命令がCSVファイルに記録される。
 
     **プログラム例**
 
@@ -51,32 +67,36 @@ class ETRobo:
         etrobo.add_handler(motor_handler)
         etrobo.dispatch()
 
+    シミュレータでは、ETRoboごとにUnityとの接続が作成されるため、
+    複数のETRoboをdispatch_all()で同時に実行することで1つのプロセスで複数のロボットを制御できる。
+
     Args:
         backend: バックエンドプログラムの名前
+        name: ロボットの名前（複数のロボットを実行する場合に統計量の表示などで使用される）
     '''
 
-    def __init__(self, backend: str) -> None:
-        if backend == 'simulator':
-            from .backends import simulator
-            self.backend = simulator  # type: Any
-        elif backend == 'pybricks':
-            from .backends import pybricks
-            self.backend = pybricks
-        elif backend == 'raspike':
-            from .backends import raspike
-            self.backend = raspike
-        elif backend == 'raspyke':
-            from .backends import raspyke
-            self.backend = raspyke
-        elif backend == 'raspike_art':
-            from .backends import raspike_art
-            self.backend = raspike_art
+    def __init__(self, backend: str, name: Optional[str] = None) -> None:
+        from .backends import load_backend
+        self.backend = load_backend(backend)  # type: Any
+        self.name = name
+
+        # バックエンドがcreate_context()を持つ場合は、ロボットごとの状態（シミュレータとの接続など）を作成し、
+        # create_device()とcreate_dispatcher()に引数contextとして渡す
+        if hasattr(self.backend, 'create_context'):
+            self.context = self.backend.create_context()  # type: Any
         else:
-            raise NotImplementedError(
-                'Unsupported backend: {}'.format(backend))
+            self.context = None
+
+        # 実行中のディスパッチャ（stop()で使用する）
+        self.dispatcher = None  # type: Any
 
         self.devices = []  # type: List[Tuple[str, Any]]
         self.handlers = []  # type: List[Callable[..., None]]
+        self.handler_intervals = []  # type: List[Optional[float]]
+
+        # dispatch(stats=True)の場合に実行時間を記録するオブジェクト
+        # 実行中に別のスレッドから self.stats.get_report() で統計量を取得できる
+        self.stats = DispatchStats()
 
     def add_hub(self, name: str) -> 'ETRobo':
         '''制御対象としてHubを登録する。
@@ -88,7 +108,7 @@ class ETRobo:
         Returns:
             このオブジェクト
         '''
-        device = self.backend.create_device('hub', '')
+        device = self._create_device('hub', '')
         self.devices.append((name, device))
         return self
 
@@ -122,43 +142,294 @@ class ETRobo:
             device_type = device_type.__name__
 
         device_type = _pascal2snake(device_type)
-        device = self.backend.create_device(device_type, str(port))
+        device = self._create_device(device_type, str(port))
         self.devices.append((name, device))
         return self
 
-    def add_handler(self, handler: Callable[..., None]) -> 'ETRobo':
+    def _create_device(self, device_type: str, port: str) -> Any:
+        if self.context is None:
+            return self.backend.create_device(device_type, port)
+        else:
+            return self.backend.create_device(device_type, port, context=self.context)
+
+    def add_handler(
+        self,
+        handler: Callable[..., None],
+        interval: Optional[float] = None,
+    ) -> 'ETRobo':
         '''制御ハンドラを登録する。
         ここで登録された制御ハンドラは、制御プログラムの実行開始後に指定された間隔で実行される。
 
+        `interval` を指定した場合、制御ハンドラはdispatch()で指定した実行間隔の倍数の間隔で実行される
+        （intervalはdispatch()の実行間隔の整数倍であること）。
+        同じ周期に実行される制御ハンドラは、登録された順番で実行される。
+
+        制御ハンドラには、引数名と同じ名前のデバイスだけが渡される。
+        デフォルト値を持たない引数の名前はこのメソッドの実行時に登録済みのデバイスと照合され、
+        一致するデバイスがない場合はValueErrorが送出される（デフォルト値を持つ引数は省略される）。
+        そのため、add_hub()とadd_device()でデバイスをすべて登録してから制御ハンドラを登録すること。
+        `**kwargs` を受け取る制御ハンドラには、引数名で指定されていないすべてのデバイスが渡される。
+
+        .. code-block:: python
+
+            etrobo = (ETRobo(backend='simulator')
+                      .add_device('right_motor', device_type=Motor, port='B')
+                      .add_handler(handler))  # handlerの引数にはright_motorを指定できる
+
+        コルーチン関数（async def）を制御ハンドラとして登録することもできる。
+        コルーチンは制御プログラムの実行開始時に1回だけ開始され、
+        `await etrobo.next_tick()` や `await etrobo.sleep(t)` で周期の境界まで待機しながら実行される
+        （コルーチンの制御ハンドラには `interval` を指定できない）。
+
+        .. code-block:: python
+
+            async def behavior(right_motor: Motor, left_motor: Motor, touch_sensor: TouchSensor) -> None:
+                while not touch_sensor.is_pressed():
+                    right_motor.set_power(50)
+                    left_motor.set_power(50)
+                    await etrobo.next_tick()
+
+                right_motor.set_power(0)
+                left_motor.set_power(0)
+                await etrobo.sleep(0.5)
+
+                right_motor.set_power(50)
+                left_motor.set_power(-50)
+
         Args:
             handler: 制御ハンドラ
+            interval: 制御ハンドラの実行間隔（単位は秒）。Noneの場合はdispatch()の実行間隔。
 
         Returns:
             このオブジェクト
         '''
+        if interval is not None and interval <= 0:
+            raise ValueError('Invalid handler interval: {}'.format(interval))
+
+        get_handler_parameters(handler, [name for name, _ in self.devices])
+
+        if interval is not None and is_coroutine_handler(handler):
+            raise ValueError('Coroutine handlers cannot have an interval.')
+
         self.handlers.append(handler)
+        self.handler_intervals.append(interval)
         return self
 
+    def add_offloaded_handler(
+        self,
+        worker: Callable[[Dict[str, Tuple[int, ...]]], Any],
+        apply: Callable[..., None],
+        mode: str = 'thread',
+        interval: Optional[float] = None,
+    ) -> 'ETRobo':
+        '''別のスレッドまたはプロセスで実行する制御ハンドラを登録する。
+        画像処理や経路計画などの実行時間の長い処理を制御周期から切り離すために使用する。
+
+        `worker` はデバイス名をキー、デバイスの値（ログに記録される値）を値とする辞書を受け取り、
+        計算結果を返す関数であり、ワーカ（スレッドまたはプロセス）で実行される。
+        `apply` は計算結果（第1引数）と引数名で指定したデバイスを受け取る関数であり、制御周期の中で実行される。
+        制御周期は `worker` の完了を待機せず、その時点で得られている最新の計算結果を `apply` に渡す。
+
+        登録した制御ハンドラ（OffloadedHandler）は、このオブジェクトの `handlers` から取得でき、
+        `staleness` 属性から反映した計算結果の古さ（周期の数）を取得できる。
+
+        Args:
+            worker: ワーカで実行する関数
+            apply: 計算結果をデバイスに反映する関数
+            mode: ワーカの種類（'thread'または'process'）
+            interval: 制御ハンドラの実行間隔（単位は秒）。Noneの場合はdispatch()の実行間隔。
+
+        Returns:
+            このオブジェクト
+        '''
+        from .offload import OffloadedHandler
+        get_handler_parameters(apply, [name for name, _ in self.devices], skip=1)
+        return self.add_handler(OffloadedHandler(worker, apply, mode=mode), interval=interval)
+
+    def next_tick(self) -> Any:
+        '''コルーチンの制御ハンドラの中で、次の周期まで待機する（`await etrobo.next_tick()`）。
+
+        Returns:
+            次の周期に完了するasyncio.Future
+        '''
+        from .coroutine import next_tick
+        return next_tick()
+
+    def sleep(self, seconds: float) -> Any:
+        '''コルーチンの制御ハンドラの中で、指定した時間が経過した後の周期まで待機する（`await etrobo.sleep(t)`）。
+        待機時間は周期の数に切り上げられ、実時間ではなく周期の数で数えられる。
+
+        Args:
+            seconds: 待機時間（単位は秒）
+
+        Returns:
+            待機時間が経過した後の周期に完了するasyncio.Future
+        '''
+        from .coroutine import sleep
+        return sleep(seconds)
+
+    def _get_divisors(self, interval: float) -> List[int]:
+        '''制御ハンドラごとの実行間隔を基本周期の倍数に変換する。
+        '''
+        divisors = []
+
+        for handler_interval in self.handler_intervals:
+            if handler_interval is None:
+                divisors.append(1)
+                continue
+
+            divisor = int(round(handler_interval / interval))
+            if divisor < 1 or abs(divisor * interval - handler_interval) > interval * 1e-6:
+                raise ValueError(
+                    'Handler interval must be a multiple of the dispatch interval: '
+                    '{} (interval={})'.format(handler_interval, interval))
+
+            divisors.append(divisor)
+
+        return divisors
+
     def dispatch(
         self,
         interval: float = 0.01,
         logfile: Optional[str] = None,
+        log_options: Optional[Dict[str, Any]] = None,
+        stats: bool = False,
+        snapshot: bool = False,
+        realtime: Optional[Dict[str, Any]] = None,
+        gc_mode: Optional[str] = None,
         **kwargs: Any,
     ) -> 'ETRobo':
         '''制御プログラムを実行する。
+        `stats` にTrueを指定した場合は、制御ハンドラごとの実行時間、実行開始時刻のずれ、
+        ログの書き込み時間、通信時間を記録し、終了時にパーセンタイル（p50/p95/p99/max）を表示する。
+
+        `snapshot` にTrueを指定した場合は、センサの値などを取得するメソッドが周期の中で最初に実行されたときだけ
+        値を読み出し、同じ周期の中ではその値を返す（ログの書き込みにもキャッシュした値が使われる）。
+        キャッシュは次の周期の開始時に無効になる。
+
+        `realtime` を指定した場合は、制御ハンドラを実行するスレッドのスケジューリングポリシー（SCHED_FIFO/SCHED_RR）と
+        実行するCPUを設定し、通信スレッドとログの書き込みスレッドを別のCPUで実行する（Linuxのみ）。
+        指定できる値は etrobo_python.realtime.RealtimeSettings を参照すること。
+        権限がないなどの理由で設定に失敗した場合は、メッセージを表示して実行を続ける（strict=Trueの場合は例外を送出する）。
+
+        `gc_mode` を指定した場合は、最初の周期の前にオブジェクトを回収・凍結（gc.freeze()）し、
+        実行中は自動的なガベージコレクションを停止する。
+        'idle'を指定した場合は周期の空き時間に若い世代のオブジェクトを回収し、
+        'trace'を指定した場合は周期ごとのメモリ割り当て量をtracemallocで計測して終了時に表示する（試験用）。
+        いずれの場合も終了時に自動的なガベージコレクションを再開する。
+
         Args:
             interval: 制御ハンドラの実行間隔
             logfile: ログデータを保存するファイルのパス
+            log_options: LogWriterに渡される引数（例: {'buffer_frames': 256}）
+            stats: Trueの場合は実行時間を記録する（記録した値はself.statsから取得できる）
+            snapshot: Trueの場合はデバイスの値を周期ごとにキャッシュする
+            realtime: Linuxの実時間制御の設定（例: {'policy': 'fifo', 'priority': 80, 'cpus': [3]}）
+            gc_mode: ガベージコレクションの制御方法（'freeze', 'idle', 'trace'）
             kwargs: バックエンドプログラムに渡される引数
         Returns:
             このオブジェクト
         '''
-        self.backend.create_dispatcher(
-            devices=self.devices,
-            handlers=self.handlers,
-            interval=interval,
-            logfile=logfile,
-            **kwargs,
-        ).dispatch()
+        if realtime is not None:
+            from .realtime import RealtimeSettings, set_settings
+            set_settings(RealtimeSettings(**realtime))
+
+        if self.context is not None:
+            kwargs['context'] = self.context
+
+        try:
+            self.dispatcher = self.backend.create_dispatcher(
+                devices=self.devices,
+                handlers=self.handlers,
+                interval=interval,
+                logfile=logfile,
+                log_options=log_options,
+                stats=self.stats if stats else None,
+                divisors=self._get_divisors(interval),
+                snapshot=snapshot,
+                gc_mode=gc_mode,
+                **kwargs,
+            )
+            self.dispatcher.dispatch()
+        finally:
+            self.dispatcher = None
+
+            if realtime is not None:
+                set_settings(None)
+
+            if stats:
+                if self.name is not None:
+                    print('[{}]'.format(self.name))
+
+                print(self.stats.format_report())
 
         return self
+
+    def stop(self) -> None:
+        '''実行中の制御プログラムを別のスレッドから停止する（バックエンドが対応している場合のみ）。
+        '''
+        dispatcher = self.dispatcher
+
+        if dispatcher is not None and hasattr(dispatcher, 'stop'):
+            dispatcher.stop()
+
+
+def dispatch_all(robots: 'List[Tuple[ETRobo, Dict[str, Any]]]') -> None:
+    '''複数のロボットの制御プログラムを同時に実行する。
+    ロボットごとにスレッドを作成してdispatch()を実行し、すべてのロボットが終了するまで待機する。
+    統計量（dispatch()の引数 `stats`）はロボットごとに記録・表示される。
+
+    シミュレータの場合は、ロボットごとに異なるポート番号を指定すること
+    （`course` に 'left' と 'right' を指定するか、`ports` に送信先と受信のポート番号を指定する）。
+    `realtime` と `gc_mode` はプロセス全体に適用されるため、指定する場合は1台のロボットだけに指定すること。
+
+    .. code-block:: python
+
+        left = ETRobo(backend='simulator', name='left')
+        right = ETRobo(backend='simulator', name='right')
+        ...
+        dispatch_all([
+            (left, {'course': 'left', 'stats': True}),
+            (right, {'course': 'right', 'stats': True}),
+        ])
+
+    Args:
+        robots: ロボットとdispatch()に渡す引数の辞書のタプルのリスト
+    '''
+    import threading
+
+    errors = []  # type: List[BaseException]
+
+    def run(robot: ETRobo, options: 'Dict[str, Any]') -> None:
+        try:
+            robot.dispatch(**options)
+        except BaseException as e:
+            errors.append(e)
+
+            for other, _ in robots:
+                other.stop()
+
+    threads = [
+        threading.Thread(
+            target=run,
+            args=(robot, options),
+            name='ETRobo_dispatch_{}'.format(robot.name or i))
+        for i, (robot, options) in enumerate(robots)]
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print('Interrupted by keyboard.')
+
+        for robot, _ in robots:
+            robot.stop()
+
+        for thread in threads:
+            thread.join()
+
+    if len(errors) != 0:
+        raise errors[0]
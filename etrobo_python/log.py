@@ -1,70 +1,649 @@
+import os
+import struct
+import time
+
 from etrobo_python.device import (ColorSensor, Device, GyroSensor, Hub, Motor,
                                   SonarSensor, TouchSensor)
+from etrobo_python.scheduler import _NANOSECONDS, _get_clock
 
 try:
-    from pathlib import Path
-    from typing import List, Optional, Tuple, Type, Union
+    from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
     from types import TracebackType
 except BaseException:
     pass
 
 
-def _get_type_name(device: Device) -> str:
-    if isinstance(device, Hub):
-        return 'hub'
-    elif isinstance(device, Motor):
-        return 'motor'
-    elif isinstance(device, ColorSensor):
-        return 'color_sensor'
-    elif isinstance(device, TouchSensor):
-        return 'touch_sensor'
-    elif isinstance(device, SonarSensor):
-        return 'sonar_sensor'
-    elif isinstance(device, GyroSensor):
-        return 'gyro_sensor'
+class _FormatStruct(object):
+    # struct.Structを持たない環境（micropythonのustruct）で使用する代替クラス
+    # モジュールの関数にフォーマット文字列を渡して同じ操作を行う
+    def __init__(self, fmt: str) -> None:
+        self.format = fmt
+        self.size = struct.calcsize(fmt)
+
+    def pack(self, *values: Any) -> bytes:
+        return struct.pack(self.format, *values)
+
+    def pack_into(self, buffer: Any, offset: int, *values: Any) -> None:
+        struct.pack_into(self.format, buffer, offset, *values)
+
+    def unpack(self, buffer: Any) -> Tuple[Any, ...]:
+        return struct.unpack(self.format, buffer)
+
+    def unpack_from(self, buffer: Any, offset: int = 0) -> Tuple[Any, ...]:
+        return struct.unpack_from(self.format, buffer, offset)
+
+
+def _make_struct(fmt: str) -> Any:
+    '''フォーマット文字列からstruct.Struct（使用できない環境では代替のオブジェクト）を作成する。
+    '''
+    if hasattr(struct, 'Struct'):
+        return struct.Struct(fmt)
+    else:
+        return _FormatStruct(fmt)
+
+
+class _LogCodec(object):
+    # デバイスタイプごとのログデータの形式
+    # fieldsは(フィールド名, structのフォーマット文字)のタプルをログデータの並び順で定義する
+    # 値はすべてビッグエンディアンで記録される
+    def __init__(self, device_type: str, device_class: type, fields: Tuple[Tuple[str, str], ...]) -> None:
+        self.device_type = device_type
+        self.device_class = device_class
+        self.fields = fields
+        self.format = '>' + ''.join(fmt for _, fmt in fields)
+        self.size = struct.calcsize(self.format)
+        self.struct = _make_struct(self.format)
+
+
+# デバイスタイプの名前をキーとするログデータの形式
+# LogWriter, LogReader, ログの変換ツールはすべてこの定義を使用する
+_LOG_CODECS = dict((codec.device_type, codec) for codec in (
+    _LogCodec('hub', Hub, (('time', 'I'), ('button', 'B'))),
+    _LogCodec('motor', Motor, (('count', 'i'),)),
+    _LogCodec('color_sensor', ColorSensor, (
+        ('brightness', 'B'), ('ambient', 'B'), ('red', 'B'), ('green', 'B'), ('blue', 'B'))),
+    _LogCodec('touch_sensor', TouchSensor, (('pressed', 'B'),)),
+    _LogCodec('sonar_sensor', SonarSensor, (('distance', 'H'),)),
+    _LogCodec('gyro_sensor', GyroSensor, (('angle', 'h'), ('velocity', 'h'))),
+))
+
+
+# ログファイル（バージョン2）の先頭に置かれる識別子
+_LOG_MAGIC = b'ETRL'
+# ログファイル（バージョン2）の末尾に置かれる識別子
+_FOOTER_MAGIC = b'ETRX'
+# インデックスの要素: Hubの時刻(ms), フレーム番号, フレームの位置
+_INDEX_FORMAT = '>IIQ'
+# フッタ: フレーム数, インデックスの間隔, インデックスの要素数, インデックスの位置, 識別子
+_FOOTER_FORMAT = '>IIIQ4s'
+# 圧縮ブロックのヘッダ: フレーム数, 圧縮後のバイト数
+_BLOCK_FORMAT = '>II'
+# エンコーディングの名前（ヘッダにはこのタプル内の位置が記録される）
+_ENCODINGS = ('raw', 'zlib', 'lzma', 'delta')
+# 差分符号化のエンコーディングの番号
+_DELTA = _ENCODINGS.index('delta')
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required to read log data as arrays.')
+
+    return numpy
+
+
+def _compress(encoding: int, data: Union[bytes, bytearray, memoryview], level: int) -> bytes:
+    if _ENCODINGS[encoding] == 'zlib':
+        import zlib
+        return zlib.compress(bytes(data), level)
+    elif _ENCODINGS[encoding] == 'lzma':
+        import lzma
+        return lzma.compress(bytes(data), preset=level)
     else:
-        raise ValueError('Invalid device class: {}'.format(device.__class__.__name__))
-
-
-def _get_binary_length(device_type: str) -> int:
-    if device_type == 'hub':
-        return 5
-    elif device_type == 'motor':
-        return 4
-    elif device_type == 'color_sensor':
-        return 5
-    elif device_type == 'touch_sensor':
-        return 1
-    elif device_type == 'sonar_sensor':
-        return 2
-    elif device_type == 'gyro_sensor':
-        return 4
+        raise ValueError('Invalid encoding: {}'.format(encoding))
+
+
+def _decompress(encoding: int, data: bytes) -> bytes:
+    if _ENCODINGS[encoding] == 'zlib':
+        import zlib
+        return zlib.decompress(data)
+    elif _ENCODINGS[encoding] == 'lzma':
+        import lzma
+        return lzma.decompress(data)
     else:
-        raise ValueError('Invalid device type: {}'.format(device_type))
+        raise ValueError('Invalid encoding: {}'.format(encoding))
+
+
+def _encode_delta(
+    values: Tuple[int, ...],
+    previous: Tuple[int, ...],
+    output: bytearray,
+) -> None:
+    # 前のフレームとの差分をzigzag符号化し、可変長整数（7ビットずつ）として書き込む
+    for value, prev in zip(values, previous):
+        diff = value - prev
+        code = diff << 1 if diff >= 0 else ((-diff) << 1) - 1
+
+        while code >= 0x80:
+            output.append((code & 0x7f) | 0x80)
+            code >>= 7
+
+        output.append(code)
+
+
+def _decode_delta_frame(data: Union[bytes, bytearray], position: int, values: List[int]) -> int:
+    # 差分符号化された1フレームを読み込んでvaluesを更新し、次のフレームの位置を返す
+    # データが途中で切れている場合はIndexErrorとなる（valuesは更新されない）
+    diffs = []
+
+    for _ in range(len(values)):
+        code = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            code |= (byte & 0x7f) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+
+        diffs.append((code >> 1) ^ -(code & 1))
+
+    for j, diff in enumerate(diffs):
+        values[j] += diff
+
+    return position
+
+
+def _decode_delta(data: bytes, count: int, frame_struct: Any) -> bytearray:
+    # 先頭のキーフレームと後続の差分から、非圧縮のフレームを復元する
+    frame_size = frame_struct.size
+    output = bytearray(count * frame_size)
+    output[:frame_size] = data[:frame_size]
+    values = list(frame_struct.unpack_from(data, 0))
+    position = frame_size
+
+    for i in range(1, count):
+        position = _decode_delta_frame(data, position, values)
+        frame_struct.pack_into(output, i * frame_size, *values)
+
+    return output
+
+
+def _skip_delta(data: bytes, position: int, field_count: int) -> int:
+    # 差分符号化されたフレームを読み飛ばし、次のフレームの位置を返す
+    for _ in range(field_count):
+        while data[position] >= 0x80:
+            position += 1
+        position += 1
+
+    return position
+
+
+def _get_compression_stats(
+    raw_bytes: int,
+    stored_bytes: int,
+    elapsed_time: float,
+) -> Dict[str, float]:
+    return {
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes,
+        'compression_ratio': raw_bytes / stored_bytes if stored_bytes > 0 else 1.0,
+        'elapsed_time': elapsed_time,
+        'throughput': raw_bytes / elapsed_time if elapsed_time > 0 else 0.0,
+    }
+
+
+def _make_header(devices: List[Tuple[str, str]]) -> str:
+    # バージョン2のヘッダ: 変数名:デバイスタイプ:フィールド名=フォーマット;...
+    return ','.join(
+        '{}:{}:{}'.format(name, device_type, ';'.join(
+            '{}={}'.format(field, fmt) for field, fmt in _LOG_CODECS[device_type].fields))
+        for name, device_type in devices)
+
+
+def _parse_header(
+    header: str,
+) -> Tuple[List[Tuple[str, str]], List[Tuple[Tuple[str, str], ...]]]:
+    devices = []
+    fields = []
+
+    for token in header.split(',') if len(header) != 0 else []:
+        name, device_type, schema = token.split(':')
+        devices.append((name, device_type))
+        fields.append(tuple(
+            tuple(item.split('=')) for item in schema.split(';')))
+
+    return devices, fields  # type: ignore
+
+
+def _bisect(key: Callable[[int], int], lower: int, upper: int, value: int) -> int:
+    # key(i) >= value となる最小のiを返す（keyは単調増加であること）
+    while lower < upper:
+        middle = (lower + upper) // 2
+        if key(middle) < value:
+            lower = middle + 1
+        else:
+            upper = middle
+
+    return lower
+
+
+def _get_codec(device: Device) -> _LogCodec:
+    for codec in _LOG_CODECS.values():
+        if isinstance(device, codec.device_class):
+            return codec
+
+    raise ValueError('Invalid device class: {}'.format(device.__class__.__name__))
+
+
+def _get_struct(fields: Tuple[Tuple[str, str], ...]) -> Any:
+    # 登録されたデバイスタイプと同じフィールドであれば、そのstructを使用する
+    for codec in _LOG_CODECS.values():
+        if codec.fields == fields:
+            return codec.struct
+
+    return _make_struct('>' + ''.join(fmt for _, fmt in fields))
 
 
 class LogReader(object):
     '''ログデータをファイルから読み込むためのクラス。
     LogWriterで作成されたログファイルを読み込み、デバイスごとに分割したデータを取得する。
+    バージョン1（ヘッダのみ）とバージョン2（インデックス付き）のどちらのログファイルも読み込める。
+
+    ブロック単位で圧縮されたログファイルの場合は、読み込みに必要なブロックのみを展開する。
+
+    **追従モード**
+
+    `follow` にTrueを指定した場合（またはtail()を実行した場合）、書き込み中のログファイルを読み込む。
+    ファイルの末尾に到達した場合は `poll_interval` 秒ごとにファイルを確認し、
+    新しいフレームが書き込まれるまで待機する。途中まで書き込まれたフレームは破棄せずに保持する。
+    LogWriterがファイルを閉じた（フッタが書き込まれた）場合、
+    または `timeout` 秒の間に新しいデータが書き込まれなかった場合に読み込みを終了する。
 
     ログファイルのフォーマットについては、LogWriterの説明を参照。
 
     Args:
         path: ログファイルのパス
+        follow: Trueの場合は書き込み中のファイルを追従して読み込む。
+        poll_interval: 追従モードでファイルを確認する間隔（単位は秒）。
+        timeout: 追従モードで新しいデータを待機する最大時間（単位は秒）。Noneの場合は待機し続ける。
     '''
 
-    def __init__(self, path: Union[str, Path]) -> None:  # type: ignore
+    def __init__(
+        self,
+        path: 'Union[str, os.PathLike]',
+        follow: bool = False,
+        poll_interval: float = 0.05,
+        timeout: Optional[float] = None,
+    ) -> None:
         self.path = str(path)  # type: ignore
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.timeout = timeout
 
         self.reader = open(self.path, 'rb')
-        size = int.from_bytes(self.reader.read(2), 'big')
 
-        tokens = self.reader.read(size).decode('utf-8').split(',')
-        name_types = [token.split(':') for token in tokens]
-        self.devices = [(name, device_type) for name, device_type in name_types]
+        magic = self._read_header(len(_LOG_MAGIC))
 
-        lengths = [_get_binary_length(device_type) for _, device_type in self.devices]
+        if magic == _LOG_MAGIC:
+            self.version, self.encoding = self._read_header(2)
+            size = int.from_bytes(self._read_header(2), 'big')
+            self.data_offset = len(_LOG_MAGIC) + 4 + size
+            self.devices, self.fields = _parse_header(self._read_header(size).decode('utf-8'))
+        else:
+            self.version, self.encoding = 1, 0
+            size = int.from_bytes(magic[:2], 'big')
+            self.data_offset = 2 + size
+            self.reader.seek(2)
+
+            tokens = self._read_header(size).decode('utf-8').split(',')
+            name_types = [token.split(':') for token in tokens]
+            self.devices = [(name, device_type) for name, device_type in name_types]
+            self.fields = [_LOG_CODECS[device_type].fields for _, device_type in self.devices]
+
+        self.structs = [_get_struct(fields) for fields in self.fields]
+        lengths = [device_struct.size for device_struct in self.structs]
         self.offsets = [sum(lengths[:i]) for i in range(len(lengths) + 1)]
+        self.frame_struct = _make_struct(
+            '>' + ''.join(fmt for fields in self.fields for _, fmt in fields))
+
+        # 差分符号化されたファイルはデータの先頭にキーフレームの間隔が記録されている
+        self.keyframe_interval = 0
+        if self.encoding == _DELTA:
+            self.keyframe_interval = int.from_bytes(self._read_header(4), 'big')
+            self.data_offset += 4
+
+        self.data_end = os.path.getsize(self.path)
+
+        # 時刻の取得に使用するHubの位置
+        self.time_device = None  # type: Optional[int]
+        for i, (_, device_type) in enumerate(self.devices):
+            if device_type == 'hub':
+                self.time_device = i
+                break
+
+        # フッタ（フレーム数とインデックス）を読み込む
+        self.frame_count = None  # type: Optional[int]
+        self.index_interval = 0
+        self.index = []  # type: List[Tuple[int, int, int]]
+
+        # 圧縮ブロックの展開状況
+        self.block_first = 0
+        self.block_data = b''
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.decode_time = 0.0
+        self.clock = _get_clock()
+
+        if self.version >= 2:
+            self._read_footer()
+
+        # フッタが無い圧縮ファイルはブロックのヘッダをたどってインデックスを作成する
+        # 追従モードの場合はファイルを先頭から順に読み込むためインデックスを作成しない
+        if self.follow:
+            pass
+        elif self.encoding == _DELTA and self.frame_count is None:
+            self._scan_keyframes()
+        elif self.encoding != 0 and self.frame_count is None:
+            self._scan_blocks()
+
+        self.reader.seek(self.data_offset)
+        self.position = 0
+
+        # 追従モードで読み込んだ未処理のデータ
+        self.pending = bytearray()
+        self.pending_offset = self.data_offset
+        self.pending_position = 0
+        self.pending_values = []  # type: List[int]
+
+    def _read_header(self, size: int) -> bytes:
+        # 追従モードの場合はヘッダが書き込まれるまで待機する
+        data = self.reader.read(size)
+        start_time = time.time()
+
+        while self.follow and len(data) < size:
+            if self.timeout is not None and time.time() - start_time > self.timeout:
+                break
+
+            time.sleep(self.poll_interval)
+            data += self.reader.read(size - len(data))
+
+        if len(data) < size:
+            raise ValueError('The log header is incomplete: {}'.format(self.path))
+
+        return data
+
+    def _read_footer(self) -> None:
+        footer_size = struct.calcsize(_FOOTER_FORMAT)
+        index_size = struct.calcsize(_INDEX_FORMAT)
+        file_size = os.path.getsize(self.path)
+
+        # フッタが存在しない場合は書き込み途中のファイルとして扱う
+        if file_size < self.data_offset + footer_size:
+            return
+
+        self.reader.seek(file_size - footer_size)
+        frame_count, index_interval, index_count, index_offset, magic = struct.unpack(
+            _FOOTER_FORMAT, self.reader.read(footer_size))
+
+        if magic != _FOOTER_MAGIC:
+            return
+
+        self.frame_count = frame_count
+        self.index_interval = index_interval
+        self.data_end = index_offset
+
+        self.reader.seek(index_offset)
+        binary = self.reader.read(index_count * index_size)
+        self.index = [
+            struct.unpack_from(_INDEX_FORMAT, binary, i * index_size)
+            for i in range(index_count)]
+
+    def _scan_blocks(self) -> None:
+        header_size = struct.calcsize(_BLOCK_FORMAT)
+        offset = self.data_offset
+        frame = 0
+
+        while True:
+            self.reader.seek(offset)
+            header = self.reader.read(header_size)
+            if len(header) < header_size:
+                break
+
+            count, size = struct.unpack(_BLOCK_FORMAT, header)
+            payload = self.reader.read(size)
+            if len(payload) < size:
+                break
+
+            time_ms = 0
+            if self.time_device is not None:
+                data = _decompress(self.encoding, payload)
+                begin = self.offsets[self.time_device]
+                time_ms = int.from_bytes(data[begin:begin + 4], 'big')
+
+            self.index.append((time_ms, frame, offset))
+            offset += header_size + size
+            frame += count
+
+        self.frame_count = frame
+
+    def _scan_keyframes(self) -> None:
+        self.reader.seek(self.data_offset)
+        data = self.reader.read()
+        frame_size = self.offsets[-1]
+        field_count = sum(len(fields) for fields in self.fields)
+        position = 0
+        frame = 0
+
+        try:
+            while position < len(data):
+                if frame % self.keyframe_interval == 0:
+                    if position + frame_size > len(data):
+                        break
+
+                    time_ms = 0
+                    if self.time_device is not None:
+                        begin = position + self.offsets[self.time_device]
+                        time_ms = int.from_bytes(data[begin:begin + 4], 'big')
+
+                    self.index.append((time_ms, frame, self.data_offset + position))
+                    position += frame_size
+                else:
+                    position = _skip_delta(data, position, field_count)
+
+                frame += 1
+        except IndexError:
+            # 最後のフレームが途中で切れている
+            pass
+
+        self.frame_count = frame
+        self.data_end = self.data_offset + position
+
+    def _load_block(self, frame: int) -> bool:
+        # 指定したフレームを含むブロックを展開する
+        if self.block_first <= frame < self.block_first + len(self.block_data) // self.offsets[-1]:
+            return True
+
+        position = _bisect(lambda i: self.index[i][1], 0, len(self.index), frame + 1) - 1
+        if position < 0:
+            return False
+
+        _, first, offset = self.index[position]
+
+        if self.encoding == _DELTA:
+            # 次のキーフレームまでを1つのブロックとして展開する
+            if position + 1 < len(self.index):
+                _, last, end = self.index[position + 1]
+            else:
+                last, end = self.get_frame_count(), self.data_end
+
+            count, size, header_size = last - first, end - offset, 0
+        else:
+            header_size = struct.calcsize(_BLOCK_FORMAT)
+            self.reader.seek(offset)
+            count, size = struct.unpack(_BLOCK_FORMAT, self.reader.read(header_size))
+
+        if frame >= first + count:
+            return False
+
+        start_time = self.clock()
+        self.reader.seek(offset + header_size)
+        payload = self.reader.read(size)
+
+        if self.encoding == _DELTA:
+            self.block_data = _decode_delta(payload, count, self.frame_struct)
+        else:
+            self.block_data = _decompress(self.encoding, payload)
+
+        self.block_first = first
+        self.decode_time += (self.clock() - start_time) / _NANOSECONDS
+        self.stored_bytes += header_size + size
+        self.raw_bytes += len(self.block_data)
+
+        return True
+
+    def _read_following(self) -> Optional[bytes]:
+        # 新しいフレームが書き込まれるまでファイルを確認する
+        last_time = time.time()
+
+        while True:
+            buffer = self._take_frame()
+            if buffer is not None:
+                return buffer
+            elif self.frame_count is not None and self.position >= self.frame_count:
+                return None
+
+            chunk = self.reader.read()
+            if len(chunk) != 0:
+                self._append_pending(chunk)
+                last_time = time.time()
+                continue
+
+            if self.timeout is not None and time.time() - last_time > self.timeout:
+                return None
+
+            time.sleep(self.poll_interval)
+
+    def _append_pending(self, chunk: bytes) -> None:
+        # 処理済みのデータを削除する
+        if self.pending_position > 65536:
+            del self.pending[:self.pending_position]
+            self.pending_offset += self.pending_position
+            self.pending_position = 0
+
+        self.pending.extend(chunk)
+
+        # フッタが書き込まれた場合はフレーム数を確定し、インデックス以降のデータを削除する
+        footer_size = struct.calcsize(_FOOTER_FORMAT)
+        if (self.version < 2 or self.frame_count is not None
+                or len(self.pending) < footer_size or self.pending[-4:] != _FOOTER_MAGIC):
+            return
+
+        frame_count, _, index_count, index_offset, _ = struct.unpack_from(
+            _FOOTER_FORMAT, self.pending, len(self.pending) - footer_size)
+        index_size = struct.calcsize(_INDEX_FORMAT)
+        end = self.pending_offset + len(self.pending)
+
+        if index_offset + index_count * index_size + footer_size != end:
+            return
+
+        self.frame_count = frame_count
+        if index_offset >= self.pending_offset:
+            del self.pending[index_offset - self.pending_offset:]
+
+    def _take_frame(self) -> Optional[bytes]:
+        # 追従モードで読み込んだデータから次のフレームを取り出す
+        # フレームが途中までしか書き込まれていない場合はNoneを返す
+        frame_size = self.offsets[-1]
+        data = self.pending
+        position = self.pending_position
+
+        if self.encoding == 0 or (
+                self.encoding == _DELTA and self.position % self.keyframe_interval == 0):
+            if len(data) - position < frame_size:
+                return None
+
+            buffer = bytes(data[position:position + frame_size])
+            self.pending_position = position + frame_size
+
+            if self.encoding == _DELTA:
+                self.pending_values = list(self.frame_struct.unpack(buffer))
+
+            return buffer
+
+        if self.encoding == _DELTA:
+            values = self.pending_values
+            try:
+                self.pending_position = _decode_delta_frame(data, position, values)
+            except IndexError:
+                return None
+
+            return self.frame_struct.pack(*values)
+
+        # 圧縮ブロックの場合はブロック全体が書き込まれてから展開する
+        if not (self.block_first <= self.position < self.block_first + len(self.block_data) // frame_size):
+            header_size = struct.calcsize(_BLOCK_FORMAT)
+            if len(data) - position < header_size:
+                return None
+
+            count, size = struct.unpack_from(_BLOCK_FORMAT, data, position)
+            if len(data) - position < header_size + size:
+                return None
+
+            payload = bytes(data[position + header_size:position + header_size + size])
+            self.block_data = _decompress(self.encoding, payload)
+            self.block_first = self.position
+            self.pending_position = position + header_size + size
+            self.stored_bytes += header_size + size
+            self.raw_bytes += len(self.block_data)
+
+        begin = (self.position - self.block_first) * frame_size
+        return self.block_data[begin:begin + frame_size]
+
+    def tail(self) -> Iterator[List[bytes]]:
+        '''書き込み中のログファイルに追加されるフレームを順に取得する。
+        追従モードでない場合は追従モードに切り替え、現在の位置から読み込みを始める。
+        ただし、圧縮（または差分符号化）されたログファイルは先頭からのみ追従できる。
+
+        Returns:
+            デバイスごとに分割したデータのリストを返すイテレータ。
+            LogWriterがファイルを閉じた場合、またはタイムアウトした場合に終了する。
+        '''
+        if not self.follow:
+            if self.encoding != 0 and self.position != 0:
+                raise ValueError('Compressed log files can be followed only from the beginning.')
+
+            self.follow = True
+            self.pending_offset = self.data_offset + self.position * self.offsets[-1]
+            self.reader.seek(self.pending_offset)
+            self.block_first, self.block_data = 0, b''
+
+        while True:
+            data = self.read()
+            if data is None:
+                break
+            yield data
+
+    def get_encoding(self) -> str:
+        '''ログファイルのエンコーディングの名前を取得する。
+
+        Returns:
+            エンコーディングの名前（raw, zlib, lzma, delta）。
+        '''
+        return _ENCODINGS[self.encoding]
+
+    def get_stats(self) -> Dict[str, float]:
+        '''圧縮（または差分符号化）されたログファイルの展開に関する統計情報を取得する。
+
+        Returns:
+            統計情報の辞書。
+            raw_bytes（展開後のバイト数）, stored_bytes（ファイル上のバイト数）,
+            compression_ratio（圧縮率）, elapsed_time（展開にかかった時間）,
+            throughput（1秒あたりの展開後のバイト数）を含む。
+        '''
+        return _get_compression_stats(self.raw_bytes, self.stored_bytes, self.decode_time)
 
     def __enter__(self) -> 'LogReader':
         return self
@@ -86,6 +665,38 @@ class LogReader(object):
         '''
         return self.devices
 
+    def get_fields(self) -> List[Tuple[Tuple[str, str], ...]]:
+        '''ログファイルに記録されているデバイスごとのフィールドのリストを取得する。
+
+        Returns:
+            フィールドのリスト。デバイスのリストの順番はget_devices()で取得したものと同じ。
+            フィールドは(フィールド名, structのフォーマット文字)のタプルで表現される。
+        '''
+        return self.fields
+
+    def get_structs(self) -> List[Any]:
+        '''デバイスごとのデータを展開するためのstruct.Structのリストを取得する。
+        read()で取得したデバイスごとのデータは、対応するstruct.Structのunpack()で値のタプルに変換できる。
+
+        Returns:
+            struct.Structのリスト。デバイスのリストの順番はget_devices()で取得したものと同じ。
+        '''
+        return self.structs
+
+    def get_frame_count(self) -> int:
+        '''ログファイルに記録されているフレーム数を取得する。
+        書き込み途中のファイルの場合は、現時点で読み込み可能なフレーム数を返す。
+
+        Returns:
+            フレーム数。
+        '''
+        if self.frame_count is not None:
+            return self.frame_count
+        elif self.offsets[-1] == 0:
+            return 0
+
+        return max(os.path.getsize(self.path) - self.data_offset, 0) // self.offsets[-1]
+
     def read(self) -> Optional[List[bytes]]:
         '''ログファイルからデバイスごとに分割したデータを取得する。
 
@@ -94,13 +705,182 @@ class LogReader(object):
             デバイスのリストの順番はget_devices()で取得したものと同じ。
             ログデータが壊れている（と思われる）場合はNoneを返す。
         '''
-        buffer = self.reader.read(self.offsets[-1])
+        if self.frame_count is not None and self.position >= self.frame_count:
+            return None
+
+        if self.follow:
+            buffer = self._read_following()
+            if buffer is None:
+                return None
+        elif self.encoding == 0:
+            buffer = self.reader.read(self.offsets[-1])
+        elif self._load_block(self.position):
+            begin = (self.position - self.block_first) * self.offsets[-1]
+            buffer = self.block_data[begin:begin + self.offsets[-1]]
+        else:
+            return None
 
         if len(buffer) < self.offsets[-1]:
             return None
 
+        self.position += 1
+
         return [buffer[b:e] for b, e in zip(self.offsets[:-1], self.offsets[1:])]
 
+    def seek_frame(self, frame: int) -> None:
+        '''次に読み込むフレームの位置を設定する。
+
+        Args:
+            frame: フレーム番号（先頭のフレームが0）。
+        '''
+        if self.encoding == 0:
+            self.reader.seek(self.data_offset + frame * self.offsets[-1])
+
+        self.position = frame
+
+    def seek_time(self, t: float) -> int:
+        '''次に読み込むフレームの位置を指定した時刻に設定する。
+        Hubの時刻が指定した時刻以上となる最初のフレームが次に読み込まれる。
+        インデックスを持つログファイルの場合は、インデックスを用いて探索範囲を絞り込む。
+
+        Args:
+            t: 時刻（単位は秒）。
+
+        Returns:
+            次に読み込まれるフレームの番号。
+        '''
+        if self.time_device is None:
+            raise ValueError('The log file does not contain a hub device.')
+
+        target = int(round(t * 1000))
+        lower, upper = 0, self.get_frame_count()
+
+        # インデックスを二分探索して探索範囲を絞り込む
+        if len(self.index) != 0:
+            position = _bisect(lambda i: self.index[i][0], 0, len(self.index), target)
+            if position > 0:
+                lower = self.index[position - 1][1]
+            if position < len(self.index):
+                upper = self.index[position][1]
+
+        # フレームを二分探索する
+        frame = _bisect(self._read_time, lower, upper, target)
+        self.seek_frame(frame)
+
+        return frame
+
+    def read_range(self, t0: float, t1: float) -> Iterator[List[bytes]]:
+        '''指定した時刻の範囲に含まれるフレームを順に取得する。
+        Hubの時刻がt0以上かつt1未満のフレームが対象となる。
+
+        Args:
+            t0: 開始時刻（単位は秒）。
+            t1: 終了時刻（単位は秒）。
+
+        Returns:
+            デバイスごとに分割したデータのリストを返すイテレータ。
+        '''
+        self.seek_time(t0)
+        target = int(round(t1 * 1000))
+
+        while True:
+            data = self.read()
+            if data is None or self._get_time(data) >= target:
+                break
+            yield data
+
+    def _get_time(self, data: List[bytes]) -> int:
+        return int.from_bytes(data[self.time_device][:4], 'big')  # type: ignore
+
+    def _read_time(self, frame: int) -> int:
+        offset = self.offsets[self.time_device]  # type: ignore
+
+        if self.encoding == 0:
+            self.reader.seek(self.data_offset + frame * self.offsets[-1] + offset)
+            return int.from_bytes(self.reader.read(4), 'big')
+
+        self._load_block(frame)
+        begin = (frame - self.block_first) * self.offsets[-1] + offset
+        return int.from_bytes(self.block_data[begin:begin + 4], 'big')
+
+    def get_dtype(self) -> Any:
+        '''ログデータの1フレームに対応するnumpyの構造化データ型を取得する。
+        デバイスごとにフィールドを持つ構造体となり、それぞれのフィールドはデバイスの測定値を表す。
+
+        Returns:
+            numpyの構造化データ型。
+        '''
+        np = _import_numpy()
+        return np.dtype([
+            (name, [(field, '>' + fmt) for field, fmt in fields])
+            for (name, _), fields in zip(self.devices, self.fields)])
+
+    def to_arrays(self) -> Any:
+        '''ログデータ全体をnumpyの構造化配列として取得する。
+        ログファイルのデータ部分をメモリマップするため、ファイルの内容はコピーされない。
+        ただし、圧縮されたログファイルの場合はすべてのブロックを展開した配列を返す。
+        最後のフレームが途中で切れている場合、そのフレームは含まれない。
+
+        Returns:
+            フレームごとの要素を持つnumpyの構造化配列（読み込み専用）。
+            データ型はget_dtype()で取得したものと同じ。
+        '''
+        np = _import_numpy()
+        dtype = self.get_dtype()
+        count = self.get_frame_count()
+
+        # 長さが0のファイルはメモリマップできないため空の配列を返す
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+
+        # 圧縮されたファイルはすべてのブロックを展開する
+        if self.encoding != 0:
+            data = bytearray()
+            for _, first, _ in self.index:
+                self._load_block(first)
+                data.extend(self.block_data)
+            return np.frombuffer(bytes(data), dtype=dtype, count=count)
+
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=self.data_offset, shape=(count,))
+
+    def iter_arrays(self, chunk_frames: int = 65536) -> Iterator[Any]:
+        '''ログデータをnumpyの構造化配列として分割して取得する。
+        非圧縮のログファイルの場合はメモリマップした配列のビューを返し、
+        圧縮されたログファイルの場合はブロックごとに展開した配列を返す。
+        ファイル全体を一度に展開しないため、大きなログファイルも一定のメモリ量で処理できる。
+
+        Args:
+            chunk_frames: 1つの配列に含めるフレーム数（非圧縮のログファイルのみ）。
+
+        Returns:
+            numpyの構造化配列を返すイテレータ。データ型はget_dtype()で取得したものと同じ。
+        '''
+        np = _import_numpy()
+
+        if self.encoding == 0:
+            arrays = self.to_arrays()
+            for i in range(0, len(arrays), chunk_frames):
+                yield arrays[i:i + chunk_frames]
+            return
+
+        dtype = self.get_dtype()
+        for _, first, _ in self.index:
+            self._load_block(first)
+            yield np.frombuffer(self.block_data, dtype=dtype)
+
+    def columns(self) -> Dict[str, Dict[str, Any]]:
+        '''ログデータをデバイスとフィールドごとの列として取得する。
+        それぞれの列はto_arrays()で取得した配列のビューであり、データはコピーされない。
+
+        Returns:
+            変数名をキーとする辞書。
+            値はフィールド名（hubの場合はtime, buttonなど）をキーとしたnumpy配列の辞書。
+        '''
+        arrays = self.to_arrays()
+        return {
+            name: {field: arrays[name][field] for field, _ in fields}
+            for (name, _), fields in zip(self.devices, self.fields)}
+
     def close(self) -> None:
         '''ログファイルを閉じる。'''
         self.reader.close()
@@ -119,7 +899,36 @@ class LogWriter(object):
     '''ログデータをファイルに書き込むためのクラス。
     モータやセンサから取得したデータをログファイルに書き込む。
 
-    **ログファイルのフォーマット**
+    **ログファイルのフォーマット（バージョン2）**
+
+    .. code-block:: none
+
+        識別子(4バイト): "ETRL"
+        バージョン(1バイト): 2
+        エンコーディング(1バイト): 0=非圧縮, 1=zlib, 2=lzma, 3=差分符号化
+        デバイスのリストの文字列のバイト数(2バイト)
+        デバイスのリストのUTF-8文字列
+          (変数名1:デバイスタイプ1:フィールド名1=フォーマット1;フィールド名2=フォーマット2;...,変数名2:...)
+          フォーマットはstructのフォーマット文字（ビッグエンディアン）
+        以下、それぞれのデバイスから取得されたデータを時刻順に並べたもの（バージョン1と同じ）
+          - 圧縮する場合は `block_frames` フレームごとにまとめたブロックを並べる
+          - ブロック: フレーム数(4バイト), 圧縮後のバイト数(4バイト), 圧縮したフレームのデータ
+          - 差分符号化する場合はキーフレームの間隔(4バイト)の後にフレームを並べる
+          - 差分符号化されたフレーム: キーフレームは非圧縮のフレームと同じ、
+            それ以外はフィールドごとの前のフレームとの差分（zigzag符号化した可変長整数）
+        インデックス(16バイト * 要素数)
+          - Hubの時刻(4バイト), フレーム番号(4バイト), フレームの位置(8バイト)
+          - `index_interval` フレームごとに1つの要素が記録される
+          - 圧縮する場合はブロックごとに1つの要素（ブロックの先頭の位置）が記録される
+          - 差分符号化する場合はキーフレームごとに1つの要素が記録される
+        フッタ(24バイト)
+          - フレーム数(4バイト), インデックスの間隔(4バイト), インデックスの要素数(4バイト),
+            インデックスの位置(8バイト), 識別子(4バイト): "ETRX"
+
+    フッタはclose()を実行したときに書き込まれる。
+    フッタが存在しないファイル（書き込み途中のファイル）も読み込むことができる。
+
+    **ログファイルのフォーマット（バージョン1）**
 
     .. code-block:: none
 
@@ -137,7 +946,7 @@ class LogWriter(object):
     **ログデータの例**
 
     ログデータの取得対象となるデバイスがleft_motor:motor・right_motor:motor・color_sensor:color_sensorの場合、
-    以下のログデータが作成される。
+    以下のログデータ（バージョン1）が作成される。
 
     .. code-block:: none
 
@@ -148,29 +957,165 @@ class LogWriter(object):
         (left_motorの回転角度, right_motorの回転角度, color_sensorのbrightness, ambient, raw_color)
         ...
 
+    **非同期書き込みモード**
+
+    `buffer_frames` に1以上の値を指定した場合、ログデータは事前に確保したリングバッファにコピーされ、
+    書き込み用のスレッドがまとめてファイルに書き込む。
+    制御ハンドラを実行するスレッドはファイルへの書き込みを待機しなくなる。
+    リングバッファが一杯になった場合の動作は `overflow` で指定する。
+
+    - `block`: 空きができるまで待機する（ログデータは失われない）。
+    - `drop_oldest`: 最も古いフレームを破棄して新しいフレームを格納する。
+    - `drop_newest`: 新しいフレームを破棄する。
+
+    破棄したフレームの数は `dropped_frames` 、待機が発生した回数は `blocked_frames` で確認できる。
+    書き込み用のスレッドでファイルへの書き込みに失敗した場合（ディスクの容量不足など）は、
+    書き込み用のスレッドは終了し、その例外が次のwrite()、flush()、close()で送出される。
+
+    **圧縮モード**
+
+    `compression` に `zlib` か `lzma` を指定した場合、ログデータを `block_frames` フレームごとに圧縮する
+    （バージョン2のみ）。
+    圧縮は書き込み用のスレッドで行うため、圧縮モードでは常に非同期書き込みモードとなる。
+    圧縮率や処理速度はget_stats()で確認できる。
+
+    **差分符号化モード**
+
+    `compression` に `delta` を指定した場合、それぞれのフィールドを前のフレームとの差分として記録する
+    （バージョン2のみ）。
+    差分はzigzag符号化した可変長整数（7ビットずつ）で記録されるため、
+    時刻やモータの回転角度のように少しずつ変化する値は1バイトで記録される。
+    汎用の圧縮処理を使用しないため、処理の負荷は小さい。
+    `index_interval` フレームごとに非圧縮のフレーム（キーフレーム）を記録するため、
+    ファイルの途中から読み込むこともできる。
+
     Args:
         path: ログファイルのパス
         devices: ログファイルに記録するデバイスのリスト。
             デバイスは(変数名, デバイスオブジェクト)のタプルで指定する。
+        buffer_frames: リングバッファに格納できるフレーム数。0の場合は同期的に書き込む。
+        overflow: リングバッファが一杯になった場合の動作（block, drop_oldest, drop_newest）。
+        flush_interval: 書き込み用のスレッドがファイルに書き込む間隔（単位は秒）。
+        version: ログファイルのフォーマットのバージョン（1または2）。
+        index_interval: インデックスに記録するフレームの間隔（バージョン2のみ）。
+        compression: 圧縮方式（zlib, lzma, delta）。Noneの場合は圧縮しない。
+        compression_level: 圧縮レベル（zlibは0-9, lzmaは0-9）。
+        block_frames: 圧縮ブロックに含めるフレーム数。
     '''
 
     def __init__(
         self,
-        path: Union[str, Path],  # type: ignore
+        path: 'Union[str, os.PathLike]',
         devices: List[Tuple[str, Device]],
+        buffer_frames: int = 0,
+        overflow: str = 'block',
+        flush_interval: float = 0.1,
+        version: int = 2,
+        index_interval: int = 100,
+        compression: Optional[str] = None,
+        compression_level: int = 6,
+        block_frames: int = 1024,
     ) -> None:
+        if overflow not in ('block', 'drop_oldest', 'drop_newest'):
+            raise ValueError('Invalid overflow policy: {}'.format(overflow))
+        elif version not in (1, 2):
+            raise ValueError('Invalid log format version: {}'.format(version))
+        elif index_interval < 1:
+            raise ValueError('Invalid index interval: {}'.format(index_interval))
+        elif compression is not None and compression not in _ENCODINGS[1:]:
+            raise ValueError('Invalid compression: {}'.format(compression))
+        elif compression is not None and version < 2:
+            raise ValueError('Compression requires log format version 2.')
+        elif block_frames < 1:
+            raise ValueError('Invalid block size: {}'.format(block_frames))
+
+        encoding = _ENCODINGS.index(compression) if compression is not None else 0
+
+        # 圧縮は書き込み用のスレッドで行う（差分符号化は制御スレッドで行ってもよい）
+        if encoding != 0 and encoding != _DELTA and buffer_frames == 0:
+            buffer_frames = block_frames * 2
+
         self.path = str(path)  # type: ignore
         self.writer = open(self.path, 'wb')
 
-        device_types = [_get_type_name(device) for _, device in devices]
-        lengths = [_get_binary_length(device_type) for device_type in device_types]
+        codecs = [_get_codec(device) for _, device in devices]
+        lengths = [codec.size for codec in codecs]
         self.offsets = [sum(lengths[:i]) for i in range(len(lengths) + 1)]
         self.buffer = bytearray(sum(lengths))
 
-        name_types = ['{}:{}'.format(name, _get_type_name(device)) for name, device in devices]
-        binary = ','.join(name_types).encode('utf-8')
-        self.writer.write(int.to_bytes(len(binary), 2, 'big'))
-        self.writer.write(binary)
+        # すべてのデバイスの値を1回のpack_intoでバッファに書き込むためのstruct
+        # デバイスから取得した値はself.valuesのデバイスごとの範囲（self.slices）に格納する
+        self.frame_struct = _make_struct('>' + ''.join(
+            fmt for codec in codecs for _, fmt in codec.fields))
+        counts = [len(codec.fields) for codec in codecs]
+        self.slices = [slice(sum(counts[:i]), sum(counts[:i + 1])) for i in range(len(counts))]
+        self.values = [0] * sum(counts)
+
+        name_types = [(name, codec.device_type) for (name, _), codec in zip(devices, codecs)]
+
+        if version == 1:
+            binary = ','.join('{}:{}'.format(n, t) for n, t in name_types).encode('utf-8')
+            self.writer.write(int.to_bytes(len(binary), 2, 'big'))
+            self.writer.write(binary)
+            self.data_offset = 2 + len(binary)
+        else:
+            binary = _make_header(name_types).encode('utf-8')
+            self.writer.write(_LOG_MAGIC)
+            self.writer.write(bytes((version, encoding)))
+            self.writer.write(int.to_bytes(len(binary), 2, 'big'))
+            self.writer.write(binary)
+            self.data_offset = len(_LOG_MAGIC) + 4 + len(binary)
+
+            if encoding == _DELTA:
+                self.writer.write(int.to_bytes(index_interval, 4, 'big'))
+                self.data_offset += 4
+
+        # インデックスの設定（バージョン2のみ）
+        self.version = version
+        self.index_interval = index_interval
+        self.index = bytearray()
+        self.data_size = 0
+        self.time_offset = None  # type: Optional[int]
+
+        # 圧縮の設定
+        self.encoding = encoding
+        self.compression_level = compression_level
+        self.block_frames = block_frames
+        self.block = bytearray(block_frames * self.offsets[-1] if encoding != 0 else 0)
+        self.block_count = 0
+        self.raw_bytes = 0
+        self.encode_time = 0.0
+        self.clock = _get_clock()
+
+        if encoding != 0 and encoding != _DELTA:
+            self.index_interval = block_frames
+
+        # 差分符号化の設定
+        if encoding == _DELTA:
+            self.previous = ()  # type: Tuple[int, ...]
+
+            # フレームを展開した値の中でのHubの時刻の位置
+            self.time_field = None  # type: Optional[int]
+            for index, codec in zip(self.slices, codecs):
+                if codec.device_type == 'hub':
+                    self.time_field = index.start
+                    break
+
+        for offset, (_, device_type) in zip(self.offsets, name_types):
+            if device_type == 'hub':
+                self.time_offset = offset
+                break
+
+        # 非同期書き込みモードの設定
+        self.buffer_frames = buffer_frames
+        self.overflow = overflow
+        self.flush_interval = flush_interval
+        self.written_frames = 0
+        self.dropped_frames = 0
+        self.blocked_frames = 0
+
+        if self.buffer_frames > 0:
+            self._start_flusher()
 
     def __enter__(self) -> 'LogWriter':
         return self
@@ -181,24 +1126,295 @@ class LogWriter(object):
         exc_value: Optional[BaseException],
         traceback: Optional[TracebackType],
     ) -> None:
-        self.writer.close()
+        self.close()
 
     def write(self, devices: List[Device]) -> None:
         '''デバイスから取得したデータをログファイルに書き込む。
+        非同期書き込みモードの場合は、リングバッファにデータをコピーする。
 
         Args:
             devices: ログファイルに記録するデバイスのリスト。
         '''
-        for offset, device in zip(self.offsets, devices):
-            binary = device.get_log()
-            self.buffer[offset:offset + len(binary)] = binary
+        values = self.values
+        for index, device in zip(self.slices, devices):
+            values[index] = device.get_log_values()
+
+        self.frame_struct.pack_into(self.buffer, 0, *values)
 
-        self.writer.write(self.buffer)
+        if self.buffer_frames > 0:
+            self._push(self.buffer)
+        else:
+            self._store(self.buffer, 1)
 
     def flush(self) -> None:
-        '''ログファイルに書き込みバッファの内容を書き込む。'''
+        '''ログファイルに書き込みバッファの内容を書き込む。
+        非同期書き込みモードの場合は、リングバッファの内容が書き込まれるまで待機する。
+        '''
+        if self.buffer_frames > 0:
+            with self.condition:
+                self.condition.notify_all()
+                while (self.ring_count > 0 or self.flushing) and self.error is None:
+                    self.condition.wait()
+
+                self._raise_error()
+
         self.writer.flush()
 
     def close(self) -> None:
-        '''ログファイルを閉じる。'''
+        '''ログファイルを閉じる。
+        非同期書き込みモードの場合は、リングバッファの内容を書き込んでから閉じる。
+        '''
+        if self.writer.closed:
+            return
+
+        if self.buffer_frames > 0:
+            with self.condition:
+                self.running = False
+                self.condition.notify_all()
+
+            self.flusher.join()
+
+            # 書き込み用のスレッドが異常終了した場合はファイルを閉じてから例外を送出する
+            if self.error is not None:
+                self.writer.close()
+                self._raise_error()
+
+        if self.block_count > 0:
+            self._write_block()
+
+        if self.version >= 2:
+            self._write_footer()
+
         self.writer.close()
+
+    def get_stats(self) -> Dict[str, float]:
+        '''ログデータの書き込みに関する統計情報を取得する。
+
+        Returns:
+            統計情報の辞書。
+            written_frames（書き込んだフレーム数）, dropped_frames（破棄したフレーム数）,
+            blocked_frames（待機が発生した回数）, raw_bytes（圧縮前のバイト数）,
+            stored_bytes（ファイルに書き込んだバイト数）, compression_ratio（圧縮率）,
+            elapsed_time（圧縮にかかった時間）, throughput（1秒あたりの圧縮前のバイト数）を含む。
+        '''
+        stats = _get_compression_stats(self.raw_bytes, self.data_size, self.encode_time)
+        stats['written_frames'] = self.written_frames
+        stats['dropped_frames'] = self.dropped_frames
+        stats['blocked_frames'] = self.blocked_frames
+        return stats
+
+    def _store(self, data: Union[bytes, bytearray, memoryview], count: int) -> None:
+        # 差分符号化する場合はフレームごとに符号化する
+        if self.encoding == _DELTA:
+            self._store_delta(data, count)
+            return
+
+        # 圧縮する場合はブロックにフレームを蓄積する
+        if self.encoding != 0:
+            self._store_blocks(data, count)
+            return
+
+        # フレームのデータをファイルに書き込む
+        self.raw_bytes += len(data)
+
+        if self.version >= 2:
+            self._update_index(data, count)
+
+        self.writer.write(data)
+        self.data_size += len(data)
+        self.written_frames += count
+
+    def _update_index(self, data: Union[bytes, bytearray, memoryview], count: int) -> None:
+        frame_size = self.offsets[-1]
+        interval = self.index_interval
+        first = -(-self.written_frames // interval) * interval
+
+        for frame in range(first, self.written_frames + count, interval):
+            offset = (frame - self.written_frames) * frame_size
+
+            if self.time_offset is not None:
+                begin = offset + self.time_offset
+                time_ms = int.from_bytes(bytes(data[begin:begin + 4]), 'big')
+            else:
+                time_ms = 0
+
+            self.index.extend(struct.pack(
+                _INDEX_FORMAT, time_ms, frame, self.data_offset + self.data_size + offset))
+
+    def _store_delta(self, data: Union[bytes, bytearray, memoryview], count: int) -> None:
+        frame_size = self.offsets[-1]
+        output = bytearray()
+        start_time = self.clock()
+
+        for i in range(count):
+            frame = self.written_frames + i
+            values = self.frame_struct.unpack_from(data, i * frame_size)
+
+            if frame % self.index_interval == 0:
+                time_ms = values[self.time_field] if self.time_field is not None else 0
+
+                self.index.extend(struct.pack(
+                    _INDEX_FORMAT, time_ms, frame, self.data_offset + self.data_size + len(output)))
+                output.extend(data[i * frame_size:(i + 1) * frame_size])
+            else:
+                _encode_delta(values, self.previous, output)
+
+            self.previous = values
+
+        self.encode_time += (self.clock() - start_time) / _NANOSECONDS
+        self.writer.write(output)
+        self.data_size += len(output)
+        self.raw_bytes += count * frame_size
+        self.written_frames += count
+
+    def _store_blocks(self, data: Union[bytes, bytearray, memoryview], count: int) -> None:
+        frame_size = self.offsets[-1]
+        offset = 0
+
+        while offset < count:
+            size = min(count - offset, self.block_frames - self.block_count)
+            begin = self.block_count * frame_size
+            self.block[begin:begin + size * frame_size] = \
+                data[offset * frame_size:(offset + size) * frame_size]
+            self.block_count += size
+            offset += size
+
+            if self.block_count == self.block_frames:
+                self._write_block()
+
+    def _write_block(self) -> None:
+        frame_size = self.offsets[-1]
+        raw = memoryview(self.block)[:self.block_count * frame_size]
+
+        if self.time_offset is not None:
+            time_ms = int.from_bytes(bytes(raw[self.time_offset:self.time_offset + 4]), 'big')
+        else:
+            time_ms = 0
+
+        start_time = self.clock()
+        payload = _compress(self.encoding, raw, self.compression_level)
+        self.encode_time += (self.clock() - start_time) / _NANOSECONDS
+
+        self.index.extend(struct.pack(
+            _INDEX_FORMAT, time_ms, self.written_frames, self.data_offset + self.data_size))
+
+        self.writer.write(struct.pack(_BLOCK_FORMAT, self.block_count, len(payload)))
+        self.writer.write(payload)
+        self.data_size += struct.calcsize(_BLOCK_FORMAT) + len(payload)
+        self.raw_bytes += len(raw)
+        self.written_frames += self.block_count
+        self.block_count = 0
+
+    def _write_footer(self) -> None:
+        index_offset = self.data_offset + self.data_size
+        index_count = len(self.index) // struct.calcsize(_INDEX_FORMAT)
+
+        # 追従モードのLogReaderが途中までのインデックスを読み込まないように1回で書き込む
+        self.writer.write(self.index + struct.pack(
+            _FOOTER_FORMAT, self.written_frames, self.index_interval,
+            index_count, index_offset, _FOOTER_MAGIC))
+
+    def _start_flusher(self) -> None:
+        import threading
+
+        frame_size = self.offsets[-1]
+        self.ring = bytearray(self.buffer_frames * frame_size)
+        self.ring_head = 0  # 次に書き込む位置（フレーム単位）
+        self.ring_count = 0  # 格納されているフレーム数
+        self.batch = bytearray(len(self.ring))
+        self.flushing = False
+        self.running = True
+
+        # 書き込み用のスレッドで発生した例外（次のwrite/flush/closeで送出する）
+        self.error = None  # type: Optional[BaseException]
+
+        self.condition = threading.Condition()
+        self.flusher = threading.Thread(
+            target=self._run_flusher,
+            name='LogWriter_run_flusher',
+            daemon=True)
+        self.flusher.start()
+
+    def _push(self, frame: bytearray) -> None:
+        frame_size = len(frame)
+
+        with self.condition:
+            self._raise_error()
+
+            if self.ring_count == self.buffer_frames:
+                if self.overflow == 'drop_newest':
+                    self.dropped_frames += 1
+                    return
+                elif self.overflow == 'drop_oldest':
+                    self.ring_count -= 1
+                    self.dropped_frames += 1
+                else:
+                    self.blocked_frames += 1
+                    self.condition.notify_all()
+                    while self.ring_count == self.buffer_frames and self.error is None:
+                        self.condition.wait()
+
+                    self._raise_error()
+
+            offset = self.ring_head * frame_size
+            self.ring[offset:offset + frame_size] = frame
+            self.ring_head = (self.ring_head + 1) % self.buffer_frames
+            self.ring_count += 1
+
+            # バッファの半分が埋まったら書き込み用のスレッドを起こす
+            if self.ring_count * 2 >= self.buffer_frames:
+                self.condition.notify_all()
+
+    def _run_flusher(self) -> None:
+        from etrobo_python.realtime import configure_io_thread
+        configure_io_thread()
+
+        frame_size = self.offsets[-1]
+
+        while True:
+            with self.condition:
+                if self.running and self.ring_count == 0:
+                    self.condition.wait(self.flush_interval)
+
+                count = self.ring_count
+
+                if count == 0:
+                    self.condition.notify_all()
+                    if self.running:
+                        continue
+                    else:
+                        break
+
+                # 古い順にフレームを取り出す（リングバッファの末尾で折り返す場合は2回に分けてコピーする）
+                tail = (self.ring_head - count) % self.buffer_frames
+                first = min(count, self.buffer_frames - tail)
+                self.batch[:first * frame_size] = self.ring[tail * frame_size:(tail + first) * frame_size]
+                if first < count:
+                    self.batch[first * frame_size:count * frame_size] = self.ring[:(count - first) * frame_size]
+
+                self.ring_count = 0
+                self.flushing = True
+                self.condition.notify_all()
+
+            error = None
+
+            try:
+                self._store(memoryview(self.batch)[:count * frame_size], count)
+                # 追従モードのLogReaderから読み込めるようにOSに書き込む
+                self.writer.flush()
+            except BaseException as e:
+                error = e
+
+            # 書き込みに失敗した場合（ディスクの容量不足など）は例外を記録して終了する
+            # 待機している制御スレッドを起こし、次のwrite/flush/closeで例外を送出させる
+            with self.condition:
+                self.flushing = False
+                self.error = error
+                self.condition.notify_all()
+
+            if error is not None:
+                return
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,251 @@
+from .binding import bind_handler
+from .device import Device
+
+try:
+    from typing import Any, Callable, Dict, Optional, Tuple  # noqa
+except BaseException:
+    pass
+
+
+OFFLOAD_MODES = ('thread', 'process')
+
+
+class Mailbox(object):
+    '''最新の値だけを保持する郵便受け。
+    値を書き込むと以前の値は上書きされるため、読み出す側は常に最新の値を受け取る。
+    書き込みと読み出しのどちらも待機しない（読み出しを待機する場合はtake()を使用する）。
+    '''
+
+    def __init__(self) -> None:
+        import threading
+
+        self.condition = threading.Condition()
+        self.value = None  # type: Any
+        self.tick = -1
+        self.version = 0
+        self.closed = False
+
+    def put(self, value: Any, tick: int) -> bool:
+        '''値を書き込む。
+
+        Args:
+            value: 書き込む値。
+            tick: 値の作成に使用したデバイスの値を取得した周期の番号。
+
+        Returns:
+            読み出されていない値を上書きした場合はTrue。
+        '''
+        with self.condition:
+            overwritten = self.value is not None
+            self.value = value
+            self.tick = tick
+            self.version += 1
+            self.condition.notify_all()
+
+        return overwritten
+
+    def get(self) -> 'Tuple[Any, int, int]':
+        '''最新の値を待機せずに読み出す。
+
+        Returns:
+            値、周期の番号、書き込まれた回数のタプル。値が書き込まれていない場合の周期の番号は-1。
+        '''
+        with self.condition:
+            return self.value, self.tick, self.version
+
+    def take(self, timeout: 'Optional[float]' = None) -> 'Optional[Tuple[Any, int]]':
+        '''新しい値が書き込まれるまで待機して読み出す。読み出した値は郵便受けから取り除かれる。
+
+        Args:
+            timeout: 最大待機時間（単位は秒）。Noneの場合は値が書き込まれるか閉じられるまで待機する。
+
+        Returns:
+            値と周期の番号のタプル。タイムアウトした場合や閉じられた場合はNone。
+        '''
+        with self.condition:
+            if self.value is None and not self.closed:
+                self.condition.wait(timeout)
+
+            if self.value is None or self.closed:
+                return None
+
+            value, self.value = self.value, None
+            return value, self.tick
+
+    def close(self) -> None:
+        '''郵便受けを閉じ、待機しているスレッドを再開させる。
+        '''
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class OffloadedHandler(object):
+    '''実行時間の長い処理を別のスレッドまたはプロセスで実行する制御ハンドラ。
+    画像処理や経路計画などの重い処理が制御周期を遅らせないようにするために使用する。
+
+    周期ごとの処理は以下の通り（いずれも待機しない）。
+
+    1. すべてのデバイスの値（get_log_values()の値）のスナップショットを入力用の郵便受けに書き込む。
+    2. 出力用の郵便受けから最新の計算結果を読み出し、`apply` を実行してデバイスに反映する。
+
+    ワーカ（スレッドまたはプロセス）は入力用の郵便受けから最新のスナップショットを読み出して
+    `worker` を実行し、計算結果を出力用の郵便受けに書き込む。
+    ワーカの処理が間に合わない場合、古いスナップショットは処理されずに破棄される。
+
+    `worker` はデバイス名をキー、get_log_values()の値を値とする辞書を受け取り、計算結果を返す関数。
+    `apply` は計算結果を第1引数として、引数名で指定したデバイスを受け取る関数であり、
+    制御周期の中で実行される。計算結果がまだ得られていない周期には実行されない。
+
+    反映した計算結果がスナップショットから何周期後のものかは `staleness` から取得できる。
+
+    Args:
+        worker: ワーカで実行する関数（mode='process'の場合はpickle可能な関数であること）。
+        apply: 計算結果をデバイスに反映する関数。
+        mode: ワーカの種類（'thread'または'process'）。
+    '''
+
+    def __init__(
+        self,
+        worker: 'Callable[[Dict[str, Tuple[int, ...]]], Any]',
+        apply: 'Callable[..., None]',
+        mode: str = 'thread',
+    ) -> None:
+        if mode not in OFFLOAD_MODES:
+            raise ValueError('Invalid offload mode: {}'.format(mode))
+
+        self.worker = worker
+        self.apply = apply
+        self.mode = mode
+        self.__name__ = getattr(worker, '__name__', worker.__class__.__name__)
+
+        self.inbox = None  # type: Optional[Mailbox]
+        self.outbox = None  # type: Optional[Mailbox]
+        self.thread = None  # type: Any
+        self.apply_call = None  # type: Optional[Tuple[Callable[..., None], Tuple[Any, ...]]]
+        self.error = None  # type: Optional[BaseException]
+
+        # 周期の番号と、反映した計算結果の古さ（周期の数）
+        self.tick = -1
+        self.staleness = -1
+        self.max_staleness = -1
+        self.total_staleness = 0
+
+        # 計算結果を反映した回数、ワーカが完了した回数、処理されずに破棄されたスナップショットの数
+        self.applied = 0
+        self.completed = 0
+        self.dropped = 0
+
+    def __call__(self, **devices: Device) -> None:
+        if self.thread is None:
+            self.apply_call = bind_handler(self.apply, devices, skip=1)
+            self.start()
+
+        if self.error is not None:
+            raise self.error
+
+        self.tick += 1
+
+        # デバイスの値のスナップショットを渡す
+        snapshot = {name: device.get_log_values() for name, device in devices.items()}
+        if self.inbox.put(snapshot, self.tick):  # type: ignore
+            self.dropped += 1
+
+        # 最新の計算結果を反映する
+        result, tick, version = self.outbox.get()  # type: ignore
+        if version == 0:
+            return
+
+        self.staleness = self.tick - tick
+        self.total_staleness += self.staleness
+        if self.staleness > self.max_staleness:
+            self.max_staleness = self.staleness
+
+        self.applied += 1
+        function, arguments = self.apply_call  # type: ignore
+        function(result, *arguments)
+
+    def start(self) -> None:
+        '''ワーカを開始する（最初の周期に自動的に実行される）。
+        close()の後に再び開始した場合は、新しい郵便受けを作成し、実行状況を初期化する。
+        '''
+        import threading
+
+        if self.thread is not None:
+            raise Exception('The offloaded handler has already been started.')
+
+        self.error = None
+        self.tick = -1
+        self.staleness = -1
+        self.max_staleness = -1
+        self.total_staleness = 0
+        self.applied = 0
+        self.completed = 0
+        self.dropped = 0
+
+        self.inbox = Mailbox()
+        self.outbox = Mailbox()
+        self.thread = threading.Thread(target=self._run, args=(self.inbox, self.outbox), daemon=True)
+        self.thread.start()
+
+    def _run(self, inbox: Mailbox, outbox: Mailbox) -> None:
+        # 停止後に別のワーカが開始されても影響しないように、開始時の郵便受けだけを使用する
+        executor = None
+
+        if self.mode == 'process':
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=1)
+
+        try:
+            while True:
+                item = inbox.take()
+                if item is None:
+                    break
+
+                snapshot, tick = item
+
+                if executor is not None:
+                    result = executor.submit(self.worker, snapshot).result()
+                else:
+                    result = self.worker(snapshot)
+
+                outbox.put(result, tick)
+                self.completed += 1
+        except BaseException as e:
+            # ワーカで発生した例外は次の周期に制御ループで送出する
+            if self.inbox is inbox:
+                self.error = e
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def get_stats(self) -> 'Dict[str, float]':
+        '''ワーカの実行状況を取得する。
+
+        Returns:
+            applied（計算結果を反映した回数）, completed（ワーカが完了した回数）,
+            dropped（破棄されたスナップショットの数）, staleness（最後に反映した計算結果の古さ）,
+            mean_staleness, max_staleness（計算結果の古さの平均と最大値）の辞書。
+            計算結果の古さの単位は周期の数。
+        '''
+        return {
+            'applied': self.applied,
+            'completed': self.completed,
+            'dropped': self.dropped,
+            'staleness': self.staleness,
+            'mean_staleness': self.total_staleness / self.applied if self.applied > 0 else 0.0,
+            'max_staleness': self.max_staleness,
+        }
+
+    def close(self) -> None:
+        '''ワーカを停止する。停止した後の最初の周期に新しいワーカが開始される。
+        '''
+        if self.inbox is not None:
+            self.inbox.close()
+
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+        self.inbox = None
+        self.outbox = None
+        self.thread = None
@@ -0,0 +1,148 @@
+try:
+    from typing import Any, List, Optional  # noqa
+except BaseException:
+    pass
+
+
+SCHED_POLICIES = ('fifo', 'rr', 'other')
+
+# mlockallのフラグ（linux）
+_MCL_CURRENT = 1
+_MCL_FUTURE = 2
+
+
+class RealtimeSettings(object):
+    '''制御ハンドラを実行するスレッドと通信・ログ書き込みのスレッドに適用するLinuxの実時間制御の設定。
+    ETRobo.dispatch()の引数 `realtime` に辞書として指定する。
+
+    - policy: 制御スレッドのスケジューリングポリシー（'fifo', 'rr', 'other'）。Noneの場合は変更しない。
+    - priority: 'fifo'または'rr'の場合の優先度（1-99）。
+    - cpus: 制御スレッドを実行するCPU番号のリスト。Noneの場合は変更しない。
+    - io_cpus: 通信スレッド（シリアル通信の受信など）とログの書き込みスレッドを実行するCPU番号のリスト。
+    - lock_memory: Trueの場合はプロセスのメモリをロックする（mlockall）。
+    - strict: Trueの場合は設定に失敗したときに例外を送出する。Falseの場合はメッセージを表示して実行を続ける。
+
+    'fifo'や'rr'、メモリのロックには管理者権限（またはCAP_SYS_NICE、CAP_IPC_LOCK）が必要である。
+    設定に失敗した場合のメッセージは `errors` に記録される。
+    '''
+
+    def __init__(
+        self,
+        policy: 'Optional[str]' = None,
+        priority: int = 50,
+        cpus: 'Optional[List[int]]' = None,
+        io_cpus: 'Optional[List[int]]' = None,
+        lock_memory: bool = False,
+        strict: bool = False,
+    ) -> None:
+        if policy is not None and policy not in SCHED_POLICIES:
+            raise ValueError('Invalid scheduling policy: {}'.format(policy))
+
+        if policy in ('fifo', 'rr') and not 1 <= priority <= 99:
+            raise ValueError('Invalid scheduling priority: {}'.format(priority))
+
+        self.policy = policy
+        self.priority = priority
+        self.cpus = cpus
+        self.io_cpus = io_cpus
+        self.lock_memory = lock_memory
+        self.strict = strict
+        self.errors = []  # type: List[str]
+
+    def _report(self, message: str, strict: bool = True) -> None:
+        self.errors.append(message)
+
+        if self.strict and strict:
+            raise Exception(message)
+
+        print('Realtime setting failed: {}'.format(message))
+
+    def apply_control_thread(self) -> None:
+        '''実行中のスレッドを制御スレッドとして設定する。
+        '''
+        import os
+
+        if self.policy is not None:
+            if not hasattr(os, 'sched_setscheduler'):
+                self._report('os.sched_setscheduler is not supported on this platform')
+            else:
+                policy = {
+                    'fifo': getattr(os, 'SCHED_FIFO', None),
+                    'rr': getattr(os, 'SCHED_RR', None),
+                    'other': getattr(os, 'SCHED_OTHER', None),
+                }[self.policy]
+                priority = self.priority if self.policy in ('fifo', 'rr') else 0
+
+                try:
+                    os.sched_setscheduler(0, policy, os.sched_param(priority))
+                except (OSError, TypeError) as e:
+                    self._report('sched_setscheduler(policy={}, priority={}): {}'.format(
+                        self.policy, priority, e))
+
+        if self.cpus is not None:
+            self._set_affinity(self.cpus, 'control')
+
+        if self.lock_memory:
+            self._lock_memory()
+
+    def apply_io_thread(self) -> None:
+        '''実行中のスレッドを通信・ログ書き込みのスレッドとして設定する。
+        通信スレッドを停止させないように、設定に失敗しても例外は送出しない。
+        '''
+        if self.io_cpus is not None:
+            self._set_affinity(self.io_cpus, 'io', strict=False)
+
+    def _set_affinity(self, cpus: 'List[int]', name: str, strict: bool = True) -> None:
+        import os
+
+        if not hasattr(os, 'sched_setaffinity'):
+            self._report('os.sched_setaffinity is not supported on this platform', strict)
+            return
+
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            self._report('sched_setaffinity({}, cpus={}): {}'.format(name, list(cpus), e), strict)
+
+    def _lock_memory(self) -> None:
+        import os
+
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            mlockall = libc.mlockall
+        except (ImportError, OSError, AttributeError) as e:
+            self._report('mlockall is not supported on this platform: {}'.format(e))
+            return
+
+        if mlockall(_MCL_CURRENT | _MCL_FUTURE) != 0:
+            errno = ctypes.get_errno()
+            self._report('mlockall: {} (check RLIMIT_MEMLOCK or CAP_IPC_LOCK)'.format(
+                os.strerror(errno)))
+
+
+# ETRobo.dispatch()の実行中に適用される設定
+_SETTINGS = None  # type: Optional[RealtimeSettings]
+
+
+def set_settings(settings: 'Optional[RealtimeSettings]') -> None:
+    '''実行中の制御プログラムに適用する設定を登録する（Noneの場合は解除する）。
+    '''
+    global _SETTINGS
+    _SETTINGS = settings
+
+
+def configure_control_thread() -> None:
+    '''設定が登録されていれば、実行中のスレッドを制御スレッドとして設定する。
+    制御ハンドラを実行するスレッドで、最初の周期の前に実行される。
+    '''
+    if _SETTINGS is not None:
+        _SETTINGS.apply_control_thread()
+
+
+def configure_io_thread() -> None:
+    '''設定が登録されていれば、実行中のスレッドを通信・ログ書き込みのスレッドとして設定する。
+    通信スレッドやログの書き込みスレッドの開始時に実行される。
+    '''
+    if _SETTINGS is not None:
+        _SETTINGS.apply_io_thread()
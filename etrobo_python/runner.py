@@ -0,0 +1,313 @@
+from .binding import bind_handler
+from .collector import GarbageCollector
+from .coroutine import TickLoop, is_coroutine_handler
+from .device import Device
+from .log import LogWriter
+from .offload import OffloadedHandler
+from .realtime import configure_control_thread
+from .scheduler import _get_clock
+from .snapshot import SnapshotCache
+from .stats import DispatchStats
+
+try:
+    from typing import Any, Callable, Dict, List, Optional, Tuple  # noqa
+except BaseException:
+    pass
+
+
+def _get_handler_name(handler: 'Callable[..., None]') -> str:
+    if hasattr(handler, '__name__'):
+        return handler.__name__
+    else:
+        return handler.__class__.__name__
+
+
+class _RateGroup(object):
+    # 同じ実行間隔の制御ハンドラのグループ
+    # 基本周期のdivisor回に1回実行される
+    def __init__(self, divisor: int, period: int, name: str) -> None:
+        self.divisor = divisor
+        self.period = period
+        self.name = name
+        self.indices = []  # type: List[int]
+        self.slot = -1
+
+        # 実行した回数、実行時間が実行間隔を超えた回数、実行できなかった回数
+        self.runs = 0
+        self.overruns = 0
+        self.missed = 0
+
+
+class HandlerRunner(object):
+    '''登録された制御ハンドラを1周期ごとに実行するクラス。
+    各バックエンドのDispatcherは、周期ごとにrun()を実行する。
+    制御ハンドラを実行した後、ログファイルが指定されていればデバイスの値を書き込む。
+    制御ハンドラには、引数名で指定されたデバイスだけが渡される（引数の組み立ては最初に1回だけ行う）。
+
+    制御ハンドラごとに基本周期の何倍の間隔で実行するか（divisor）を指定できる。
+    実行間隔が同じ制御ハンドラは1つのグループとして扱われ、
+    それぞれのグループは基本周期の倍数の時刻（周期の番号がdivisorで割り切れる周期）に実行される。
+    同じ周期に実行される制御ハンドラは、常に登録された順番で実行される。
+
+    コルーチン関数（async def）の制御ハンドラは、通常の制御ハンドラを実行した後に
+    イベントループ（TickLoop）を1周期分だけ進めることで実行される。
+
+    Args:
+        devices: デバイスのリスト。
+        handlers: 制御ハンドラのリスト。
+        logfile: ログデータを保存するファイルのパス。
+        log_options: LogWriterに渡される引数。
+        stats: 実行時間を記録するオブジェクト。Noneの場合は記録しない。
+        interval: 基本周期（単位は秒）。
+        divisors: 制御ハンドラごとの実行間隔（基本周期の倍数）。Noneの場合はすべて1。
+        snapshot: Trueの場合は周期ごとにデバイスの値をキャッシュする（SnapshotCacheを参照）。
+        gc_mode: ガベージコレクションの制御方法（GarbageCollectorを参照）。Noneの場合は制御しない。
+    '''
+
+    def __init__(
+        self,
+        devices: 'List[Tuple[str, Device]]',
+        handlers: 'List[Callable[..., None]]',
+        logfile: 'Optional[str]' = None,
+        log_options: 'Optional[Dict[str, Any]]' = None,
+        stats: 'Optional[DispatchStats]' = None,
+        interval: float = 0.01,
+        divisors: 'Optional[List[int]]' = None,
+        snapshot: bool = False,
+        gc_mode: 'Optional[str]' = None,
+    ) -> None:
+        self.variables = {name: device for name, device in devices}
+        self.devices = [device for _, device in devices]
+        self.stats = stats
+        self.clock = stats.clock if stats is not None else _get_clock()
+
+        # 周期ごとにデバイスの値をキャッシュするオブジェクト（使用しない場合はNone）
+        self.snapshot = None  # type: Optional[SnapshotCache]
+        if snapshot:
+            self.snapshot = SnapshotCache(self.devices)
+
+        # ガベージコレクションを制御するオブジェクト（使用しない場合はNone）
+        self.collector = None  # type: Optional[GarbageCollector]
+        if gc_mode is not None:
+            self.collector = GarbageCollector(gc_mode, interval, stats)
+
+        self.writer = None  # type: Optional[LogWriter]
+        if logfile is not None:
+            self.writer = LogWriter(logfile, devices, **(log_options or {}))
+
+        if divisors is None:
+            divisors = [1] * len(handlers)
+        elif len(divisors) != len(handlers):
+            raise ValueError('The number of divisors does not match the number of handlers.')
+
+        for divisor in divisors:
+            if divisor < 1:
+                raise ValueError('Invalid handler divisor: {}'.format(divisor))
+
+        # コルーチンの制御ハンドラは、周期ごとに1回だけ進めるイベントループで実行する
+        self.tick_loop = None  # type: Optional[TickLoop]
+        self.handlers = []  # type: List[Callable[..., None]]
+        handler_divisors = []  # type: List[int]
+
+        for handler, divisor in zip(handlers, divisors):
+            if is_coroutine_handler(handler):
+                if self.tick_loop is None:
+                    self.tick_loop = TickLoop(interval)
+
+                function, arguments = bind_handler(handler, self.variables)
+                self.tick_loop.add(function, arguments)
+            else:
+                self.handlers.append(handler)
+                handler_divisors.append(divisor)
+
+        divisors = handler_divisors
+
+        # 制御ハンドラごとに、引数で指定されたデバイスだけを渡す関数と引数を作成しておく
+        self.calls = [bind_handler(handler, self.variables) for handler in self.handlers]
+
+        self.tick = -1
+        self.groups = []  # type: List[_RateGroup]
+
+        for index, divisor in enumerate(divisors):
+            group = None
+            for candidate in self.groups:
+                if candidate.divisor == divisor:
+                    group = candidate
+                    break
+
+            if group is None:
+                group = _RateGroup(
+                    divisor, int(divisor * interval * 1000000000),
+                    'group:{:g}ms'.format(divisor * interval * 1000))
+                self.groups.append(group)
+
+            group.indices.append(index)
+
+        self.groups.sort(key=lambda g: g.divisor)
+        self.multirate = len(self.groups) > 1 or any(g.divisor != 1 for g in self.groups)
+
+        # 実行時間を記録するヒストグラム（同じ名前の制御ハンドラは番号で区別する）
+        if stats is not None:
+            names = [_get_handler_name(handler) for handler in self.handlers]
+            self.handler_histograms = [
+                stats.get_histogram('handler:{}'.format(
+                    name if names.count(name) == 1 else '{}[{}]'.format(name, i)))
+                for i, name in enumerate(names)]
+            self.log_histogram = stats.get_histogram('log_write')
+            self.jitter_histogram = stats.get_histogram('tick_jitter')
+
+            if self.tick_loop is not None:
+                self.coroutine_histogram = stats.get_histogram('coroutines')
+
+    def run(self, lateness: 'Optional[int]' = None, elapsed: int = 1) -> None:
+        '''制御ハンドラを実行し、ログデータを書き込む。
+
+        Args:
+            lateness: 実行開始時刻の予定時刻からの遅れ（単位はナノ秒）。
+                statsが指定されている場合に記録される。
+            elapsed: 前回の実行から経過した基本周期の数（周期を飛ばした場合は2以上）。
+        '''
+        # 最初の周期の前に、実行中のスレッドに実時間制御の設定を適用する
+        if self.tick < 0:
+            configure_control_thread()
+
+            if self.collector is not None:
+                self.collector.start()
+
+        collector = self.collector
+        if collector is not None:
+            tick_time = self.clock()
+            collector.begin_tick()
+
+        self.tick += elapsed
+
+        if self.snapshot is not None:
+            self.snapshot.invalidate()
+
+        if self.multirate:
+            self._run_groups(lateness)
+        elif self.stats is not None:
+            self._run_with_stats(lateness)
+        else:
+            for function, arguments in self.calls:
+                function(*arguments)
+
+        if self.tick_loop is not None:
+            if self.stats is not None:
+                start_time = self.clock()
+                self.tick_loop.step(elapsed)
+                self.coroutine_histogram.add((self.clock() - start_time) // 1000)
+            else:
+                self.tick_loop.step(elapsed)
+
+        if self.writer is not None:
+            if self.stats is not None:
+                start_time = self.clock()
+                self.writer.write(self.devices)
+                self.log_histogram.add((self.clock() - start_time) // 1000)
+            else:
+                self.writer.write(self.devices)
+
+        if collector is not None:
+            collector.end_tick(self.clock() - tick_time, self.clock)
+
+    def _run_groups(self, lateness: 'Optional[int]') -> None:
+        # この周期に実行するグループの制御ハンドラを登録された順番に並べる
+        groups = []
+        indices = []
+
+        for group in self.groups:
+            slot = self.tick // group.divisor
+            if slot == group.slot:
+                continue
+
+            # 実行時刻を飛ばした場合は、実行できなかった回数として数える
+            if group.slot >= 0 and slot - group.slot > 1:
+                group.missed += slot - group.slot - 1
+                if self.stats is not None:
+                    self.stats.count('{}:missed'.format(group.name), slot - group.slot - 1)
+
+            group.slot = slot
+            group.runs += 1
+            groups.append(group)
+            indices.extend(group.indices)
+
+        if len(groups) == 0:
+            return
+
+        indices.sort()
+
+        # グループごとの実行時間を計測し、実行間隔を超えた場合は超過として数える
+        clock = self.clock
+        elapsed_times = {}  # type: Dict[int, int]
+
+        if self.stats is not None and lateness is not None:
+            self.jitter_histogram.add(lateness // 1000)
+
+        for index in indices:
+            function, arguments = self.calls[index]
+            start_time = clock()
+            function(*arguments)
+            elapsed_time = clock() - start_time
+
+            if self.stats is not None:
+                self.handler_histograms[index].add(elapsed_time // 1000)
+
+            elapsed_times[index] = elapsed_time
+
+        for group in groups:
+            total_time = sum(elapsed_times[index] for index in group.indices)
+            if total_time > group.period:
+                group.overruns += 1
+                if self.stats is not None:
+                    self.stats.count('{}:overruns'.format(group.name))
+
+    def _run_with_stats(self, lateness: 'Optional[int]') -> None:
+        clock = self.clock
+
+        if lateness is not None:
+            self.jitter_histogram.add(lateness // 1000)
+
+        for (function, arguments), histogram in zip(self.calls, self.handler_histograms):
+            start_time = clock()
+            function(*arguments)
+            histogram.add((clock() - start_time) // 1000)
+
+    def get_group_stats(self) -> 'Dict[str, Dict[str, int]]':
+        '''実行間隔ごとのグループの実行回数を取得する。
+
+        Returns:
+            グループの名前をキーとする辞書。
+            値はruns（実行した回数）, overruns（実行時間が実行間隔を超えた回数）,
+            missed（実行できなかった回数）の辞書。
+        '''
+        return {
+            group.name: {'runs': group.runs, 'overruns': group.overruns, 'missed': group.missed}
+            for group in self.groups}
+
+    def close(self) -> None:
+        '''ログファイルを閉じ、別のスレッドで実行されている制御ハンドラとコルーチンを停止する。
+        '''
+        if self.tick_loop is not None:
+            self.tick_loop.close()
+
+        for handler in self.handlers:
+            if isinstance(handler, OffloadedHandler):
+                handler.close()
+
+                # 計算結果の古さ（周期の数）と破棄されたスナップショットの数を記録する
+                if self.stats is not None:
+                    name = 'offload:{}'.format(_get_handler_name(handler))
+                    values = handler.get_stats()
+                    self.stats.count('{}:dropped'.format(name), int(values['dropped']))
+                    self.stats.count('{}:max_staleness'.format(name), int(values['max_staleness']))
+
+        if self.writer is not None:
+            self.writer.close()
+
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+        if self.collector is not None:
+            self.collector.stop()
+
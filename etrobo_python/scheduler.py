@@ -0,0 +1,142 @@
+import time
+
+try:
+    from typing import Any, Callable, Dict  # noqa
+except BaseException:
+    pass
+
+
+# 1秒あたりのナノ秒
+_NANOSECONDS = 1000000000
+
+
+def _get_clock() -> 'Callable[[], int]':
+    # 単調増加する時刻（ナノ秒）を返す関数を取得する
+    # monotonic_nsが使えない環境（micropythonなど）では利用可能な時刻で代用する
+    if hasattr(time, 'monotonic_ns'):
+        return time.monotonic_ns
+    elif hasattr(time, 'monotonic'):
+        return lambda: int(time.monotonic() * _NANOSECONDS)
+    else:
+        return lambda: int(time.time() * _NANOSECONDS)
+
+
+# 実行周期を超過した場合の動作
+# skip: 超過した周期を実行せず、次の周期の時刻に合わせて実行する
+# catch_up: 超過した周期を待機せずに続けて実行し、遅れを取り戻す
+# run_late: 超過した時点から周期を数え直す（以降の実行時刻がずれる）
+OVERRUN_POLICIES = ('skip', 'catch_up', 'run_late')
+
+
+class TickScheduler(object):
+    '''制御ハンドラを一定の周期で実行するためのスケジューラ。
+    単調増加する時刻を使って周期ごとの実行時刻（絶対時刻）を計算するため、
+    システム時刻の変更による影響を受けず、待機時間の誤差が蓄積しない。
+
+    **プログラム例**
+
+    .. code-block:: python
+
+        scheduler = TickScheduler(interval=0.01)
+
+        while True:
+            scheduler.wait()
+            handler()
+
+    Args:
+        interval: 実行周期（単位は秒）。
+        overrun: 処理が実行周期を超過した場合の動作（skip, catch_up, run_lateのいずれか）。
+        spin: 実行時刻の直前にスリープせずに時刻を確認し続ける時間（単位は秒）。
+            0より大きい値を指定するとスリープの誤差を小さくできるが、その間はCPUを占有する。
+    '''
+
+    def __init__(self, interval: float, overrun: str = 'skip', spin: float = 0.0) -> None:
+        if interval <= 0:
+            raise ValueError('Invalid interval: {}'.format(interval))
+        elif overrun not in OVERRUN_POLICIES:
+            raise ValueError('Invalid overrun policy: {}'.format(overrun))
+        elif spin < 0:
+            raise ValueError('Invalid spin time: {}'.format(spin))
+
+        self.clock = _get_clock()
+        self.interval = int(interval * _NANOSECONDS)
+        self.overrun = overrun
+        self.spin = int(spin * _NANOSECONDS)
+
+        # 次に実行する時刻（最初の周期は即座に実行する）
+        self.deadline = None  # type: Any
+
+        # 直前の周期の実行開始時刻の予定時刻からの遅れ（単位はナノ秒）
+        self.lateness = 0
+
+        # 実行した周期の数、周期を超過した回数、実行しなかった周期の数
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+
+    def wait(self) -> int:
+        '''次の実行時刻まで待機する。
+        前の処理が実行周期を超過していた場合は、overrunの設定にしたがって待機せずに戻る。
+
+        Returns:
+            前回の実行から経過した周期の数（最初の実行と超過していない場合は1）。
+        '''
+        now = self.clock()
+
+        if self.deadline is None:
+            self.deadline = now + self.interval
+            self.ticks += 1
+            return 1
+
+        deadline = self.deadline
+        elapsed = 1
+
+        if now < deadline:
+            # 実行時刻の直前まではスリープし、残りの時間は時刻を確認しながら待機する
+            sleep_time = deadline - now - self.spin
+            if sleep_time > 0:
+                time.sleep(sleep_time / _NANOSECONDS)
+
+            now = self.clock()
+            while now < deadline:
+                now = self.clock()
+
+            self.deadline = deadline + self.interval
+            self.lateness = now - deadline
+        elif now < deadline + self.interval:
+            # 実行時刻を過ぎているが次の周期には達していない
+            self.deadline = deadline + self.interval
+            self.lateness = now - deadline
+        else:
+            # 1周期以上超過している
+            missed = (now - deadline) // self.interval
+            self.overruns += 1
+
+            if self.overrun == 'skip':
+                self.deadline = deadline + (missed + 1) * self.interval
+                self.lateness = now - (deadline + missed * self.interval)
+                self.skipped_ticks += missed
+                elapsed += missed
+            elif self.overrun == 'catch_up':
+                self.deadline = deadline + self.interval
+                self.lateness = now - deadline
+            else:
+                self.deadline = now + self.interval
+                self.lateness = now - deadline
+
+        self.ticks += 1
+        return elapsed
+
+    def get_stats(self) -> 'Dict[str, int]':
+        '''スケジューラの統計情報を取得する。
+
+        Returns:
+            統計情報の辞書。
+            ticks（実行した周期の数）, overruns（周期を超過した回数）,
+            skipped_ticks（実行しなかった周期の数）を含む。
+        '''
+        return {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped_ticks': self.skipped_ticks,
+        }
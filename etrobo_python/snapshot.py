@@ -0,0 +1,109 @@
+from .device import ColorSensor, Device, GyroSensor, Hub, Motor, SonarSensor, TouchSensor
+
+try:
+    from typing import Any, Callable, Dict, List, Tuple  # noqa
+except BaseException:
+    pass
+
+
+# デバイスタイプごとにキャッシュする値の取得メソッドと、キャッシュを無効にするメソッドの定義
+# get_log_values()は全てのデバイスでキャッシュされる
+_SNAPSHOT_METHODS = (
+    (Hub, (
+        'get_time', 'get_battery_voltage', 'get_battery_current',
+        'is_left_button_pressed', 'is_right_button_pressed',
+        'is_up_button_pressed', 'is_down_button_pressed'), ()),
+    (Motor, ('get_count',), ('reset_count',)),
+    (ColorSensor, ('get_brightness', 'get_ambient', 'get_raw_color'), ()),
+    (TouchSensor, ('is_pressed',), ()),
+    (SonarSensor, ('listen', 'get_distance'), ()),
+    (GyroSensor, ('get_angle', 'get_angular_velocity'), ('reset',)),
+)  # type: Tuple[Tuple[type, Tuple[str, ...], Tuple[str, ...]], ...]
+
+
+def _get_snapshot_methods(device: Device) -> 'Tuple[Tuple[str, ...], Tuple[str, ...]]':
+    for device_class, getters, resetters in _SNAPSHOT_METHODS:
+        if isinstance(device, device_class):
+            return getters + ('get_log_values',), resetters
+
+    return ('get_log_values',), ()
+
+
+class SnapshotCache(object):
+    '''周期ごとにデバイスの値をキャッシュするクラス。
+    デバイスの値を取得するメソッド（get_brightness()やget_log_values()など）は、
+    周期の中で最初に実行されたときだけ実機（シミュレータ）から値を読み出し、
+    同じ周期の中で再び実行された場合はキャッシュした値を返す。
+    キャッシュは次の周期の開始時（invalidate()の実行時）に無効になる。
+
+    値は最初に読み出された時点のものであるため、Hub.get_time()も周期の中では同じ値を返す。
+    Motor.reset_count()やGyroSensor.reset()を実行した場合は、そのデバイスのキャッシュが無効になる。
+
+    Args:
+        devices: キャッシュの対象とするデバイスのリスト。
+    '''
+
+    def __init__(self, devices: 'List[Device]') -> None:
+        self.generation = 0
+        self.devices = devices
+        self.names = []  # type: List[List[str]]
+
+        for device in devices:
+            getters, resetters = _get_snapshot_methods(device)
+            records = []  # type: List[List[Any]]
+            names = []  # type: List[str]
+
+            for name in getters:
+                if hasattr(device, name):
+                    record = [-1, None]
+                    records.append(record)
+                    setattr(device, name, self._create_getter(getattr(device, name), record))
+                    names.append(name)
+
+            for name in resetters:
+                if hasattr(device, name):
+                    setattr(device, name, self._create_resetter(getattr(device, name), records))
+                    names.append(name)
+
+            self.names.append(names)
+
+    def _create_getter(
+        self,
+        function: 'Callable[[], Any]',
+        record: 'List[Any]',
+    ) -> 'Callable[[], Any]':
+        def getter() -> Any:
+            if record[0] != self.generation:
+                record[1] = function()
+                record[0] = self.generation
+
+            return record[1]
+
+        return getter
+
+    def _create_resetter(
+        self,
+        function: 'Callable[..., Any]',
+        records: 'List[List[Any]]',
+    ) -> 'Callable[..., Any]':
+        def resetter(*args: Any, **kwargs: Any) -> Any:
+            for record in records:
+                record[0] = -1
+
+            return function(*args, **kwargs)
+
+        return resetter
+
+    def invalidate(self) -> None:
+        '''キャッシュを無効にする（周期の開始時に実行する）。
+        '''
+        self.generation += 1
+
+    def close(self) -> None:
+        '''デバイスのメソッドを元に戻す。
+        '''
+        for device, names in zip(self.devices, self.names):
+            for name in names:
+                delattr(device, name)
+
+        self.names = [[] for _ in self.devices]
@@ -0,0 +1,197 @@
+from .scheduler import _get_clock
+
+try:
+    from typing import Any, Dict, List, Optional  # noqa
+except BaseException:
+    pass
+
+
+# ヒストグラムのビンの設定
+# 16us未満は1usごと、それ以上は2のべき乗ごとの区間を8分割したビンに値を数える（誤差は最大12.5%）
+_LINEAR_BINS = 16
+_SUB_BINS = 8
+_MAX_EXPONENT = 28
+_BIN_COUNT = _LINEAR_BINS + _MAX_EXPONENT * _SUB_BINS
+
+
+def _get_bin(value: int) -> int:
+    if value < _LINEAR_BINS:
+        return value if value > 0 else 0
+
+    exponent = 0
+    while value >= _LINEAR_BINS:
+        value >>= 1
+        exponent += 1
+
+    if exponent > _MAX_EXPONENT:
+        return _BIN_COUNT - 1
+
+    return _LINEAR_BINS + (exponent - 1) * _SUB_BINS + (value - _SUB_BINS)
+
+
+def _get_bin_value(index: int) -> int:
+    # ビンに含まれる値の上限を返す
+    if index < _LINEAR_BINS:
+        return index
+
+    exponent, mantissa = divmod(index - _LINEAR_BINS, _SUB_BINS)
+    return ((mantissa + _SUB_BINS + 1) << (exponent + 1)) - 1
+
+
+class Histogram(object):
+    '''時間（単位はマイクロ秒）の分布を記録する固定サイズのヒストグラム。
+    記録する値の数に関わらず使用するメモリの量は一定であり、値の記録にかかる時間も一定である。
+    '''
+
+    def __init__(self) -> None:
+        self.bins = [0] * _BIN_COUNT
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def add(self, value: int) -> None:
+        '''値を記録する。
+
+        Args:
+            value: 記録する値（単位はマイクロ秒）。
+        '''
+        self.bins[_get_bin(value)] += 1
+        self.count += 1
+        self.total += value
+
+        if value > self.maximum:
+            self.maximum = value
+
+    def get_percentile(self, percentile: float) -> int:
+        '''パーセンタイルを計算する。
+
+        Args:
+            percentile: パーセンタイル（0-100）。
+
+        Returns:
+            パーセンタイルの値（単位はマイクロ秒）。ビンの上限の値で近似される。
+        '''
+        if self.count == 0:
+            return 0
+
+        bins = list(self.bins)
+        target = sum(bins) * percentile / 100
+        cumsum = 0
+
+        for index, count in enumerate(bins):
+            cumsum += count
+            if count != 0 and cumsum >= target:
+                return min(_get_bin_value(index), self.maximum)
+
+        return self.maximum
+
+
+class DispatchStats(object):
+    '''制御プログラムの実行時間を記録するクラス。
+    ETRobo.dispatch()の引数にstats=Trueを指定した場合、以下の時間がヒストグラムに記録される。
+
+    - tick_jitter: 周期ごとの実行開始時刻の予定時刻からのずれ
+      （シミュレータとRasPykeでは受信したデータの時刻の予定時刻からの遅れ）
+    - handler:<名前>: 制御ハンドラごとの実行時間
+    - log_write: ログデータの書き込み時間
+    - connector_io: ロボット（シミュレータ）との通信にかかった時間
+    - connector_latency: シミュレータからパケットを受信してから制御ハンドラを実行するまでの時間
+
+    また、実行間隔を指定した制御ハンドラのグループごとに、
+    実行時間が実行間隔を超えた回数（group:<間隔>:overruns）と
+    実行できなかった回数（group:<間隔>:missed）が記録される。
+
+    実行中に別のスレッドからget_report()を実行して、その時点の統計量を取得することもできる。
+    '''
+
+    def __init__(self) -> None:
+        self.clock = _get_clock()
+        self.histograms = {}  # type: Dict[str, Histogram]
+        self.counters = {}  # type: Dict[str, int]
+
+    def get_histogram(self, name: str) -> Histogram:
+        '''名前に対応するヒストグラムを取得する（存在しない場合は作成する）。
+
+        Args:
+            name: ヒストグラムの名前。
+
+        Returns:
+            ヒストグラム。
+        '''
+        histogram = self.histograms.get(name)
+
+        if histogram is None:
+            histogram = Histogram()
+            self.histograms[name] = histogram
+
+        return histogram
+
+    def add(self, name: str, elapsed: int) -> None:
+        '''時間を記録する。
+
+        Args:
+            name: ヒストグラムの名前。
+            elapsed: 記録する時間（単位はナノ秒）。
+        '''
+        self.get_histogram(name).add(elapsed // 1000)
+
+    def count(self, name: str, value: int = 1) -> None:
+        '''回数を記録する。
+
+        Args:
+            name: カウンタの名前。
+            value: 加算する値。
+        '''
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def get_counters(self) -> 'Dict[str, int]':
+        '''記録された回数を取得する。
+
+        Returns:
+            カウンタの名前をキーとする辞書。
+        '''
+        return dict(self.counters)
+
+    def get_report(self) -> 'Dict[str, Dict[str, float]]':
+        '''記録された時間の統計量を取得する。
+
+        Returns:
+            ヒストグラムの名前をキーとする辞書。
+            値はcount, mean, p50, p95, p99, max（countを除き単位はミリ秒）の辞書。
+        '''
+        report = {}
+
+        for name, histogram in list(self.histograms.items()):
+            count = histogram.count
+            report[name] = {
+                'count': count,
+                'mean': histogram.total / count / 1000 if count > 0 else 0.0,
+                'p50': histogram.get_percentile(50) / 1000,
+                'p95': histogram.get_percentile(95) / 1000,
+                'p99': histogram.get_percentile(99) / 1000,
+                'max': histogram.maximum / 1000,
+            }
+
+        return report
+
+    def format_report(self) -> str:
+        '''記録された時間の統計量を表形式の文字列として取得する。
+
+        Returns:
+            統計量の文字列。
+        '''
+        lines = ['{:<24} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+            'name', 'count', 'mean(ms)', 'p50(ms)', 'p95(ms)', 'p99(ms)', 'max(ms)')]
+
+        for name, values in self.get_report().items():
+            if values['count'] == 0:
+                continue
+
+            lines.append('{:<24} {:>8} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f}'.format(
+                name, values['count'], values['mean'],
+                values['p50'], values['p95'], values['p99'], values['max']))
+
+        for name, value in sorted(self.get_counters().items()):
+            lines.append('{:<24} {:>8}'.format(name, value))
+
+        return '\n'.join(lines)
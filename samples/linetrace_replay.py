@@ -0,0 +1,11 @@
+import argparse
+from linetrace_simulator import run
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('replayfile', type=str, help='Path to log file recorded by linetrace_simulator.py')
+    parser.add_argument('--resultfile', type=str, default=None, help='Path to result file of motor commands')
+    parser.add_argument('--speed', type=float, default=0.0, help='Replay speed (0: as fast as possible)')
+    args = parser.parse_args()
+    run(backend='replay', target=17, power=50, pid_p=0.2,
+        replayfile=args.replayfile, resultfile=args.resultfile, speed=args.speed)
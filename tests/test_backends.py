@@ -0,0 +1,84 @@
+import types
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+
+from etrobo_python import ETRobo, Hub, backends
+from etrobo_python.backends import get_backend_names, load_backend, register_backend
+from etrobo_python.runner import HandlerRunner
+
+
+class PluginDispatcher(object):
+    def __init__(
+        self,
+        devices: List[Tuple[str, Any]],
+        handlers: List[Callable[..., None]],
+        interval: float,
+        ticks: int,
+        **kwargs: Any,
+    ) -> None:
+        self.runner = HandlerRunner(
+            devices=devices,
+            handlers=handlers,
+            logfile=kwargs['logfile'],
+            log_options=kwargs['log_options'],
+            stats=kwargs['stats'],
+            interval=interval,
+            divisors=kwargs['divisors'],
+            snapshot=kwargs['snapshot'],
+            gc_mode=kwargs['gc_mode'])
+        self.ticks = ticks
+
+    def dispatch(self) -> None:
+        try:
+            for _ in range(self.ticks):
+                self.runner.run()
+        finally:
+            self.runner.close()
+
+
+def create_dispatcher(
+    devices: List[Tuple[str, Any]],
+    handlers: List[Callable[..., None]],
+    interval: float = 0.01,
+    ticks: int = 1,
+    **kwargs: Any,
+) -> PluginDispatcher:
+    return PluginDispatcher(devices, handlers, interval, ticks, **kwargs)
+
+
+def create_device(device_type: str, port: str) -> Any:
+    return Hub()
+
+
+def test_plugin_backend(monkeypatch: Any) -> None:
+    monkeypatch.setattr(backends, '_REGISTERED_BACKENDS', {})
+
+    # 文書化された引数（**kwargsを含む）だけを持つバックエンドで実行できる
+    register_backend('plugin', types.SimpleNamespace(
+        create_device=create_device, create_dispatcher=create_dispatcher))
+    assert 'plugin' in get_backend_names()
+
+    calls = []  # type: List[Dict[str, Any]]
+
+    def handler(hub: Hub) -> None:
+        calls.append({'hub': hub})
+
+    robot = ETRobo(backend='plugin').add_hub('hub').add_handler(handler)
+    robot.dispatch(interval=0.01, ticks=5, stats=True)
+
+    assert len(calls) == 5
+    assert robot.stats.get_histogram('handler:handler').count == 5
+
+
+def test_unknown_backend() -> None:
+    with pytest.raises(NotImplementedError):
+        load_backend('unknown_backend')
+
+
+def test_invalid_backend(monkeypatch: Any) -> None:
+    monkeypatch.setattr(backends, '_REGISTERED_BACKENDS', {})
+    register_backend('invalid', types.SimpleNamespace(create_device=create_device))
+
+    with pytest.raises(ValueError, match='invalid'):
+        load_backend('invalid')
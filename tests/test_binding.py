@@ -0,0 +1,109 @@
+import inspect
+from typing import Any, Dict
+
+import pytest
+
+from etrobo_python import ETRobo, Motor
+from etrobo_python.binding import bind_handler, get_handler_parameters
+
+VARIABLES = {'hub': 'HUB', 'right_motor': 'RIGHT', 'left_motor': 'LEFT'}  # type: Dict[str, Any]
+
+
+def call(handler: Any, variables: Dict[str, Any] = VARIABLES) -> Any:
+    function, arguments = bind_handler(handler, variables)
+    return function(*arguments)
+
+
+def test_positional() -> None:
+    def handler(left_motor: Any, hub: Any) -> Any:
+        return left_motor, hub
+
+    assert get_handler_parameters(handler, list(VARIABLES)) == (['left_motor', 'hub'], [], False)
+    assert call(handler) == ('LEFT', 'HUB')
+
+    # キーワード引数がない場合は制御ハンドラをそのまま実行する
+    assert bind_handler(handler, VARIABLES) == (handler, ('LEFT', 'HUB'))
+
+
+def test_unknown_name() -> None:
+    def handler(hub: Any, arm_motor: Any) -> None:
+        pass
+
+    with pytest.raises(ValueError, match='arm_motor'):
+        get_handler_parameters(handler, list(VARIABLES))
+
+    with pytest.raises(ValueError, match='arm_motor'):
+        bind_handler(handler, VARIABLES)
+
+
+def test_omitted_default() -> None:
+    # 登録されていない名前の引数はデフォルト値を使い、後ろの引数はキーワード引数として渡す
+    def handler(hub: Any, gain: float = 0.5, right_motor: Any = None) -> Any:
+        return hub, gain, right_motor
+
+    assert get_handler_parameters(handler, list(VARIABLES)) == (['hub'], ['right_motor'], False)
+    assert call(handler) == ('HUB', 0.5, 'RIGHT')
+
+
+def test_keyword_only() -> None:
+    def handler(hub: Any, *, left_motor: Any) -> Any:
+        return hub, left_motor
+
+    assert get_handler_parameters(handler, list(VARIABLES)) == (['hub'], ['left_motor'], False)
+    assert call(handler) == ('HUB', 'LEFT')
+
+
+def test_var_keyword() -> None:
+    # **kwargsには引数名で指定されていないすべてのデバイスが渡される
+    def handler(hub: Any, **devices: Any) -> Any:
+        return hub, devices
+
+    assert get_handler_parameters(handler, list(VARIABLES)) == (['hub'], [], True)
+    assert call(handler) == ('HUB', {'right_motor': 'RIGHT', 'left_motor': 'LEFT'})
+
+
+def test_skip() -> None:
+    # 先頭の引数にはデバイス以外の値を渡す
+    def apply(result: Any, right_motor: Any) -> Any:
+        return result, right_motor
+
+    function, arguments = bind_handler(apply, VARIABLES, skip=1)
+    assert function(10, *arguments) == (10, 'RIGHT')
+
+
+def test_without_signature(monkeypatch: Any) -> None:
+    # inspect.signature()を使えない場合（micropythonなど）は、すべてのデバイスをキーワード引数として渡す
+    def unsupported(handler: Any) -> Any:
+        raise AttributeError('signature')
+
+    monkeypatch.setattr(inspect, 'signature', unsupported)
+
+    def handler(hub: Any, right_motor: Any, left_motor: Any) -> Any:
+        return hub, right_motor, left_motor
+
+    def var_keyword(**devices: Any) -> Any:
+        return devices
+
+    assert get_handler_parameters(handler, list(VARIABLES)) is None
+    assert call(handler) == ('HUB', 'RIGHT', 'LEFT')
+    assert call(var_keyword) == VARIABLES
+
+    # 引数を調べられないため、登録時には名前を確認しない
+    def unknown(hub: Any, arm_motor: Any) -> None:
+        pass
+
+    assert get_handler_parameters(unknown, list(VARIABLES)) is None
+
+
+def test_add_handler_order() -> None:
+    def handler(right_motor: Motor) -> None:
+        pass
+
+    # デバイスを登録する前に制御ハンドラを登録すると、登録されていないデバイスの名前としてエラーになる
+    with pytest.raises(ValueError, match='right_motor'):
+        ETRobo(backend='simulator').add_handler(handler)
+
+    etrobo = (ETRobo(backend='simulator')
+              .add_device('right_motor', device_type=Motor, port='B')
+              .add_handler(handler))
+    assert etrobo.handlers == [handler]
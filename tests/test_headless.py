@@ -0,0 +1,73 @@
+from typing import Any, List
+
+import pytest
+
+from etrobo_python import ColorSensor, ETRobo, GyroSensor, Hub, Motor
+from etrobo_python.backends.simulator.headless import HeadlessSimulator
+from etrobo_python.log import LogReader
+
+DURATION = 3.0
+INTERVAL = 0.01
+
+
+@pytest.mark.parametrize('engine, ports', [
+    ('thread', (54311, 54312)),
+    ('selector', (54321, 54322)),
+])
+def test_dispatch(tmp_path: Any, engine: str, ports: Any) -> None:
+    simulator = HeadlessSimulator(ports=ports, interval=INTERVAL, timeout=2.0)
+    simulator.start(duration=DURATION)
+
+    times = []  # type: List[float]
+
+    def tracer(
+        hub: Hub,
+        right_motor: Motor,
+        left_motor: Motor,
+        color_sensor: ColorSensor,
+        gyro_sensor: GyroSensor,
+    ) -> None:
+        turn = (color_sensor.get_brightness() - 42) * 8 // 10
+        right_motor.set_power(40 - turn)
+        left_motor.set_power(40 + turn)
+        gyro_sensor.get_angle()
+        times.append(hub.get_time())
+
+    robot = (ETRobo(backend='simulator')
+             .add_hub('hub')
+             .add_device('right_motor', device_type=Motor, port='B')
+             .add_device('left_motor', device_type=Motor, port='C')
+             .add_device('color_sensor', device_type=ColorSensor, port='2')
+             .add_device('gyro_sensor', device_type=GyroSensor, port='4')
+             .add_handler(tracer))
+
+    logfile = str(tmp_path / 'run.log')
+    robot.dispatch(
+        interval=INTERVAL, ports=ports, timeout=0.3, engine=engine, logfile=logfile, stats=True)
+    simulator.join()
+
+    # シミュレーション時間の周期ごとに1回ずつ制御ハンドラが実行される
+    ticks = int(DURATION / INTERVAL)
+    assert ticks <= len(times) <= ticks + 1
+    assert simulator.replies == len(times)
+
+    # 最初の周期はシミュレーションの最初のパケット（2.5ms）から始まり、その後は10msごとに実行される
+    milliseconds = [round(t * 1000) for t in times]
+    assert milliseconds[0] < 10
+    assert all(t2 - t1 == 10 for t1, t2 in zip(milliseconds[1:-1], milliseconds[2:]))
+
+    # ログファイルには制御ハンドラを実行した周期ごとのフレームが記録される
+    with LogReader(logfile) as reader:
+        assert [name for name, _ in reader.get_devices()] == [
+            'hub', 'right_motor', 'left_motor', 'color_sensor', 'gyro_sensor']
+        assert reader.get_frame_count() == len(times)
+
+        # ログの時刻はミリ秒単位に切り捨てられる
+        log_times = [reader._get_time(frame) for frame in reader]
+        assert len(log_times) == len(milliseconds)
+        assert all(0 <= t2 - t1 <= 1 for t1, t2 in zip(log_times, milliseconds))
+
+    # ラインに沿って走行している
+    model = simulator.model
+    assert simulator.line_map.get_line_distance(*model.get_sensor_position()) < 0.05
+    assert model.get_count(0) > 0
@@ -0,0 +1,194 @@
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from etrobo_python import Hub, Motor
+from etrobo_python.log import LogReader, LogWriter
+
+FRAMES = 300
+
+OPTIONS = [
+    pytest.param({'version': 1}, id='v1'),
+    pytest.param({}, id='raw'),
+    pytest.param({'compression': 'zlib', 'block_frames': 64}, id='zlib'),
+    pytest.param({'compression': 'lzma', 'block_frames': 64}, id='lzma'),
+    pytest.param({'compression': 'delta'}, id='delta'),
+]
+
+
+class LogHub(Hub):
+    def __init__(self) -> None:
+        self.time = 0
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.time, self.time // 10 % 4)
+
+
+class LogMotor(Motor):
+    def __init__(self) -> None:
+        self.count = 0
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.count,)
+
+
+def write_log(path: Any, frames: int = FRAMES, **options: Any) -> List[List[bytes]]:
+    '''10ミリ秒ごとのフレームを書き込み、書き込んだデータのリストを返す。
+    '''
+    hub = LogHub()
+    motor = LogMotor()
+    expected = []
+
+    with LogWriter(path, [('hub', hub), ('motor', motor)], index_interval=10, **options) as writer:
+        for i in range(frames):
+            hub.time = i * 10
+            motor.count = i * i - 50 * i
+            writer.write([hub, motor])
+            expected.append([hub.get_log(), motor.get_log()])
+
+    return expected
+
+
+def read_all(path: Any) -> List[List[bytes]]:
+    with LogReader(path) as reader:
+        return [[bytes(d) for d in data] for data in reader]
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_round_trip(tmp_path: Any, options: Dict[str, Any]) -> None:
+    path = tmp_path / 'run.log'
+    expected = write_log(path, **options)
+
+    with LogReader(path) as reader:
+        assert reader.get_devices() == [('hub', 'hub'), ('motor', 'motor')]
+        assert reader.get_frame_count() == FRAMES
+
+    assert read_all(path) == expected
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_seek_time(tmp_path: Any, options: Dict[str, Any]) -> None:
+    path = tmp_path / 'run.log'
+    expected = write_log(path, **options)
+
+    with LogReader(path) as reader:
+        assert reader.seek_time(0.0) == 0
+        assert reader.seek_time(0.5) == 50
+        assert reader.seek_time(0.505) == 51
+        assert reader.seek_time(2.99) == FRAMES - 1
+        assert [bytes(d) for d in reader.read()] == expected[-1]  # type: ignore
+
+        # 最後のフレームよりも後の時刻の場合は末尾に移動する
+        assert reader.seek_time(100.0) == FRAMES
+        assert reader.read() is None
+
+        # 移動した位置から続けて読み込める
+        assert reader.seek_time(1.0) == 100
+        assert [bytes(d) for d in reader.read()] == expected[100]  # type: ignore
+        assert [bytes(d) for d in reader.read()] == expected[101]  # type: ignore
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_read_range(tmp_path: Any, options: Dict[str, Any]) -> None:
+    path = tmp_path / 'run.log'
+    expected = write_log(path, **options)
+
+    with LogReader(path) as reader:
+        def read_range(t0: float, t1: float) -> List[List[bytes]]:
+            return [[bytes(d) for d in data] for data in reader.read_range(t0, t1)]
+
+        # 開始時刻を含み、終了時刻を含まない
+        assert read_range(0.5, 0.6) == expected[50:60]
+        assert read_range(0.505, 0.6) == expected[51:60]
+        assert read_range(-1.0, 0.01) == expected[:1]
+        assert read_range(2.99, 100.0) == expected[-1:]
+        assert read_range(0.5, 0.5) == []
+        assert read_range(100.0, 200.0) == []
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_truncated_frame(tmp_path: Any, options: Dict[str, Any]) -> None:
+    path = tmp_path / 'run.log'
+    expected = write_log(path, **options)
+
+    # 書き込みの途中で終了したファイルとして、最後のフレームの途中までを残す
+    with LogReader(path) as reader:
+        frame_size = sum(len(d) for d in reader.read())  # type: ignore
+
+    data = path.read_bytes()
+    size = len(data) if options.get('version') == 1 else _get_data_end(path)
+    path.write_bytes(data[:size - frame_size // 2])
+
+    frames = read_all(path)
+
+    if 'compression' in options and options['compression'] != 'delta':
+        # ブロック単位で圧縮されている場合は最後のブロックが失われる
+        assert len(frames) == FRAMES - FRAMES % 64
+    else:
+        assert len(frames) == FRAMES - 1
+
+    assert frames == expected[:len(frames)]
+
+
+def test_v1_compatibility(tmp_path: Any) -> None:
+    # 以前のバージョンのLogWriterと同じ形式（ヘッダのサイズ、ヘッダ、フレーム）でファイルを作成する
+    hub = LogHub()
+    motor = LogMotor()
+    header = 'hub:hub,motor:motor'.encode('utf-8')
+    expected = []
+
+    for i in range(FRAMES):
+        hub.time = i * 10
+        motor.count = -i
+        expected.append([hub.get_log(), motor.get_log()])
+
+    path = tmp_path / 'run.log'
+    path.write_bytes(
+        len(header).to_bytes(2, 'big') + header + b''.join(b''.join(data) for data in expected))
+
+    with LogReader(path) as reader:
+        assert reader.version == 1
+        assert reader.get_encoding() == 'raw'
+        assert reader.get_devices() == [('hub', 'hub'), ('motor', 'motor')]
+        assert reader.get_frame_count() == FRAMES
+        assert [s.unpack(d) for s, d in zip(reader.get_structs(), reader.read())] == [  # type: ignore
+            (0, 0), (0,)]
+        assert reader.seek_time(1.0) == 100
+
+    assert read_all(path) == expected
+
+    # LogWriterのバージョン1の形式は以前の形式と同じ
+    write_log(tmp_path / 'new.log', version=1)
+    assert (tmp_path / 'new.log').read_bytes()[:2 + len(header)] == path.read_bytes()[:2 + len(header)]
+
+
+def test_invalid_options(tmp_path: Any) -> None:
+    devices = [('hub', LogHub())]  # type: List[Tuple[str, Any]]
+
+    with pytest.raises(ValueError):
+        LogWriter(tmp_path / 'a.log', devices, version=3)
+
+    with pytest.raises(ValueError):
+        LogWriter(tmp_path / 'b.log', devices, compression='bz2')
+
+    with pytest.raises(ValueError):
+        LogWriter(tmp_path / 'c.log', devices, version=1, compression='zlib')
+
+
+def _get_data_end(path: Any) -> int:
+    with LogReader(path) as reader:
+        return reader.data_end
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_without_perf_counter(tmp_path: Any, monkeypatch: Any, options: Dict[str, Any]) -> None:
+    # MicroPythonのようにtime.perf_counter()がない環境でも書き込みと読み込みができる
+    monkeypatch.delattr(time, 'perf_counter')
+
+    path = tmp_path / 'run.log'
+    expected = write_log(path, **options)
+
+    with LogReader(path) as reader:
+        assert [[bytes(d) for d in data] for data in reader] == expected
+        assert reader.get_stats()['elapsed_time'] >= 0
@@ -0,0 +1,81 @@
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from etrobo_python import Motor
+from etrobo_python.offload import OffloadedHandler
+
+
+class OffloadMotor(Motor):
+    def __init__(self) -> None:
+        self.count = 0
+
+    def get_log_values(self) -> Tuple[int, ...]:
+        return (self.count,)
+
+
+def double(snapshot: Dict[str, Tuple[int, ...]]) -> int:
+    return snapshot['motor'][0] * 2
+
+
+def run_until_applied(handler: OffloadedHandler, motor: OffloadMotor, results: List[int]) -> None:
+    # ワーカの計算結果が反映されるまで周期を実行する
+    for _ in range(200):
+        handler(motor=motor)
+        if len(results) != 0:
+            return
+
+        time.sleep(0.005)
+
+    raise AssertionError('The result was not applied.')
+
+
+def test_restart_after_close() -> None:
+    results = []  # type: List[int]
+
+    def apply(result: int, motor: Any) -> None:
+        results.append(result)
+
+    handler = OffloadedHandler(double, apply)
+    motor = OffloadMotor()
+    motor.count = 3
+
+    run_until_applied(handler, motor, results)
+    assert results[0] == 6
+    assert handler.thread is not None
+
+    handler.close()
+    assert handler.thread is None
+    assert handler.get_stats()['applied'] >= 1
+
+    # 同じ制御ハンドラで再び実行すると、新しいワーカが開始される
+    results.clear()
+    motor.count = 5
+    run_until_applied(handler, motor, results)
+
+    assert results[0] == 10
+    assert handler.thread is not None
+    assert handler.get_stats()['applied'] == len(results)
+
+    handler.close()
+
+
+def test_error_is_raised() -> None:
+    def fail(snapshot: Dict[str, Tuple[int, ...]]) -> int:
+        raise RuntimeError('worker failed')
+
+    handler = OffloadedHandler(fail, lambda result, motor: None)
+    motor = OffloadMotor()
+
+    with pytest.raises(RuntimeError, match='worker failed'):
+        for _ in range(200):
+            handler(motor=motor)
+            time.sleep(0.005)
+
+    handler.close()
+
+    # 停止した後は以前の例外を送出せずに再び実行できる
+    handler.worker = double
+    handler(motor=motor)
+    handler.close()
@@ -0,0 +1,91 @@
+import base64
+import sys
+import types
+from typing import Any, List, Optional, Tuple
+
+import pytest
+
+from etrobo_python.stats import DispatchStats
+
+
+class FakeSerial(object):
+    '''受信データの時刻のリストから観測データを返すシリアルポート。
+    '''
+    report_times = []  # type: List[int]
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.packets = [_make_packet(t) for t in self.report_times]
+
+    def reset_input_buffer(self) -> None:
+        pass
+
+    def read(self, size: int) -> bytes:
+        if len(self.packets) == 0:
+            return b''
+
+        return self.packets.pop(0)
+
+    def write(self, data: Any) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+def _make_packet(report_time: int) -> bytes:
+    data = bytearray(24)
+    data[0] = 0x7f
+    data[2:5] = report_time.to_bytes(3, 'big')
+    data[21] = 3
+    data[1] = 0x70 | sum(data[2:]) & 0x0f
+    return base64.b64encode(bytes(data))
+
+
+def run_connector(
+    monkeypatch: Any,
+    report_times: List[int],
+    stats: Optional[DispatchStats],
+) -> List[Tuple[int, int]]:
+    monkeypatch.setitem(sys.modules, 'serial', types.SimpleNamespace(Serial=FakeSerial))
+    monkeypatch.delitem(sys.modules, 'etrobo_python.backends.raspyke.connector', raising=False)
+    monkeypatch.setattr(FakeSerial, 'report_times', report_times)
+
+    from etrobo_python.backends.raspyke import connector
+
+    calls = []
+
+    def handler(lateness: int, elapsed: int) -> None:
+        calls.append((lateness, elapsed))
+
+    conn = connector._Connector(
+        handler=handler, interval=0.01, port='', baudrate=0, timeout=1.0, stats=stats)
+
+    # 受信データがなくなるとタイムアウトとして終了する
+    with pytest.raises(Exception, match='timeout'):
+        conn.run()
+
+    return calls
+
+
+@pytest.mark.parametrize('stats', [False, True])
+def test_ticks_from_report_time(monkeypatch: Any, stats: bool) -> None:
+    calls = run_connector(
+        monkeypatch, [0, 10, 20, 50, 60, 75, 93], DispatchStats() if stats else None)
+
+    # 受信データの時刻を予定時刻（最初の時刻から10ミリ秒ごと）と比較する
+    assert calls == [
+        (0, 1),
+        (0, 1),
+        (0, 1),
+        (0, 3),
+        (0, 1),
+        (0, 2),
+        (3_000_000, 1),
+    ]
+
+
+def test_early_report(monkeypatch: Any) -> None:
+    # 予定時刻よりも早い受信データも1つの周期として扱う
+    calls = run_connector(monkeypatch, [0, 4, 10, 33], None)
+
+    assert calls == [(0, 1), (0, 1), (0, 1), (3_000_000, 1)]
@@ -0,0 +1,55 @@
+from typing import List
+
+from etrobo_python import Hub
+from etrobo_python.runner import HandlerRunner
+from etrobo_python.stats import DispatchStats
+
+
+def make_runner(stats: DispatchStats, calls: List[str]) -> HandlerRunner:
+    def fast(hub: Hub) -> None:
+        calls.append('fast')
+
+    def slow(hub: Hub) -> None:
+        calls.append('slow')
+
+    return HandlerRunner(
+        devices=[('hub', Hub())],
+        handlers=[fast, slow],
+        stats=stats,
+        interval=0.01,
+        divisors=[1, 2])
+
+
+def test_missed_ticks() -> None:
+    stats = DispatchStats()
+    calls = []  # type: List[str]
+    runner = make_runner(stats, calls)
+
+    # 周期0, 1, 4を実行する（周期2と3は飛ばされる）
+    runner.run(0, 1)
+    runner.run(0, 1)
+    runner.run(5_000_000, 3)
+
+    assert runner.tick == 4
+    assert calls == ['fast', 'slow', 'fast', 'fast', 'slow']
+    assert runner.get_group_stats() == {
+        'group:10ms': {'runs': 3, 'overruns': 0, 'missed': 2},
+        'group:20ms': {'runs': 2, 'overruns': 0, 'missed': 1},
+    }
+    assert stats.counters['group:10ms:missed'] == 2
+    assert stats.counters['group:20ms:missed'] == 1
+    assert stats.get_histogram('tick_jitter').count == 3
+
+
+def test_no_missed_ticks() -> None:
+    stats = DispatchStats()
+    calls = []  # type: List[str]
+    runner = make_runner(stats, calls)
+
+    for _ in range(4):
+        runner.run(0, 1)
+
+    assert calls == ['fast', 'slow', 'fast', 'fast', 'slow', 'fast']
+    assert runner.get_group_stats()['group:10ms']['missed'] == 0
+    assert runner.get_group_stats()['group:20ms']['missed'] == 0
+    assert 'group:10ms:missed' not in stats.counters
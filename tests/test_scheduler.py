@@ -0,0 +1,127 @@
+from typing import Any, List, Tuple
+
+import pytest
+
+from etrobo_python import scheduler as scheduler_module
+from etrobo_python.scheduler import TickScheduler
+
+MS = 1_000_000
+
+
+class FakeClock(object):
+    '''time.sleep()を実行すると進む時刻（単位はナノ秒）。
+    '''
+
+    def __init__(self) -> None:
+        self.now = 0
+
+    def __call__(self) -> int:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += round(seconds * 1_000_000_000)
+
+
+def make_scheduler(monkeypatch: Any, overrun: str) -> Tuple[TickScheduler, FakeClock]:
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module.time, 'sleep', clock.sleep)
+
+    scheduler = TickScheduler(interval=0.01, overrun=overrun)
+    scheduler.clock = clock
+
+    return scheduler, clock
+
+
+def run_ticks(scheduler: TickScheduler, clock: FakeClock, times: List[int]) -> List[Tuple[int, int, int]]:
+    '''指定した時刻（単位はミリ秒）に処理が終わったとして待機し、
+    待機後の時刻と予定時刻からの遅れ、経過した周期の数を返す。
+    '''
+    results = []
+
+    for t in times:
+        clock.now = max(clock.now, t * MS)
+        elapsed = scheduler.wait()
+        results.append((clock.now // MS, scheduler.lateness // MS, elapsed))
+
+    return results
+
+
+@pytest.mark.parametrize('overrun', ['skip', 'catch_up', 'run_late'])
+def test_on_time(monkeypatch: Any, overrun: str) -> None:
+    scheduler, clock = make_scheduler(monkeypatch, overrun)
+
+    # 最初の周期は即座に実行し、以降は10msごとの予定時刻まで待機する
+    assert run_ticks(scheduler, clock, [0, 3, 14, 25]) == [
+        (0, 0, 1),
+        (10, 0, 1),
+        (20, 0, 1),
+        (30, 0, 1),
+    ]
+    assert scheduler.deadline == 40 * MS
+    assert scheduler.get_stats() == {'ticks': 4, 'overruns': 0, 'skipped_ticks': 0}
+
+
+@pytest.mark.parametrize('overrun', ['skip', 'catch_up', 'run_late'])
+def test_late_within_interval(monkeypatch: Any, overrun: str) -> None:
+    scheduler, clock = make_scheduler(monkeypatch, overrun)
+
+    # 予定時刻（10ms）を過ぎているが次の周期（20ms）には達していない
+    assert run_ticks(scheduler, clock, [0, 15, 0]) == [
+        (0, 0, 1),
+        (15, 5, 1),
+        (20, 0, 1),
+    ]
+    assert scheduler.overruns == 0
+
+
+def test_skip(monkeypatch: Any) -> None:
+    scheduler, clock = make_scheduler(monkeypatch, 'skip')
+
+    # 予定時刻（10ms）から27ms遅れた場合は、10msと20msの周期を飛ばして30msの周期として実行する
+    assert run_ticks(scheduler, clock, [0, 37, 0]) == [
+        (0, 0, 1),
+        (37, 7, 3),
+        (40, 0, 1),
+    ]
+    assert scheduler.deadline == 50 * MS
+    assert scheduler.get_stats() == {'ticks': 3, 'overruns': 1, 'skipped_ticks': 2}
+
+
+def test_catch_up(monkeypatch: Any) -> None:
+    scheduler, clock = make_scheduler(monkeypatch, 'catch_up')
+
+    # 遅れた周期を待機せずに続けて実行し、40msの周期で予定時刻に戻る
+    assert run_ticks(scheduler, clock, [0, 37, 0, 0, 0]) == [
+        (0, 0, 1),
+        (37, 27, 1),
+        (37, 17, 1),
+        (37, 7, 1),
+        (40, 0, 1),
+    ]
+    assert scheduler.deadline == 50 * MS
+    assert scheduler.get_stats() == {'ticks': 5, 'overruns': 2, 'skipped_ticks': 0}
+
+
+def test_run_late(monkeypatch: Any) -> None:
+    scheduler, clock = make_scheduler(monkeypatch, 'run_late')
+
+    # 超過した時刻（37ms）から周期を数え直す
+    assert run_ticks(scheduler, clock, [0, 37, 0, 0]) == [
+        (0, 0, 1),
+        (37, 27, 1),
+        (47, 0, 1),
+        (57, 0, 1),
+    ]
+    assert scheduler.deadline == 67 * MS
+    assert scheduler.get_stats() == {'ticks': 4, 'overruns': 1, 'skipped_ticks': 0}
+
+
+def test_invalid_arguments() -> None:
+    with pytest.raises(ValueError):
+        TickScheduler(interval=0)
+
+    with pytest.raises(ValueError):
+        TickScheduler(interval=0.01, overrun='drop')
+
+    with pytest.raises(ValueError):
+        TickScheduler(interval=0.01, spin=-1)
@@ -0,0 +1,72 @@
+'''複数のログファイルをまとめて集計するためのスクリプト。
+
+ディレクトリ（またはワイルドカード）で指定したログファイルをフィールドごとに集計し、
+最小値・最大値・平均値・標準偏差・パーセンタイルを出力する。
+ファイルごとの集計結果はディレクトリ内のサイドカーファイルに保存され、2回目以降は新しいファイルのみを読み込む。
+
+使用例:
+    python analyze_logs.py logs
+    python analyze_logs.py logs --fields gyro_sensor.velocity --days 7
+    python analyze_logs.py 'logs/*.log' --fields color_sensor.brightness --t0 0 --t1 5 --bins 20
+'''
+import argparse
+import json
+import os
+import time
+
+from etrobo_python.analytics import analyze_logs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', type=str, nargs='+',
+                        help='Directories, files or glob patterns of log files')
+    parser.add_argument('--pattern', type=str, default='*.log',
+                        help='File name pattern of log files in directories')
+    parser.add_argument('--fields', type=str, nargs='+', default=None,
+                        help='Fields to be analyzed (e.g. gyro_sensor.velocity)')
+    parser.add_argument('--t0', type=float, default=None,
+                        help='Start time of each run in seconds')
+    parser.add_argument('--t1', type=float, default=None,
+                        help='End time of each run in seconds')
+    parser.add_argument('--days', type=float, default=None,
+                        help='Analyze only files modified within the given number of days')
+    parser.add_argument('--percentiles', type=float, nargs='+', default=[50, 95, 99],
+                        help='Percentiles to be calculated')
+    parser.add_argument('--bins', type=int, default=None,
+                        help='Number of bins of histograms')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Number of worker processes')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write sidecar summary files')
+    parser.add_argument('--json', action='store_true',
+                        help='Output the results in JSON format')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    since = None if args.days is None else time.time() - args.days * 86400
+
+    statistics = analyze_logs(
+        args.paths, fields=args.fields, pattern=args.pattern, t0=args.t0, t1=args.t1,
+        since=since, percentiles=args.percentiles, bins=args.bins, jobs=args.jobs,
+        cache=not args.no_cache)
+
+    if args.json:
+        print(json.dumps(statistics, indent=2))
+        return
+
+    for key, stats in statistics.items():
+        percentiles = ' '.join(f'p{p:g}={v:g}' for p, v in stats['percentiles'].items())
+        print(f'{key}: count={stats["count"]} min={stats["min"]} max={stats["max"]} '
+              f'mean={stats["mean"]:.3f} std={stats["std"]:.3f} {percentiles}')
+
+        if 'histogram' in stats:
+            edges, counts = stats['histogram']['edges'], stats['histogram']['counts']
+            for i, count in enumerate(counts):
+                print(f'  [{edges[i]:.1f}, {edges[i + 1]:.1f}): {count}')
+
+
+if __name__ == '__main__':
+    main()
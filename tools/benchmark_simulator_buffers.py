@@ -0,0 +1,153 @@
+'''シミュレータのパケットの受け渡しにかかる時間を計測するためのスクリプト。
+
+受信スレッドから計算スレッドへパケットを渡す処理について、
+バッファをコピーする方法（以前の実装）と、バッファの参照を交換する方法（現在の実装）の時間を比較する。
+ソケットは使用せず、1つのスレッドで受信側と計算側の処理を交互に実行して、パケット1つあたりの時間を出力する。
+
+使用例:
+    python benchmark_simulator_buffers.py
+    python benchmark_simulator_buffers.py --packets 200000 --packet-interval 0.0025 --interval 0.01
+'''
+import argparse
+import struct
+import threading
+import time
+from typing import Callable, List
+
+from etrobo_python.backends.simulator.connector import _TIME_OFFSET, _TIME_STRUCT, SensorFrame
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packets', type=int, default=100000,
+                        help='Number of packets')
+    parser.add_argument('--packet-interval', type=float, default=0.0025,
+                        help='Interval of packets sent by the simulator in seconds')
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='Interval of the control handler in seconds')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of measurements')
+    return parser.parse_args()
+
+
+def make_packets(count: int, packet_interval: int) -> List[bytearray]:
+    packets = []
+
+    for i in range(count):
+        packet = bytearray(1024)
+        struct.pack_into('<Q', packet, _TIME_OFFSET, i * packet_interval)
+        packets.append(packet)
+
+    return packets
+
+
+def run_copy(packets: List[bytearray], interval: int) -> int:
+    '''受信したパケットを共有バッファにコピーし、計算スレッドが再びコピーする方法（以前の実装）。
+    '''
+    lock = threading.Lock()
+    recv_buffer = bytearray(1024)
+    recv_data = bytearray(1024)
+    frame = SensorFrame()
+    proc_time = -1
+    ticks = 0
+
+    for buffer in packets:
+        # 受信スレッド
+        with lock:
+            recv_time = struct.unpack_from('<Q', buffer, _TIME_OFFSET)[0]
+            recv_buffer[:] = buffer
+
+        # 計算スレッド
+        with lock:
+            time_slot = (recv_time // interval) * interval
+            if proc_time == time_slot:
+                continue
+
+            proc_time = time_slot
+            recv_data[:] = recv_buffer
+
+        frame.decode(recv_data)
+        ticks += 1
+
+    return ticks
+
+
+def run_swap(packets: List[bytearray], interval: int) -> int:
+    '''実行済みの周期のパケットを破棄し、バッファの参照を交換する方法（現在の実装）。
+    '''
+    lock = threading.Lock()
+    shared_buffer = bytearray(1024)
+    front_buffer = bytearray(1024)
+    frame = SensorFrame()
+    published = False
+    proc_time = -1
+    ticks = 0
+
+    for back_buffer in packets:
+        # 受信スレッド（実行済みの周期のパケットはコピーせずに破棄する）
+        recv_time = _TIME_STRUCT.unpack_from(back_buffer, _TIME_OFFSET)[0]
+        if (recv_time // interval) * interval == proc_time:
+            continue
+
+        with lock:
+            back_buffer, shared_buffer = shared_buffer, back_buffer
+            published = True
+
+        # 計算スレッド
+        with lock:
+            if not published:
+                continue
+
+            front_buffer, shared_buffer = shared_buffer, front_buffer
+            published = False
+
+        recv_time = _TIME_STRUCT.unpack_from(front_buffer, _TIME_OFFSET)[0]
+        time_slot = (recv_time // interval) * interval
+        if proc_time == time_slot:
+            continue
+
+        proc_time = time_slot
+        frame.decode(front_buffer)
+        ticks += 1
+
+    return ticks
+
+
+def measure(
+    function: Callable[[List[bytearray], int], int],
+    packets: List[bytearray],
+    interval: int,
+    repeat: int,
+) -> float:
+    times = []
+
+    for _ in range(repeat):
+        start_time = time.perf_counter_ns()
+        function(packets, interval)
+        times.append(time.perf_counter_ns() - start_time)
+
+    return sorted(times)[len(times) // 2] / len(packets)
+
+
+def main() -> None:
+    args = parse_args()
+    packet_interval = round(args.packet_interval * 1_000_000)
+    interval = round(args.interval * 1_000_000)
+    packets = make_packets(args.packets, packet_interval)
+
+    ticks = run_swap(packets, interval)
+    if ticks != run_copy(packets, interval):
+        raise Exception('The number of ticks does not match.')
+
+    copy_time = measure(run_copy, packets, interval, args.repeat)
+    swap_time = measure(run_swap, packets, interval, args.repeat)
+
+    print('packets: {} ticks: {} (discarded: {})'.format(len(packets), ticks, len(packets) - ticks))
+    print('{:<8} {:>14}'.format('method', 'ns/packet'))
+    print('{:<8} {:>14.1f}'.format('copy', copy_time))
+    print('{:<8} {:>14.1f}'.format('swap', swap_time))
+    print('speedup: {:.2f}x'.format(copy_time / swap_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+'''画面を持たないシミュレータ（HeadlessSimulator）を使って、ETRobo.dispatch() 全体の処理速度を計測するためのスクリプト。
+
+シミュレータを別のプロセスで起動し、制御プログラムの応答を待って次の周期に進む方法（rate=None）で
+ライントレースの制御プログラムを実行する。通信の方法（engine）ごとに、1秒あたりの周期の数と
+1周期あたりのCPU時間を出力する。ロボットの最終位置とラインからの距離を出力するため、動作確認にも使用できる。
+
+使用例:
+    python benchmark_simulator_dispatch.py
+    python benchmark_simulator_dispatch.py --duration 60 --engines selector --stats
+'''
+import argparse
+import multiprocessing
+import time
+from typing import Any, Dict, List
+
+from etrobo_python import ColorSensor, ETRobo, GyroSensor, Motor
+from etrobo_python.backends.simulator.headless import HeadlessSimulator
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help='Simulation time in seconds')
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='Interval of the control handler in seconds')
+    parser.add_argument('--engines', type=str, nargs='+', default=['thread', 'selector'],
+                        help='Engines to be measured')
+    parser.add_argument('--ports', type=int, nargs=2, default=[54201, 54202],
+                        help='Port numbers of the simulator and the control program')
+    parser.add_argument('--stats', action='store_true',
+                        help='Show the statistics of the control program')
+    return parser.parse_args()
+
+
+def run_simulator(args: argparse.Namespace, ready: Any, results: Any) -> None:
+    simulator = HeadlessSimulator(
+        ports=tuple(args.ports), interval=args.interval, timeout=5.0)
+    ready.set()
+    simulator.run(duration=args.duration)
+
+    model = simulator.model
+    results.put({
+        'replies': simulator.replies,
+        'x': model.x,
+        'y': model.y,
+        'line_distance': simulator.line_map.get_line_distance(*model.get_sensor_position()),
+    })
+
+
+def run_engine(engine: str, args: argparse.Namespace) -> Dict[str, Any]:
+    ready = multiprocessing.Event()
+    results: Any = multiprocessing.Queue()
+    simulator = multiprocessing.Process(target=run_simulator, args=(args, ready, results))
+    simulator.start()
+    ready.wait()
+
+    ticks: List[int] = [0]
+
+    def tracer(
+        right_motor: Motor,
+        left_motor: Motor,
+        color_sensor: ColorSensor,
+        gyro_sensor: GyroSensor,
+    ) -> None:
+        turn = int((color_sensor.get_brightness() - 42) * 0.8)
+        right_motor.set_power(40 - turn)
+        left_motor.set_power(40 + turn)
+        gyro_sensor.get_angle()
+        ticks[0] += 1
+
+    robot = (ETRobo(backend='simulator', name=engine)
+             .add_device('right_motor', device_type=Motor, port='B')
+             .add_device('left_motor', device_type=Motor, port='C')
+             .add_device('color_sensor', device_type=ColorSensor, port='2')
+             .add_device('gyro_sensor', device_type=GyroSensor, port='4')
+             .add_handler(tracer))
+
+    # シミュレータが終了した後のタイムアウトの待ち時間は計測に含めない
+    timeout = 0.5
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    robot.dispatch(interval=args.interval, ports=tuple(args.ports), timeout=timeout,
+                   engine=engine, stats=args.stats)
+    cpu_time = time.process_time() - start_cpu
+    wall_time = time.perf_counter() - start_time - timeout
+
+    result = results.get()
+    simulator.join()
+
+    result['ticks'] = ticks[0]
+    result['ticks_per_second'] = ticks[0] / wall_time
+    result['cpu'] = cpu_time / max(ticks[0], 1) * 1_000_000
+    return result
+
+
+def main() -> None:
+    args = parse_args()
+    results = [(engine, run_engine(engine, args)) for engine in args.engines]
+
+    print('{:<10} {:>7} {:>10} {:>12} {:>18} {:>12}'.format(
+        'engine', 'ticks', 'ticks/s', 'cpu(us/tick)', 'position(m)', 'line(mm)'))
+
+    for engine, result in results:
+        print('{:<10} {:>7} {:>10.1f} {:>12.1f} {:>18} {:>12.1f}'.format(
+            engine, result['ticks'], result['ticks_per_second'], result['cpu'],
+            '({:.3f}, {:.3f})'.format(result['x'], result['y']), result['line_distance'] * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+'''シミュレータとの通信の方法（engine）ごとの応答時間とCPU使用量を計測するためのスクリプト。
+
+Unityの代わりにパケットを一定の間隔で送信するプロセスを起動し、
+dispatch(engine='thread') と dispatch(engine='selector') のそれぞれについて、
+パケットを送信してから制御プログラムの応答を受信するまでの時間（tick latency）と、
+制御プログラムのプロセスの1周期あたりのCPU時間を出力する。
+
+使用例:
+    python benchmark_simulator_engines.py
+    python benchmark_simulator_engines.py --packets 4000 --packet-interval 0.0025 --interval 0.01
+'''
+import argparse
+import multiprocessing
+import selectors
+import socket
+import struct
+import time
+from typing import Any, Dict, List
+
+from etrobo_python import ColorSensor, ETRobo, GyroSensor, Motor
+
+_ENGINES = ('thread', 'selector')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packets', type=int, default=2000,
+                        help='Number of packets sent by the simulator')
+    parser.add_argument('--packet-interval', type=float, default=0.0025,
+                        help='Interval of packets sent by the simulator in seconds')
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='Interval of the control handler in seconds')
+    parser.add_argument('--ports', type=int, nargs=2, default=[54101, 54102],
+                        help='Port numbers of the simulator and the control program')
+    return parser.parse_args()
+
+
+def run_simulator(
+    ports: List[int],
+    packets: int,
+    packet_interval: float,
+    results: Any,
+) -> None:
+    '''Unityの代わりにパケットを送信し、応答までの時間（単位はマイクロ秒）をresultsに書き込む。
+    '''
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', ports[0]))
+    sock.settimeout(10.0)
+
+    # 接続を待機する
+    sock.recvfrom(1024)
+    address = ('127.0.0.1', ports[1])
+    sock.setblocking(False)
+
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+
+    buffer = bytearray(1024)
+    reply = bytearray(1024)
+    step = round(packet_interval * 1_000_000)
+    send_clocks: Dict[int, int] = {}
+    latencies = []
+
+    sock.sendto(buffer, address)
+    next_time = time.perf_counter()
+
+    for i in range(1, packets + 1):
+        struct.pack_into('<Q', buffer, 16, i * step)
+        send_clocks[i * step] = time.perf_counter_ns()
+        sock.sendto(buffer, address)
+        next_time += packet_interval
+
+        # 次のパケットの送信時刻まで応答を受信する
+        while True:
+            timeout = next_time - time.perf_counter()
+            if timeout <= 0:
+                break
+
+            if len(selector.select(timeout)) == 0:
+                continue
+
+            while True:
+                try:
+                    sock.recv_into(reply)
+                except BlockingIOError:
+                    break
+
+                clock = send_clocks.pop(struct.unpack_from('<Q', reply, 8)[0], None)
+                if clock is not None:
+                    latencies.append((time.perf_counter_ns() - clock) // 1000)
+
+    selector.close()
+    sock.close()
+    results.extend(latencies)
+
+
+def run_engine(engine: str, args: argparse.Namespace) -> Dict[str, float]:
+    manager = multiprocessing.Manager()
+    results = manager.list()
+
+    simulator = multiprocessing.Process(
+        target=run_simulator,
+        args=(args.ports, args.packets, args.packet_interval, results))
+    simulator.start()
+    time.sleep(0.5)
+
+    def handler(
+        left_motor: Motor,
+        right_motor: Motor,
+        color_sensor: ColorSensor,
+        gyro_sensor: GyroSensor,
+    ) -> None:
+        power = 50 + (color_sensor.get_brightness() - gyro_sensor.get_angle()) // 10
+        left_motor.set_power(power + left_motor.get_count() % 2)
+        right_motor.set_power(power - right_motor.get_count() % 2)
+
+    robot = (ETRobo(backend='simulator')
+             .add_device('left_motor', device_type=Motor, port='C')
+             .add_device('right_motor', device_type=Motor, port='B')
+             .add_device('color_sensor', device_type=ColorSensor, port='2')
+             .add_device('gyro_sensor', device_type=GyroSensor, port='4')
+             .add_handler(handler))
+
+    start_cpu = time.process_time()
+    robot.dispatch(interval=args.interval, ports=tuple(args.ports), timeout=0.5, engine=engine)
+    cpu_time = time.process_time() - start_cpu
+
+    simulator.join()
+    latencies = sorted(results)
+    manager.shutdown()
+
+    def percentile(p: float) -> float:
+        if len(latencies) == 0:
+            return 0.0
+
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] / 1000
+
+    return {
+        'ticks': len(latencies),
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'max': percentile(1.0),
+        'cpu': cpu_time / max(len(latencies), 1) * 1_000_000,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    results = [(engine, run_engine(engine, args)) for engine in _ENGINES]
+
+    print('{:<10} {:>6} {:>9} {:>9} {:>9} {:>9} {:>12}'.format(
+        'engine', 'ticks', 'p50(ms)', 'p95(ms)', 'p99(ms)', 'max(ms)', 'cpu(us/tick)'))
+
+    for engine, result in results:
+        print('{:<10} {:>6} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>12.1f}'.format(
+            engine, result['ticks'], result['p50'], result['p95'], result['p99'],
+            result['max'], result['cpu']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+'''制御プログラムの起動時間（モジュールの読み込み時間）を計測するためのスクリプト。
+
+新しいpythonプロセスで `python -X importtime` を使ってETRoboオブジェクトを作成し、
+プロセス全体の実行時間と、モジュールごとの読み込み時間を出力する。
+結果をJSON形式で出力して保存しておけば、起動時間の変化を追跡できる。
+
+使用例:
+    python benchmark_startup.py
+    python benchmark_startup.py --backend replay --repeat 20 --top 15
+    python benchmark_startup.py --backend simulator --json > startup.json
+'''
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+_SCRIPT = 'from etrobo_python import ETRobo; ETRobo(backend={!r})'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backend', type=str, default='simulator',
+                        help='Name of the backend to be loaded')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Number of measurements')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Number of modules to be shown')
+    parser.add_argument('--json', action='store_true',
+                        help='Output the results in JSON format')
+    return parser.parse_args()
+
+
+def parse_importtime(text: str) -> List[Tuple[str, int, int, int]]:
+    '''`-X importtime` の出力を解析する。
+
+    Args:
+        text: 標準エラー出力の文字列。
+
+    Returns:
+        モジュール名、読み込み時間、子モジュールを含む読み込み時間（単位はマイクロ秒）、階層の深さのタプルのリスト。
+    '''
+    records = []
+
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        columns = line[len('import time:'):].split('|')
+        if len(columns) != 3 or not columns[0].strip().isdigit():
+            continue
+
+        name = columns[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), int(columns[0]), int(columns[1]), depth))
+
+    return records
+
+
+def measure(backend: str) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    '''新しいプロセスでバックエンドを読み込み、実行時間とモジュールごとの読み込み時間を計測する。
+    '''
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([root] + [p for p in [env.get('PYTHONPATH')] if p])
+
+    start_time = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _SCRIPT.format(backend)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env, check=False)
+    elapsed = time.perf_counter() - start_time
+
+    stderr = result.stderr.decode('utf-8', errors='replace')
+    if result.returncode != 0:
+        raise Exception('Failed to load the backend: {}\n{}'.format(backend, stderr))
+
+    return elapsed, parse_importtime(stderr)
+
+
+def main() -> None:
+    args = parse_args()
+    wall_times = []
+    import_times = []
+    modules = {}  # type: Dict[str, List[int]]
+
+    for _ in range(args.repeat):
+        elapsed, records = measure(args.backend)
+        wall_times.append(elapsed * 1000)
+        import_times.append(sum(c for _, _, c, depth in records if depth == 0) / 1000)
+
+        for name, self_time, cumulative_time, _ in records:
+            modules.setdefault(name, [0, 0])
+            modules[name][0] += self_time
+            modules[name][1] += cumulative_time
+
+    wall_times.sort()
+    import_times.sort()
+    top_modules = sorted(modules.items(), key=lambda x: -x[1][0])[:args.top]
+
+    result = {
+        'backend': args.backend,
+        'repeat': args.repeat,
+        'wall_ms': {
+            'median': wall_times[len(wall_times) // 2],
+            'min': wall_times[0],
+            'max': wall_times[-1],
+        },
+        'import_ms': {
+            'median': import_times[len(import_times) // 2],
+            'min': import_times[0],
+            'max': import_times[-1],
+        },
+        'modules': [
+            {
+                'name': name,
+                'self_ms': self_time / args.repeat / 1000,
+                'cumulative_ms': cumulative_time / args.repeat / 1000,
+            }
+            for name, (self_time, cumulative_time) in top_modules],
+    }  # type: Dict[str, Any]
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print('backend: {} (repeat={})'.format(args.backend, args.repeat))
+    print('process time: median={:.1f}ms min={:.1f}ms max={:.1f}ms'.format(
+        result['wall_ms']['median'], result['wall_ms']['min'], result['wall_ms']['max']))
+    print('import time:  median={:.1f}ms min={:.1f}ms max={:.1f}ms'.format(
+        result['import_ms']['median'], result['import_ms']['min'], result['import_ms']['max']))
+    print()
+    print('{:<48} {:>10} {:>14}'.format('module', 'self(ms)', 'cumulative(ms)'))
+
+    for module in result['modules']:
+        print('{:<48} {:>10.2f} {:>14.2f}'.format(
+            module['name'], module['self_ms'], module['cumulative_ms']))
+
+
+if __name__ == '__main__':
+    main()
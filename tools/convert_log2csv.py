@@ -1,69 +1,270 @@
+'''ログファイルをCSVファイル（またはnpzファイル）に変換するためのスクリプト。
+
+ログデータは一定のフレーム数ごとに変換して書き込むため、大きなログファイルも一定のメモリ量で変換できる。
+numpyがインストールされている場合はフィールドごとにまとめて変換する。
+複数のログファイル（ワイルドカードも可）を指定した場合は、複数のプロセスで並列に変換する。
+
+使用例:
+    python convert_log2csv.py run.log run.csv
+    python convert_log2csv.py run.log -o run.npz
+    python convert_log2csv.py 'logs/*.log' --output-dir csv --jobs 4
+    python convert_log2csv.py 'logs/*.log' --format npz
+'''
 import argparse
+import concurrent.futures
 import csv
-from typing import List
+import glob
+import os
+import sys
+import time
+from typing import Any, List, Optional, Tuple
 
 from etrobo_python.log import LogReader
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+# Hubのボタンの状態を展開した列（列名, ビット）
+HUB_BUTTONS = (
+    ('left_button', 0x01),
+    ('right_button', 0x02),
+    ('up_button', 0x04),
+    ('down_button', 0x08),
+)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument('logfile', type=str, default=None, help='Path to log file (input)')
-    parser.add_argument('csvfile', type=str, default=None, help='Path to csv file (output)')
+    parser.add_argument('paths', type=str, nargs='+',
+                        help='Paths (or glob patterns) of log files. '
+                        'The legacy form "LOGFILE OUTFILE" is also accepted.')
+    parser.add_argument('-o', '--output', type=str, default=None,
+                        help='Output file for a single log file (.npz for the npz format, otherwise CSV)')
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='Directory of output files (default: same directory as the log file)')
+    parser.add_argument('--format', type=str, default='csv', choices=('csv', 'npz', 'both'),
+                        help='Output format')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=65536,
+                        help='Number of frames converted at once')
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
+def get_columns(reader: LogReader) -> List[Tuple[int, str, int]]:
+    '''CSVに出力する列のリストを返す。
+    列は(デバイスの番号, フィールド名, ビット)で表現する（ビットが0の場合は値をそのまま出力する）。
+    '''
+    columns = []
+
+    for i, ((_, type_name), fields) in enumerate(zip(reader.get_devices(), reader.get_fields())):
+        for field, _ in fields:
+            if type_name == 'hub' and field == 'button':
+                columns.extend((i, field, bit) for _, bit in HUB_BUTTONS)
+            else:
+                columns.append((i, field, 0))
+
+    return columns
+
+
+def get_header_rows(reader: LogReader) -> List[List[str]]:
     rows: List[List[str]] = [[], []]
 
-    with LogReader(args.logfile) as reader:
-        devices = reader.get_devices()
-        for name, type_name in devices:
-            rows[0].append(f'{name}:{type_name}')
-            if type_name == 'hub':
-                rows[0].extend(['', '', '', ''])
-                rows[1].extend(['time', 'left_button', 'right_button', 'up_button', 'down_button'])
-            elif type_name == 'motor':
-                rows[1].append('count')
-            elif type_name == 'color_sensor':
-                rows[0].extend(['', '', '', ''])
-                rows[1].extend(['brightness', 'ambient', 'red', 'green', 'blue'])
-            elif type_name == 'touch_sensor':
-                rows[1].append('pressed')
-            elif type_name == 'sonar_sensor':
-                rows[1].append('distance')
-            elif type_name == 'gyro_sensor':
-                rows[0].extend([''])
-                rows[1].extend(['angle', 'velocity'])
-
-        for values in reader:
-            rows.append([])
-            for value, (_, type_name) in zip(values, devices):
-                if type_name == 'hub':
-                    rows[-1].append(str(int.from_bytes(value[:4], 'big')))
-                    rows[-1].append(str(int(value[4] & 0x01 != 0)))
-                    rows[-1].append(str(int(value[4] & 0x02 != 0)))
-                    rows[-1].append(str(int(value[4] & 0x04 != 0)))
-                    rows[-1].append(str(int(value[4] & 0x08 != 0)))
-                elif type_name == 'motor':
-                    rows[-1].append(str(int.from_bytes(value, 'big', signed=True)))
-                elif type_name == 'color_sensor':
-                    rows[-1].append(str(value[0]))
-                    rows[-1].append(str(value[1]))
-                    rows[-1].append(str(value[2]))
-                    rows[-1].append(str(value[3]))
-                    rows[-1].append(str(value[4]))
-                elif type_name == 'touch_sensor':
-                    rows[-1].append(str(int(value[0])))
-                elif type_name == 'sonar_sensor':
-                    rows[-1].append(str(int.from_bytes(value, 'big')))
-                elif type_name == 'gyro_sensor':
-                    rows[-1].append(str(int.from_bytes(value[:2], 'big', signed=True)))
-                    rows[-1].append(str(int.from_bytes(value[2:], 'big', signed=True)))
-
-    with open(args.csvfile, 'w') as writer:
+    for (name, type_name), fields in zip(reader.get_devices(), reader.get_fields()):
+        names = []
+        for field, _ in fields:
+            if type_name == 'hub' and field == 'button':
+                names.extend(button for button, _ in HUB_BUTTONS)
+            else:
+                names.append(field)
+
+        rows[0].extend([f'{name}:{type_name}'] + [''] * (len(names) - 1))
+        rows[1].extend(names)
+
+    return rows
+
+
+def write_csv_numpy(reader: LogReader, path: str, chunk_size: int) -> int:
+    devices = reader.get_devices()
+    columns = get_columns(reader)
+    count = 0
+
+    with open(path, 'w', newline='') as writer:
+        csv.writer(writer).writerows(get_header_rows(reader))
+
+        for arrays in reader.iter_arrays(chunk_size):
+            for begin in range(0, len(arrays), chunk_size):
+                chunk = arrays[begin:begin + chunk_size]
+                matrix = np.empty((len(chunk), len(columns)), dtype=np.int64)
+
+                for j, (device, field, bit) in enumerate(columns):
+                    values = chunk[devices[device][0]][field]
+                    matrix[:, j] = (values & bit) != 0 if bit != 0 else values
+
+                np.savetxt(writer, matrix, fmt='%d', delimiter=',', newline='\r\n')
+                count += len(chunk)
+
+    return count
+
+
+def write_csv_python(reader: LogReader, path: str, chunk_size: int) -> int:
+    fields = reader.get_fields()
+    decoders = reader.get_structs()
+    columns = get_columns(reader)
+
+    # デバイスごとに展開した値のリストの中での各フィールドの位置
+    positions = {}
+    for i, device_fields in enumerate(fields):
+        for j, (field, _) in enumerate(device_fields):
+            positions[(i, field)] = j
+
+    count = 0
+
+    with open(path, 'w', newline='') as writer:
         csv_writer = csv.writer(writer)
+        csv_writer.writerows(get_header_rows(reader))
+
+        rows: List[List[int]] = []
+        for frame in reader:
+            values = [decoder.unpack(binary) for decoder, binary in zip(decoders, frame)]
+            rows.append([
+                int(values[d][positions[(d, f)]] & b != 0) if b != 0 else values[d][positions[(d, f)]]
+                for d, f, b in columns])
+
+            if len(rows) >= chunk_size:
+                csv_writer.writerows(rows)
+                count += len(rows)
+                rows.clear()
+
         csv_writer.writerows(rows)
+        count += len(rows)
+
+    return count
+
+
+def write_npz(reader: LogReader, path: str) -> int:
+    if np is None:
+        raise ImportError('numpy is required to write npz files.')
+
+    arrays = reader.to_arrays()
+    columns = {
+        f'{name}.{field}': arrays[name][field]
+        for (name, _), fields in zip(reader.get_devices(), reader.get_fields())
+        for field, _ in fields}
+
+    np.savez(path, **columns)
+
+    return len(arrays)
+
+
+def get_output_path(logfile: str, output_dir: Optional[str], ext: str) -> str:
+    directory = output_dir if output_dir is not None else os.path.dirname(logfile)
+    stem = os.path.splitext(os.path.basename(logfile))[0]
+    return os.path.join(directory, stem + ext)
+
+
+def convert(
+    logfile: str,
+    csvfile: Optional[str],
+    npzfile: Optional[str],
+    chunk_size: int,
+) -> Tuple[str, int, float]:
+    '''1つのログファイルを変換する（ワーカープロセスで実行される）。
+
+    Returns:
+        (ログファイルのパス, フレーム数, 処理時間)のタプル。
+    '''
+    start_time = time.time()
+    count = 0
+
+    if csvfile is not None:
+        with LogReader(logfile) as reader:
+            if np is not None:
+                count = write_csv_numpy(reader, csvfile, chunk_size)
+            else:
+                count = write_csv_python(reader, csvfile, chunk_size)
+
+    if npzfile is not None:
+        with LogReader(logfile) as reader:
+            count = write_npz(reader, npzfile)
+
+    return logfile, count, time.time() - start_time
+
+
+def is_log_file(path: str) -> bool:
+    '''指定されたパスが読み込めるログファイルであればTrueを返す。
+    '''
+    if not os.path.isfile(path):
+        return False
+
+    try:
+        with LogReader(path):
+            return True
+    except Exception:
+        return False
+
+
+def get_single_task(logfile: str, outfile: str) -> Tuple[str, Optional[str], Optional[str]]:
+    if outfile.endswith('.npz'):
+        return (logfile, None, outfile)
+    else:
+        return (logfile, outfile, None)
+
+
+def get_tasks(args: argparse.Namespace) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    # 出力ファイルが指定された場合
+    if args.output is not None:
+        if len(args.paths) != 1 or len(glob.glob(args.paths[0])) > 1:
+            raise ValueError('--output can be used with only one log file.')
+
+        return [get_single_task(args.paths[0], args.output)]
+
+    # 以前の形式（ログファイル 出力ファイル）で指定された場合
+    # 2番目のパスが読み込めるログファイルでなければ出力ファイルとして扱う
+    if len(args.paths) == 2 and not glob.has_magic(args.paths[1]) and not is_log_file(args.paths[1]):
+        return [get_single_task(*args.paths)]
+
+    logfiles: List[str] = []
+    for path in args.paths:
+        matches = sorted(glob.glob(path))
+        logfiles.extend(matches if len(matches) != 0 else [path])
+
+    tasks = []
+    for logfile in logfiles:
+        csvfile = get_output_path(logfile, args.output_dir, '.csv')
+        npzfile = get_output_path(logfile, args.output_dir, '.npz')
+        tasks.append((
+            logfile,
+            csvfile if args.format in ('csv', 'both') else None,
+            npzfile if args.format in ('npz', 'both') else None))
+
+    return tasks
+
+
+def main() -> None:
+    args = parse_args()
+    tasks = get_tasks(args)
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    def report(index: int, result: Tuple[str, int, float]) -> None:
+        logfile, count, elapsed = result
+        print(f'[{index}/{len(tasks)}] {logfile}: {count} frames ({elapsed:.2f} sec)', file=sys.stderr)
+
+    if args.jobs <= 1 or len(tasks) <= 1:
+        for i, task in enumerate(tasks):
+            report(i + 1, convert(*task, chunk_size=args.chunk_size))
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures: List[Any] = [
+            executor.submit(convert, *task, chunk_size=args.chunk_size) for task in tasks]
+
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            report(i + 1, future.result())
 
 
 if __name__ == '__main__':
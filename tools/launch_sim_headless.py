@@ -0,0 +1,56 @@
+'''Unityのシミュレータの代わりに、画面を持たないシミュレータを起動するためのスクリプト。
+Unityのシミュレータと同じポート番号で通信するため、制御プログラムはそのまま dispatch() で接続できる。
+
+使用例:
+    python launch_sim_headless.py
+    python launch_sim_headless.py --course right --rate 1.0 --duration 60
+'''
+import argparse
+
+from etrobo_python.backends.simulator.headless import HeadlessSimulator
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--course', type=str, default='left', choices=['left', 'right'],
+                        help='Course of the robot')
+    parser.add_argument('--ports', type=int, nargs=2, default=None,
+                        help='Port numbers of the simulator and the control program')
+    parser.add_argument('--step', type=float, default=0.0025,
+                        help='Interval of packets in simulation seconds')
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='Interval of the control handler in seconds')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Simulation speed relative to real time (wait for replies if omitted)')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='Simulation time in seconds')
+    parser.add_argument('--timeout', type=float, default=5.0,
+                        help='Timeout for the connection in seconds')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    simulator = HeadlessSimulator(
+        course=args.course,
+        ports=tuple(args.ports) if args.ports is not None else None,
+        step=args.step,
+        interval=args.interval,
+        rate=args.rate,
+        timeout=args.timeout,
+    )
+
+    print(f'Waiting for the control program on port {simulator.ports[0]}.')
+
+    try:
+        simulator.run(duration=args.duration)
+    except KeyboardInterrupt:
+        print('Interrupted by keyboard.')
+
+    model = simulator.model
+    print(f'time={simulator.time / 1_000_000:.3f}s packets={simulator.packets} replies={simulator.replies} '
+          f'position=({model.x:.3f}, {model.y:.3f}) heading={model.heading:.3f}')
+
+
+if __name__ == '__main__':
+    main()